@@ -0,0 +1,84 @@
+"""Compares the JSON providers on a large serialized model.
+
+Run from the ``backend`` directory:
+
+    python benchmarks/json_provider_benchmark.py [number of layers]
+"""
+import os
+import sys
+import timeit
+
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from neurodex.json_provider import JSONProvider, OrjsonProvider  # noqa: E402
+
+DESCRIPTION = '<div class="document"><p>Applies a linear transformation to the incoming data.</p></div>' * 20
+
+
+def layer_type(index):
+    return {
+        'layerTypeId': f'torch.nn.Layer{index}',
+        'layerName': f'Layer{index}',
+        'description': DESCRIPTION,
+        'parameters': [{
+            'name': f'parameter_{parameter}',
+            'description': 'The size of each input sample. Default: ``True``',
+            'type': 'int',
+            'defaultValue': None,
+            'required': parameter % 2 == 0,
+        } for parameter in range(8)],
+    }
+
+
+def model_layer(index):
+    return {
+        'activatorTargetId': index,
+        'displayName': f'Layer{index}',
+        'name': 'Layer',
+        'position': index,
+        'type': 'model_layer',
+        'layerType': layer_type(index % 30),
+        'parameterData': {f'parameter_{parameter}': {'value': str(parameter)} for parameter in range(4)},
+    }
+
+
+def model_document(layer_count):
+    layers = [model_layer(index) for index in range(layer_count)]
+    return {
+        'modelId': 'c0ffee00-0000-0000-0000-000000000000',
+        'name': 'Benchmark',
+        'createdAt': '2020-05-01T12:00:00',
+        'updatedAt': '2020-05-01T12:00:00',
+        'layers': layers,
+        'activators': [{
+            'modelActivatorId': index,
+            'position': index,
+            'parameterData': {},
+            'value': layer,
+        } for index, layer in enumerate(layers)],
+    }
+
+
+def main():
+    layer_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    document = model_document(layer_count)
+
+    app = Flask(__name__)
+    providers = [JSONProvider(app), OrjsonProvider(app)]
+
+    with app.app_context():
+        outputs = [provider.dumps(document) for provider in providers]
+        assert outputs[0] == outputs[1], 'The providers produce different output'
+        print(f'{layer_count} layers, {len(outputs[0]) / 1024:.0f} KiB per response')
+
+        for provider in providers:
+            number = 20
+            seconds = min(timeit.repeat(lambda: provider.response(document), number=number, repeat=5)) / number
+            print(f'{type(provider).__name__:>16}: {seconds * 1000:8.2f} ms per response')
+
+
+if __name__ == '__main__':
+    main()
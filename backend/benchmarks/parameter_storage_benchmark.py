@@ -0,0 +1,90 @@
+"""Compares the time to load and save a model with the table and the document parameter storage.
+
+Builds a model in an in-memory SQLite database, copies its parameters into the document storage and measures the
+full load of the model and the update of a single parameter with each storage. Run from the ``backend`` directory:
+
+    python benchmarks/parameter_storage_benchmark.py [number of layers]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from sqlalchemy import event  # noqa: E402
+
+from neurodex import app, db  # noqa: E402
+from neurodex.data.compiled_schema import dump_model  # noqa: E402
+from neurodex.data.loading import load_model  # noqa: E402
+from neurodex.data.models import (Base, Function, LayerType, Model,  # noqa: E402
+                                  ModelActivator, ModelLayer)
+from neurodex.data.parameter_storage import (PRIMITIVE_KEY, STORAGES,  # noqa: E402
+                                             migrate_parameters)
+
+
+def create_model(layer_count):
+    storage = STORAGES['tables']
+    layer_type = LayerType(layer_type_id='torch.nn.Linear', layer_name='Linear', description='')
+    function = Function(name='relu', description='')
+
+    model = Model(model_id='benchmark', name='Benchmark')
+    for index in range(layer_count):
+        layer = ModelLayer(name='Linear', layer_type=layer_type, position=index)
+        storage.write_all(layer, {f'parameter_{parameter}': {PRIMITIVE_KEY: str(parameter)}
+                                  for parameter in range(3)})
+        model.layers.append(layer)
+        activator = ModelActivator(activator_target=function, position=index)
+        storage.write(activator, 'inplace', {PRIMITIVE_KEY: 'True'})
+        model.activators.append(activator)
+
+    db.session.add(model)
+    db.session.commit()
+    migrate_parameters(STORAGES['tables'], STORAGES['document'])
+    db.session.expunge_all()
+
+
+def load():
+    dump_model(load_model('benchmark'))
+    db.session.expunge_all()
+
+
+def save():
+    model = load_model('benchmark')
+    layer = model.layers[len(model.layers) // 2]
+    STORAGES[app.config['PARAMETER_STORAGE']].write(layer, 'parameter_0', {PRIMITIVE_KEY: 'changed'})
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def count_queries(function):
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    function()
+    event.remove(db.engine, 'before_cursor_execute', count)
+    return len(statements)
+
+
+def main():
+    layer_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with app.app_context():
+        Base.metadata.create_all(bind=db.engine)
+        create_model(layer_count)
+        print(f'{layer_count} layers')
+
+        for name in STORAGES:
+            app.config['PARAMETER_STORAGE'] = name
+            for action, function in (('load', load), ('save', save)):
+                number = 5
+                seconds = min(timeit.repeat(function, number=number, repeat=5)) / number
+                queries = count_queries(function)
+                print(f'{name:>9} {action}: {seconds * 1000:8.2f} ms per model, {queries} queries')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Measures how long building the layer search index and searching it take.
+
+Indexes the layer types of the catalog artifact, optionally ``--copies`` times to simulate a larger catalog, and
+searches it with prefixes of the layer and parameter names, as they arrive while a user types. Fails if the 99th
+percentile of the search latency exceeds ``--max-p99-ms``. Run from the ``backend`` directory after
+``flask catalog build``:
+
+    python benchmarks/search_benchmark.py [--catalog src/neurodex/catalog.json] [--copies 1] [--max-p99-ms 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('JWT_SECRET_KEY', 'benchmark')
+
+from neurodex.data_importer.catalog import read_catalog  # noqa: E402
+from neurodex.service.catalog_search import SearchIndex, tokenize  # noqa: E402
+
+
+def load_entries(path, copies):
+    entries = read_catalog(path)['layer_types']
+    if copies == 1:
+        return entries
+    return [dict(entry, layer_type_id=f'{entry["layer_type_id"]}{copy}', layer_name=f'{entry["layer_name"]}{copy}')
+            for copy in range(copies) for entry in entries]
+
+
+def make_queries(entries, count):
+    """Returns the prefixes of one or two names, like the queries sent while typing them."""
+    rng = random.Random(0)
+    words = [word for entry in entries for word in tokenize(entry['layer_name'])]
+    words += [word for entry in entries for parameter in entry['parameters'] for word in tokenize(parameter['name'])]
+    queries = []
+    while len(queries) < count:
+        query = ' '.join(rng.choice(words) for _ in range(rng.choice((1, 1, 2))))
+        queries.extend(query[:length] for length in range(1, len(query) + 1))
+    return queries[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--catalog', default=os.path.join(SRC_DIR, 'neurodex', 'catalog.json'))
+    parser.add_argument('--copies', type=int, default=1, help='how often the layer types are indexed')
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--limit', type=int, default=20, help='results per query')
+    parser.add_argument('--max-p99-ms', type=float, default=5, help='limit of the 99th percentile of a search')
+    args = parser.parse_args()
+
+    entries = load_entries(args.catalog, args.copies)
+    start = time.perf_counter()
+    index = SearchIndex(0, entries)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f'index of {len(entries)} layer types and {len(index.tokens)} words built in {build_ms:.1f} ms')
+
+    latencies = []
+    for query in make_queries(entries, args.queries):
+        start = time.perf_counter()
+        index.search(query, args.limit)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f'{len(latencies)} searches: p50 {p50:.3f} ms, p99 {p99:.3f} ms, max {latencies[-1]:.3f} ms')
+
+    if p99 > args.max_p99_ms:
+        print(f'FAILED: the 99th percentile of a search is {p99:.3f} ms, more than {args.max_p99_ms} ms')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
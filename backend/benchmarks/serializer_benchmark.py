@@ -0,0 +1,95 @@
+"""Checks that the compiled serializers match the marshmallow schemas and compares their speed.
+
+Builds a model in an in-memory SQLite database, serializes it with both and fails if the json differs.
+Run from the ``backend`` directory:
+
+    python benchmarks/serializer_benchmark.py [number of layers]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from neurodex import app, db  # noqa: E402
+from neurodex.data.compiled_schema import (dump_function, dump_layer_type,  # noqa: E402
+                                           dump_model, dump_model_activator,
+                                           dump_model_layer)
+from neurodex.data.loading import load_model  # noqa: E402
+from neurodex.data.models import (Base, Function, FunctionParameter, LayerType,  # noqa: E402
+                                  LayerTypeParameter, Model, ModelActivator,
+                                  ModelActivatorParameterData, ModelLayer,
+                                  ModelLayerParameterData, PrimitiveValue)
+from neurodex.data.schema import (ModelActivatorSchema,  # noqa: E402
+                                  activation_function_schema,
+                                  layer_type_schema, model_layer_schema,
+                                  model_schema)
+
+DESCRIPTION = '<div class="document"><p>Applies a linear transformation to the incoming data.</p></div>' * 20
+
+
+def create_model(layer_count):
+    layer_types = []
+    for index in range(10):
+        layer_type = LayerType(layer_type_id=f'torch.nn.Layer{index}', layer_name=f'Layer{index}',
+                               description=DESCRIPTION)
+        layer_type.parameters = [LayerTypeParameter(name=f'parameter_{parameter}', type='int',
+                                                    description='Size of each input sample', required=True)
+                                 for parameter in range(6)]
+        layer_types.append(layer_type)
+
+    function = Function(name='relu', description='Rectified linear unit')
+    function.parameters = [FunctionParameter(name='inplace', type='bool', default_value='False')]
+
+    model = Model(model_id='benchmark', name='Benchmark')
+    for index in range(layer_count):
+        layer_type = layer_types[index % len(layer_types)]
+        layer = ModelLayer(name=layer_type.layer_name, layer_type=layer_type, position=index)
+        layer.parameter_data = [ModelLayerParameterData(parameter_name=f'parameter_{parameter}',
+                                                        value=PrimitiveValue(value=str(parameter)))
+                                for parameter in range(3)]
+        model.layers.append(layer)
+        activator = ModelActivator(activator_target=layer if index % 2 else function, position=index)
+        activator.parameter_data = [ModelActivatorParameterData(parameter_name='inplace',
+                                                                value=PrimitiveValue(value='True'))]
+        model.activators.append(activator)
+
+    db.session.add(model)
+    db.session.commit()
+    db.session.expunge_all()
+    return load_model('benchmark')
+
+
+def check_parity(model):
+    dumps = app.json_provider.dumps
+    pairs = [(model_schema.dump, dump_model, [model])]
+    pairs.append((model_layer_schema.dump, dump_model_layer, model.layers))
+    pairs.append((ModelActivatorSchema().dump, dump_model_activator, model.activators))
+    pairs.append((layer_type_schema.dump, dump_layer_type, [layer.layer_type for layer in model.layers]))
+    functions = [activator.activator_target for activator in model.activators
+                 if isinstance(activator.activator_target, Function)]
+    pairs.append((activation_function_schema.dump, dump_function, functions))
+
+    for reference, compiled, objects in pairs:
+        for obj in objects:
+            assert dumps(reference(obj)) == dumps(compiled(obj)), f'{compiled.__name__} differs for {obj}'
+
+
+def main():
+    layer_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with app.app_context():
+        Base.metadata.create_all(bind=db.engine)
+        model = create_model(layer_count)
+        check_parity(model)
+        print(f'{layer_count} layers, compiled serializers match the schemas')
+
+        for name, dump in (('marshmallow', model_schema.dump), ('compiled', dump_model)):
+            number = 5
+            seconds = min(timeit.repeat(lambda: dump(model), number=number, repeat=5)) / number
+            print(f'{name:>12}: {seconds * 1000:8.2f} ms per model')
+
+
+if __name__ == '__main__':
+    main()
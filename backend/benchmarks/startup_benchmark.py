@@ -0,0 +1,66 @@
+"""Checks that the web app starts fast and small, e.g. that no worker imports torch again.
+
+Imports the app like a gunicorn worker does in fresh interpreters and fails if the import takes longer than
+``--max-seconds``, needs more than ``--max-rss-mb`` of memory or imports one of the modules that only the catalog
+build needs. Run from the ``backend`` directory:
+
+    python benchmarks/startup_benchmark.py [--runs 5] [--max-seconds 3] [--max-rss-mb 200]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+# Modules of requirements-catalog.txt, only "flask catalog build" may import them
+CATALOG_MODULES = ['torch', 'docutils', 'numpy']
+
+MEASURE = '''
+import json, resource, sys, time
+start = time.perf_counter()
+import neurodex.main
+seconds = time.perf_counter() - start
+print(json.dumps({
+    'seconds': seconds,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'catalog_modules': [name for name in %r if name in sys.modules],
+}))
+''' % CATALOG_MODULES
+
+
+def measure():
+    environment = dict(os.environ, DATABASE_URL='sqlite://', FLASK_ENV='production', JWT_SECRET_KEY='benchmark')
+    output = subprocess.run([sys.executable, '-c', MEASURE], cwd=SRC_DIR, env=environment, check=True,
+                            stdout=subprocess.PIPE).stdout
+    return json.loads(output.decode('utf8').splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=3, help='limit of the median import time')
+    parser.add_argument('--max-rss-mb', type=float, default=200, help='limit of the median peak memory')
+    args = parser.parse_args()
+
+    results = [measure() for _ in range(args.runs)]
+    seconds = statistics.median(result['seconds'] for result in results)
+    rss_mb = statistics.median(result['rss_mb'] for result in results)
+    catalog_modules = sorted({name for result in results for name in result['catalog_modules']})
+    print(f'import of the app: {seconds:.2f} s, {rss_mb:.0f} MB peak memory (median of {args.runs} runs)')
+
+    failures = []
+    if seconds > args.max_seconds:
+        failures.append(f'the import took {seconds:.2f} s, more than {args.max_seconds} s')
+    if rss_mb > args.max_rss_mb:
+        failures.append(f'the app needs {rss_mb:.0f} MB, more than {args.max_rss_mb} MB')
+    if catalog_modules:
+        failures.append(f'the app imports {", ".join(catalog_modules)}, which only the catalog build needs')
+    for failure in failures:
+        print(f'FAILED: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
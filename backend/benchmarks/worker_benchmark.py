@@ -0,0 +1,211 @@
+"""Compares the throughput and latency of gunicorn worker classes on the request mix of the model editor.
+
+Starts the app with each worker class, lets concurrent clients edit their own model for a while and prints the
+requests per second and the latency percentiles. Logins are part of the mix, they hash a password with bcrypt and
+show how a slow request affects the other requests of a worker. Run from the ``backend`` directory:
+
+    DATABASE_URL=postgresql://... python benchmarks/worker_benchmark.py [--classes sync gthread gevent]
+
+Without DATABASE_URL a temporary SQLite database is used, which serializes all writes. SQLite doesn't cascade the
+deletion of layers there, so the mix leaves them out. The catalog is imported through the admin API, so it has to be
+built with ``flask catalog build`` first.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.cookies import SimpleCookie
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+GUNICORN_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'deploy', 'config',
+                               'gunicorn.conf.py')
+ADMIN = {'email': 'admin@neurodex.app', 'password': 'password'}
+LAYER_TYPE = 'torch.nn.Linear'
+
+# The requests of the editor and how often each of them is sent relative to the others
+REQUEST_MIX = [
+    ('get model', 8),
+    ('set layer parameter', 6),
+    ('move layer', 2),
+    ('add and delete layer', 2),
+    ('rename model', 1),
+    ('list models', 1),
+    ('layer catalog', 1),
+    ('login', 1),
+]
+
+
+class Client(object):
+    """A user of the editor with its own connection and its own model."""
+
+    def __init__(self, port):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        self.cookies = {}
+        self.model_id = None
+        self.layer_ids = []
+
+    def request(self, method, path, body=None):
+        headers = {'Content-Type': 'application/json'}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        data = json.dumps(body).encode('utf8') if body is not None else None
+
+        try:
+            self.connection.request(method, path, body=data, headers=headers)
+            response = self.connection.getresponse()
+        except (http.client.HTTPException, ConnectionError):
+            # sync workers close the connection after every response
+            self.connection.close()
+            self.connection.request(method, path, body=data, headers=headers)
+            response = self.connection.getresponse()
+
+        content = response.read()
+        for header in response.headers.get_all('Set-Cookie') or []:
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+        if response.getheader('Connection', '').lower() == 'close':
+            self.connection.close()
+        return response.status, content
+
+    def login(self):
+        return self.request('POST', '/api/auth/login', ADMIN)
+
+    def create_model(self, name):
+        status, content = self.request('POST', '/api/models', {'name': name})
+        self.model_id = json.loads(content)['modelId']
+        for _ in range(3):
+            self.request('POST', f'/api/models/{self.model_id}/layers', {'layerId': LAYER_TYPE})
+        status, content = self.request('GET', f'/api/models/{self.model_id}')
+        self.layer_ids = [layer['activatorTargetId'] for layer in json.loads(content)['layers']]
+
+    def send(self, name):
+        """Sends one request of the mix and returns its status."""
+        model = f'/api/models/{self.model_id}'
+        if name == 'get model':
+            return self.request('GET', model)[0]
+        if name == 'set layer parameter':
+            layer_id = random.choice(self.layer_ids)
+            return self.request('PUT', f'{model}/layers/{layer_id}/data/in_features',
+                                {'newValue': str(random.randint(1, 512))})[0]
+        if name == 'move layer':
+            layer_id = random.choice(self.layer_ids)
+            return self.request('PUT', f'{model}/layers/{layer_id}/order',
+                                {'index': random.randrange(len(self.layer_ids))})[0]
+        if name == 'add and delete layer':
+            status, content = self.request('POST', f'{model}/layers', {'layerId': LAYER_TYPE})
+            if status != 200:
+                return status
+            layer_id = json.loads(content)['layers'][-1]['activatorTargetId']
+            return self.request('DELETE', f'{model}/layers/{layer_id}')[0]
+        if name == 'rename model':
+            return self.request('PUT', f'{model}/name', {'name': f'benchmark-{uuid.uuid4()}'})[0]
+        if name == 'list models':
+            return self.request('GET', '/api/models')[0]
+        if name == 'layer catalog':
+            return self.request('GET', '/api/layers')[0]
+        return self.login()[0]
+
+
+def start_server(worker_class, port, args, environment):
+    # Uses the deployed configuration, the worker settings are read from the environment. Started in src, in backend
+    # gunicorn.py would shadow the gunicorn package.
+    command = [sys.executable, '-m', 'gunicorn', '--config', GUNICORN_CONFIG,
+               '--bind', f'127.0.0.1:{port}', '--access-logfile', os.devnull, '--error-logfile', '-',
+               'neurodex.main:app']
+    server = subprocess.Popen(command, cwd=SRC_DIR, env=dict(
+        environment, GUNICORN_WORKER_CLASS=worker_class, GUNICORN_WORKERS=str(args.workers),
+        GUNICORN_THREADS=str(args.threads if worker_class == 'gthread' else 1),
+        GUNICORN_WORKER_CONNECTIONS=str(args.clients)))
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f'gunicorn with {worker_class} workers did not start')
+
+
+def run(worker_class, port, args, environment, mix):
+    server = start_server(worker_class, port, args, environment)
+    try:
+        admin = Client(port)
+        admin.login()
+        status, content = admin.request('GET', '/api/layers')
+        if not json.loads(content):
+            admin.request('PUT', '/api/admin/import')
+
+        clients = [Client(port) for _ in range(args.clients)]
+        for index, client in enumerate(clients):
+            client.login()
+            client.create_model(f'benchmark-{worker_class}-{index}-{uuid.uuid4()}')
+
+        names = [name for name, weight in mix for _ in range(weight)]
+        latencies, errors = [], []
+        stop = time.monotonic() + args.duration
+
+        def work(client):
+            while time.monotonic() < stop:
+                start = time.monotonic()
+                try:
+                    status = client.send(random.choice(names))
+                except (http.client.HTTPException, OSError):
+                    status = None
+                latencies.append(time.monotonic() - start)
+                if status is None or status >= 400:
+                    errors.append(status)
+
+        threads = [threading.Thread(target=work, args=(client,)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, errors
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--classes', nargs='+', default=['sync', 'gthread', 'gevent'])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8, help='threads of each gthread worker')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--duration', type=float, default=20, help='seconds each worker class is measured')
+    parser.add_argument('--port', type=int, default=8093)
+    args = parser.parse_args()
+
+    environment = dict(os.environ, FLASK_ENV='production', JWT_SECRET_KEY='benchmark',
+                       DATABASE_POOL_SIZE=str(max(args.threads, 5)))
+    if 'DATABASE_URL' not in environment:
+        environment['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+    mix = REQUEST_MIX
+    if environment['DATABASE_URL'].startswith('sqlite'):
+        mix = [(name, weight) for name, weight in REQUEST_MIX if name != 'add and delete layer']
+
+    print(f'{args.workers} workers, {args.clients} clients, {args.duration:.0f} s per worker class')
+    for worker_class in args.classes:
+        latencies, errors = run(worker_class, args.port, args, environment, mix)
+        latencies.sort()
+        print(f'{worker_class:>8}: {len(latencies) / args.duration:8.1f} requests/s, '
+              f'p50 {percentile(latencies, 0.5) * 1000:7.1f} ms, p99 {percentile(latencies, 0.99) * 1000:7.1f} ms, '
+              f'{len(errors)} errors')
+
+
+if __name__ == '__main__':
+    main()
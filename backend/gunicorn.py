@@ -1,5 +1,9 @@
+import os
+
 bind = '0.0.0.0:8081'
-worker_class = 'sync'
+# sync, gthread or gevent, see deploy/config/gunicorn.conf.py
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
 loglevel = 'debug'
 acceslogformat = "%(h)s %(l)s %(u)s %(t)s %(r)s %(s)s %(b)s %(f)s %(a)s"
 reload = True
@@ -2,20 +2,21 @@ import logging
 import os
 
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
 from flask_compress import Compress
 from flask_marshmallow import Marshmallow
 from flask_jwt_extended import (JWTManager)
+from sqlalchemy import event
 
-from sendgrid import SendGridAPIClient
+from neurodex.database_pool import (TRANSACTION_POOLER, engine_options,
+                                    set_local_statement_timeout)
+from neurodex.database_routing import RoutingSQLAlchemy
+from neurodex.json_provider import OrjsonProvider
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
 BUILD_ROOT = os.path.join(os.getcwd(), '..', 'frontend', 'build')
 STATIC_DIR = os.path.join(BUILD_ROOT, 'static')
 app = Flask(__name__, static_folder=STATIC_DIR)
 Compress(app)
-bcrypt = Bcrypt(app)
 gunicorn_logger = logging.getLogger('gunicorn.error')
 app.logger.handlers = gunicorn_logger.handlers
 
@@ -27,7 +28,11 @@ elif profile == "production":
 else:
     app.config.from_object("neurodex.config.Config")
 
-db = SQLAlchemy(app)
+app.json_provider = OrjsonProvider(app)
+app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+
+db = RoutingSQLAlchemy(app)
+if app.config['DATABASE_POOLER'] == TRANSACTION_POOLER and app.config['DATABASE_STATEMENT_TIMEOUT']:
+    event.listen(db.session, 'after_begin', set_local_statement_timeout(app.config['DATABASE_STATEMENT_TIMEOUT']))
 ma = Marshmallow(app)
 jwt = JWTManager(app)
-sg = SendGridAPIClient(os.environ.get('SENDGRID_API_KEY'))
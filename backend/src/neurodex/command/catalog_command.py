@@ -0,0 +1,35 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from neurodex.data_importer.catalog import (CatalogError, read_catalog,
+                                            write_catalog)
+
+catalog_cli = AppGroup('catalog', help='Build the catalog of layer types.')
+
+
+@catalog_cli.command('build')
+@click.option('--output', type=click.Path(dir_okay=False), help='Overrides CATALOG_PATH.')
+@click.option('--full', is_flag=True, help='Extracts all docstrings instead of reusing the entries of the output.')
+@click.option('--processes', type=int, help='Processes that extract docstrings, the number of CPUs by default.')
+def build(output, full, processes):
+    """Extracts the layer types from torch and writes them to the catalog artifact.
+
+    Needs torch and docutils (requirements-catalog.txt), the web app only reads the artifact. Entries of the existing
+    artifact are reused for unchanged docstrings. Import it into the database with PUT /api/admin/import afterwards.
+    """
+    # Imported here, so only this command imports torch
+    from neurodex.data_importer.importer import build_catalog
+
+    path = output or current_app.config['CATALOG_PATH']
+    previous = None
+    if not full:
+        try:
+            previous = read_catalog(path)
+        except CatalogError:
+            pass
+
+    catalog, extracted = build_catalog(previous, processes)
+    write_catalog(catalog, path)
+    click.echo(f'Wrote {len(catalog["layer_types"])} layer types of torch {catalog["torch_version"]} to {path}, '
+               f'extracted {extracted} docstrings')
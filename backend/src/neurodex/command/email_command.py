@@ -0,0 +1,50 @@
+import signal
+
+import click
+from flask.cli import AppGroup
+
+from neurodex.data.migrations import upgrade
+from neurodex.service.email_dispatcher import (dispatch_emails,
+                                               purge_sent_emails,
+                                               retry_failed_emails,
+                                               run_dispatcher)
+from neurodex.service.email_service import TRANSPORTS, email_transport
+
+email_cli = AppGroup('email', help='Send the emails of the outbox.')
+
+
+@email_cli.command('dispatch')
+@click.option('--transport', type=click.Choice(list(TRANSPORTS)), help='Overrides EMAIL_TRANSPORT.')
+@click.option('--batch-size', default=50, show_default=True, help='Emails claimed at once.')
+@click.option('--interval', default=5.0, show_default=True, help='Seconds to wait when the outbox is empty.')
+@click.option('--once', is_flag=True, help='Send one batch and exit.')
+def dispatch(transport, batch_size, interval, once):
+    """Sends the emails of the outbox until it is stopped with SIGTERM or SIGINT.
+
+    Run it as a process of its own next to the web workers. Several dispatchers can run at the same time on postgres.
+    """
+    upgrade()
+    transport = TRANSPORTS[transport] if transport else email_transport()
+    if once:
+        click.echo(f'Attempted {dispatch_emails(transport, batch_size)} emails')
+        return
+
+    stopping = []
+    for signal_number in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signal_number, lambda number, frame: stopping.append(number))
+
+    click.echo(f'Dispatching emails with the {transport.name} transport')
+    run_dispatcher(transport, batch_size, interval, should_stop=lambda: bool(stopping))
+
+
+@email_cli.command('retry')
+def retry():
+    """Queues the emails that failed again."""
+    click.echo(f'Queued {retry_failed_emails()} failed emails again')
+
+
+@email_cli.command('purge')
+@click.option('--days', default=30, show_default=True, help='Age of the sent emails that are deleted.')
+def purge(days):
+    """Deletes sent emails from the outbox."""
+    click.echo(f'Deleted {purge_sent_emails(days)} sent emails')
@@ -0,0 +1,32 @@
+import click
+from flask.cli import AppGroup
+
+from neurodex.data.parameter_storage import (STORAGES, compact_values,
+                                             migrate_parameters)
+
+parameter_cli = AppGroup('parameters', help='Manage the storage of layer and activator parameters.')
+
+
+@parameter_cli.command('migrate')
+@click.argument('source', type=click.Choice(list(STORAGES)))
+@click.argument('target', type=click.Choice(list(STORAGES)))
+@click.option('--batch-size', default=500, show_default=True, help='Layers or activators per transaction.')
+def migrate(source, target, batch_size):
+    """Copies all parameters from the SOURCE storage to the TARGET storage.
+
+    Set PARAMETER_STORAGE to the target once the migration has finished.
+    """
+    counts = migrate_parameters(STORAGES[source], STORAGES[target], batch_size)
+    for table, count in counts.items():
+        click.echo(f'Migrated the parameters of {count} rows in {table}')
+
+
+@parameter_cli.command('compact')
+@click.option('--batch-size', default=1000, show_default=True, help='Value rows per transaction.')
+def compact(batch_size):
+    """Deletes value rows that are no longer referenced by any parameter."""
+    counts = compact_values(batch_size)
+    if not counts:
+        click.echo('No unreferenced values found')
+    for value_type, count in counts.items():
+        click.echo(f'Deleted {count} unreferenced {value_type} rows')
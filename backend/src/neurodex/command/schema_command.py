@@ -0,0 +1,40 @@
+import sys
+
+import click
+from flask.cli import AppGroup
+
+from neurodex import db
+from neurodex.data.migrations import MIGRATIONS, schema_version, upgrade
+from neurodex.data.query_plans import check_query_plans
+
+schema_cli = AppGroup('schema', help='Manage the database schema.')
+
+
+@schema_cli.command('upgrade')
+def upgrade_schema():
+    """Applies all pending migrations."""
+    applied = upgrade()
+    for name in applied:
+        click.echo(f'Applied {name}')
+    click.echo(f'The schema is at version {len(MIGRATIONS)}')
+
+
+@schema_cli.command('version')
+def show_version():
+    """Shows the version of the schema and the latest version."""
+    with db.engine.connect() as connection:
+        version = schema_version(connection) if db.engine.has_table('schema_version') else 0
+    click.echo(f'The schema is at version {version} of {len(MIGRATIONS)}')
+
+
+@schema_cli.command('check-plans')
+def check_plans():
+    """Checks that the hot queries are answered with an index."""
+    failed = False
+    for description, plan, uses_index in check_query_plans():
+        click.echo(f'{"ok" if uses_index else "SCAN":>4}  {description}')
+        if not uses_index:
+            failed = True
+            click.echo(f'      {plan}')
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,33 @@
+import click
+from flask.cli import AppGroup
+
+from neurodex import db
+from neurodex.data.statistics import TOTALS, read_counters, record_history, refresh_statistics
+
+stats_cli = AppGroup('stats', help='Manage the admin statistics.')
+
+
+@stats_cli.command('refresh')
+def refresh():
+    """Recounts all statistics and records today's values in their history.
+
+    The statistics are maintained by the application, a refresh is only needed after the database was changed
+    directly.
+    """
+    with db.engine.begin() as connection:
+        values = refresh_statistics(connection)
+    for name in TOTALS:
+        click.echo(f'{name}: {values[name]}')
+
+
+@stats_cli.command('record')
+def record():
+    """Records today's values of the statistics in their history, run it daily.
+
+    The values are read from the counters, unlike "refresh" this doesn't count the rows of the tables.
+    """
+    with db.engine.begin() as connection:
+        values = read_counters(connection)
+        record_history(connection, values)
+    for name in TOTALS:
+        click.echo(f'{name}: {values.get(name, 0)}')
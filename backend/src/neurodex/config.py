@@ -9,16 +9,85 @@ class Config(object):
     # JWT_ACCESS_TOKEN_EXPIRES = 10
     JWT_COOKIE_CSRF_PROTECT = False
 
+    SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY')
+    # How the email dispatcher sends emails: 'sendgrid', 'smtp' (to SMTP_HOST:SMTP_PORT) or 'file' (json files in
+    # EMAIL_FILE_DIRECTORY)
+    EMAIL_TRANSPORT = os.environ.get('EMAIL_TRANSPORT', 'sendgrid')
+    SMTP_HOST = os.environ.get('SMTP_HOST', 'localhost')
+    SMTP_PORT = int(os.environ.get('SMTP_PORT', 1025))
+    EMAIL_FILE_DIRECTORY = os.environ.get('EMAIL_FILE_DIRECTORY', 'emails')
+    # Attempts to send an email before it is marked as failed, and the delay before the first and the longest delay
+    # between two attempts in seconds
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 8))
+    EMAIL_RETRY_DELAY = float(os.environ.get('EMAIL_RETRY_DELAY', 30))
+    EMAIL_MAX_RETRY_DELAY = float(os.environ.get('EMAIL_MAX_RETRY_DELAY', 3600))
+    # Seconds a dispatcher may take to send the emails it claimed, then they are claimed again by the next dispatcher
+    EMAIL_LEASE = float(os.environ.get('EMAIL_LEASE', 300))
+
     SQLALCHEMY_DATABASE_URI = os.environ['DATABASE_URL']
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Connections each worker keeps open, and how many more it may open under load. Together they must not exceed
+    # max_connections of the database divided by the number of gunicorn workers. Threaded workers need at least one
+    # connection per thread.
+    DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', 5))
+    DATABASE_MAX_OVERFLOW = int(os.environ.get('DATABASE_MAX_OVERFLOW', 5))
+    # Seconds a request waits for a free connection before it fails
+    DATABASE_POOL_TIMEOUT = float(os.environ.get('DATABASE_POOL_TIMEOUT', 10))
+    # Seconds after which connections are replaced, and whether they are checked before they are used
+    DATABASE_POOL_RECYCLE = int(os.environ.get('DATABASE_POOL_RECYCLE', 1800))
+    DATABASE_POOL_PRE_PING = os.environ.get('DATABASE_POOL_PRE_PING', 'false').lower() == 'true'
+    # Milliseconds after which postgres cancels a statement, 0 disables the timeout
+    DATABASE_STATEMENT_TIMEOUT = int(os.environ.get('DATABASE_STATEMENT_TIMEOUT', 0))
+    # Set to 'transaction' behind pgbouncer in transaction pooling mode, the app doesn't pool connections then
+    DATABASE_POOLER = os.environ.get('DATABASE_POOLER', '')
+
+    # Optional read replica. GET requests read from it unless it is more than REPLICA_MAX_LAG seconds behind, which
+    # is checked every REPLICA_LAG_CHECK_INTERVAL seconds. Clients read from the primary for REPLICA_MAX_LAG seconds
+    # after they changed something.
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 5))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('REPLICA_LAG_CHECK_INTERVAL', 5))
+
+    # The catalog artifact written by "flask catalog build" and read by PUT /api/admin/import
+    CATALOG_PATH = os.environ.get('CATALOG_PATH', os.path.join(os.path.dirname(__file__), 'catalog.json'))
+
+    # How layer and activator parameters are stored, either 'tables' or 'document'
+    PARAMETER_STORAGE = os.environ.get('PARAMETER_STORAGE', 'tables')
+
+    # Cost of new password hashes. Without BCRYPT_LOG_ROUNDS it is calibrated when a worker starts, so that hashing a
+    # password takes about PASSWORD_HASH_TARGET_MS milliseconds. Hashes of another cost are replaced on login.
+    BCRYPT_LOG_ROUNDS = int(os.environ['BCRYPT_LOG_ROUNDS']) if os.environ.get('BCRYPT_LOG_ROUNDS') else None
+    PASSWORD_HASH_TARGET_MS = float(os.environ.get('PASSWORD_HASH_TARGET_MS', 250))
+    BCRYPT_MIN_LOG_ROUNDS = int(os.environ.get('BCRYPT_MIN_LOG_ROUNDS', 10))
+    BCRYPT_MAX_LOG_ROUNDS = int(os.environ.get('BCRYPT_MAX_LOG_ROUNDS', 15))
+    # Processes of each worker that hash passwords, 0 hashes them in the thread of the request. At most
+    # PASSWORD_HASH_QUEUE_SIZE requests of a worker wait for them, further requests and requests that waited
+    # PASSWORD_HASH_TIMEOUT seconds are answered with 503.
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 1))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 8))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
+    # Number of users each worker keeps cached for authenticated requests and for how many seconds
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
+    # Number of serialized models each worker keeps, changes of a cached model are answered with a JSON Patch
+    MODEL_DOCUMENT_CACHE_SIZE = int(os.environ.get('MODEL_DOCUMENT_CACHE_SIZE', 256))
+
 
 class ProductionConfig(Config):
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY')
+    DATABASE_POOL_PRE_PING = os.environ.get('DATABASE_POOL_PRE_PING', 'true').lower() == 'true'
+    DATABASE_STATEMENT_TIMEOUT = int(os.environ.get('DATABASE_STATEMENT_TIMEOUT', 30000))
     BASE_URL = "https://neurodex.app"
 
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', 2))
     JWT_SECRET_KEY = 'dev-key'
+    EMAIL_TRANSPORT = os.environ.get('EMAIL_TRANSPORT', 'file')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))
     BASE_URL = "http://localhost:8080"
@@ -1,29 +1,125 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, request
 from flask_jwt_extended import jwt_required
 
 from neurodex import db
-from neurodex.data.models import Model, User
-from neurodex.data_importer.importer import get_layers
+from neurodex.data import statistics
+from neurodex.data.loading import iterate_model_summaries
+from neurodex.data.schema import model_export_schema, user_schema
+from neurodex.data_importer.catalog import CatalogError, import_catalog, read_catalog
+from neurodex.database_pool import PRIMARY_BIND, bind_metrics
+from neurodex.json_provider import jsonify, ndjson_response
+from neurodex.service.catalog_service import bump_catalog_version
+from neurodex.service.user_service import iterate_users, user_cache
 from neurodex.util.decorators import needs_role
 
 admin_blueprint = Blueprint('admin', __name__, url_prefix="/api/admin/")
 
+# Number of rows the exports load per query
+EXPORT_BATCH_SIZE = 500
+
+# The keys of the totals of the statistics in the responses
+STATISTIC_KEYS = {
+    statistics.USERS: 'userCount',
+    statistics.CONFIRMED_USERS: 'confirmedUserCount',
+    statistics.MODELS: 'modelCount',
+    statistics.LAYERS: 'layerCount',
+    statistics.ACTIVATORS: 'activatorCount',
+}
+MAX_HISTORY_DAYS = 365
+
 
 @admin_blueprint.route("/stats", methods=["GET"])
 @jwt_required
 @needs_role("ADMIN")
 def get_stats():
-    user_count = db.session.query(User).count()
-    model_count = db.session.query(Model).count()
-    return jsonify({'userCount': user_count, 'modelCount': model_count})
+    """Returns the counts of users, models, layers and activators and how often each layer type is used.
+
+    The counts are read from counters that are maintained on every change, so this doesn't get slower as the
+    tables grow. Their history is recorded by "flask stats record", see ``get_stats_history``.
+    """
+    values = statistics.read_statistics()
+
+    result = {key: values.get(name, 0) for name, key in STATISTIC_KEYS.items()}
+    result['layerTypeUsage'] = {name[len(statistics.LAYER_TYPE_PREFIX):]: value for name, value in values.items()
+                                if name.startswith(statistics.LAYER_TYPE_PREFIX)}
+    return jsonify(result)
+
+
+@admin_blueprint.route("/stats/history", methods=["GET"])
+@jwt_required
+@needs_role("ADMIN")
+def get_stats_history():
+    """Returns the totals of the statistics of each of the last ``days`` days (30 by default).
+
+    A day has values once "flask stats record" or "flask stats refresh" ran on it, which is scheduled daily.
+    """
+    days = min(request.args.get('days', 30, type=int), MAX_HISTORY_DAYS)
+    return jsonify([{'day': entry['day'].isoformat(),
+                     **{key: entry.get(name) for name, key in STATISTIC_KEYS.items()}}
+                    for entry in statistics.read_history(days)])
+
+
+@admin_blueprint.route("/stats/user-cache", methods=["GET"])
+@jwt_required
+@needs_role("ADMIN")
+def get_user_cache_stats():
+    return jsonify(user_cache.stats())
+
+
+@admin_blueprint.route("/stats/database-pool", methods=["GET"])
+@jwt_required
+@needs_role("ADMIN")
+def get_database_pool_stats():
+    """Returns the state of the connection pools of the worker that handles the request and their checkout metrics.
+
+    Returns:
+        A json string containing the stats of the pool of each engine by the name of its bind, e.g. "primary" and
+        "replica"
+    """
+    binds = [None] + list(current_app.config.get('SQLALCHEMY_BINDS') or {})
+    return jsonify({bind or PRIMARY_BIND: bind_metrics(bind).stats(db.get_engine(bind=bind).pool, bind or PRIMARY_BIND)
+                    for bind in binds})
+
+
+@admin_blueprint.route("/export/users", methods=["GET"])
+@jwt_required
+@needs_role("ADMIN")
+def export_users():
+    """Streams all users as newline delimited json, one user per line, ordered by id."""
+    return ndjson_response(iterate_users(EXPORT_BATCH_SIZE), user_schema.dump)
+
+
+@admin_blueprint.route("/export/models", methods=["GET"])
+@jwt_required
+@needs_role("ADMIN")
+def export_models():
+    """Streams the summaries of all models as newline delimited json, one model per line, ordered by id."""
+    return ndjson_response(iterate_model_summaries(EXPORT_BATCH_SIZE), model_export_schema.dump)
 
 
 @admin_blueprint.route("/import", methods=["PUT"])
 @jwt_required
 @needs_role("ADMIN")
 def put_import():
-    layer_types, layer_type_parameters = get_layers()
-    db.session.bulk_save_objects(layer_types)
-    db.session.bulk_save_objects(layer_type_parameters)
+    """Imports the catalog artifact built by ``flask catalog build`` into the database.
+
+    Only layer types that changed since the last import are written. Returns the ids of the added, changed and
+    removed layer types and the number of unchanged ones.
+    """
+    try:
+        catalog = read_catalog(current_app.config['CATALOG_PATH'])
+    except CatalogError as error:
+        return jsonify({'message': str(error)}), 500
+
+    diff = import_catalog(catalog)
+    if diff.added or diff.changed or diff.removed:
+        bump_catalog_version()
     db.session.commit()
-    return jsonify({"message": "success"})
+    return jsonify({
+        'message': 'success',
+        'torchVersion': catalog['torch_version'],
+        'added': diff.added,
+        'changed': diff.changed,
+        'removed': diff.removed,
+        'unchanged': diff.unchanged,
+    })
@@ -1,20 +1,22 @@
-from flask import Blueprint, jsonify, make_response, request
+from flask import Blueprint, make_response, request
 from flask_jwt_extended import (create_access_token, create_refresh_token,
                                 get_jwt_identity, jwt_refresh_token_required,
                                 set_access_cookies, set_refresh_cookies,
                                 unset_jwt_cookies)
 
-from neurodex import bcrypt, db, jwt
+from neurodex import db, jwt
 from neurodex.data.models import User
 from neurodex.data.schema import user_schema
+from neurodex.json_provider import jsonify
+from neurodex.service.password_service import check_password
+from neurodex.service.user_service import get_cached_user
 
 auth_blueprint = Blueprint('auth', __name__, url_prefix="/api/auth")
 
 
 @jwt.user_loader_callback_loader
 def user_loader_callback(identity):
-    user = db.session.query(User).filter(User.user_id == identity).first()
-    return user
+    return get_cached_user(identity)
 
 
 @jwt.expired_token_loader
@@ -38,8 +40,10 @@ def post_login():
     if not user:
         return jsonify(message='Email not found'), 404
 
-    if not bcrypt.check_password_hash(user.password, auth['password']):
+    if not check_password(user, auth['password']):
         return jsonify(message='Email or password incorrect'), 401
+    # Stores the hash if it was replaced by one with the current cost
+    db.session.commit()
 
     access_token = create_access_token(identity=user.user_id)
     refresh_token = create_refresh_token(identity=user.user_id)
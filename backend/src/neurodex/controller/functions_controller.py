@@ -1,17 +1,25 @@
 from flask import Blueprint, request
+from sqlalchemy.orm import selectinload
 
 from neurodex import db
+from neurodex.data.compiled_schema import dump_function
 from neurodex.data.models import Function, FunctionParameter
-from neurodex.data.schema import activation_functions_schema, activation_function_schema
+from neurodex.data.schema import activation_function_schema
+from neurodex.json_provider import jsonify
+from neurodex.service.catalog_service import bump_catalog_version, catalog_response
 
 functions_blueprint = Blueprint('functions', __name__, url_prefix="/api/functions")
 
 
 @functions_blueprint.route('', methods=['GET'])
 def get_functions():
-    functions = db.session.query(Function).all()
+    return catalog_response('functions', serialize_functions)
 
-    return activation_functions_schema.jsonify(functions)
+
+def serialize_functions():
+    functions = db.session.query(Function).options(selectinload(Function.parameters)).all()
+
+    return jsonify([dump_function(function) for function in functions]).get_data()
 
 
 @functions_blueprint.route('', methods=['POST'])
@@ -24,6 +32,7 @@ def post_function():
     function = Function(name=name)
 
     db.session.add(function)
+    bump_catalog_version()
     db.session.commit()
 
     return activation_function_schema.jsonify(function)
@@ -39,6 +48,7 @@ def post_parameter(function_id):
     parameter = FunctionParameter(fk_function_id=function_id, type=type, name=name, default_value=default_value)
 
     db.session.add(parameter)
+    bump_catalog_version()
     db.session.commit()
 
     function = db.session.query(Function).filter(Function.function_id == function_id).first()
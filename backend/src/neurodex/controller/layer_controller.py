@@ -1,9 +1,14 @@
 
 from flask import Blueprint, request
+from sqlalchemy.orm import selectinload
 
 from neurodex import db
+from neurodex.data.compiled_schema import dump_layer_type
 from neurodex.data.models import LayerType, LayerTypeParameter
-from neurodex.data.schema import layer_types_schema, layer_type_schema
+from neurodex.data.schema import layer_type_schema
+from neurodex.json_provider import jsonify
+from neurodex.service.catalog_search import DEFAULT_RESULTS, MAX_RESULTS, search_index
+from neurodex.service.catalog_service import bump_catalog_version, catalog_response
 
 layer_blueprint = Blueprint('layer', __name__, url_prefix="/api/layers")
 
@@ -12,12 +17,44 @@ layer_blueprint = Blueprint('layer', __name__, url_prefix="/api/layers")
 def get_layers():
     """Returns all layers that are currently available.
 
+    The serialized layers are cached until the catalog changes.
+
     Returns:
         A json string containing all layers
     """
-    layers = db.session.query(LayerType).all()
+    return catalog_response('layers', serialize_layers)
+
+
+def serialize_layers():
+    layers = db.session.query(LayerType).filter(LayerType.removed_at.is_(None)).options(
+        selectinload(LayerType.parameters)).all()
+
+    return jsonify([dump_layer_type(layer) for layer in layers]).get_data()
+
+
+@layer_blueprint.route('/search', methods=['GET'])
+def search_layers():
+    """Searches the available layers by name, id, parameter names and description.
+
+    The search index of the catalog is kept in each worker and rebuilt once the catalog changes. The results don't
+    contain the descriptions, the description of a layer is loaded with ``get_layer``.
+
+    Returns:
+        A json string containing the best ``limit`` results for the query ``q``
+    """
+    limit = max(1, min(request.args.get('limit', DEFAULT_RESULTS, type=int), MAX_RESULTS))
+    return jsonify(search_index().search(request.args.get('q', ''), limit))
+
+
+@layer_blueprint.route('/<layer_type_id>', methods=['GET'])
+def get_layer(layer_type_id):
+    """Returns a layer with its description and parameters."""
+    layer = db.session.query(LayerType).filter(LayerType.layer_type_id == layer_type_id).options(
+        selectinload(LayerType.parameters)).first()
+    if layer is None:
+        return jsonify({'message': f'Layer {layer_type_id} not found'}), 404
 
-    return layer_types_schema.jsonify(layers)
+    return jsonify(dump_layer_type(layer))
 
 
 @layer_blueprint.route('', methods=['POST'])
@@ -37,6 +74,7 @@ def post_layer():
     layer = LayerType(layer_type_id=id, description=description, layer_name=layer_name)
 
     db.session.add(layer)
+    bump_catalog_version()
     db.session.commit()
 
     return layer_type_schema.jsonify(layer)
@@ -52,6 +90,7 @@ def post_parameter(layer_id):
     layer_parameter = LayerTypeParameter(fk_layer_type_id=layer_id, name=name, type=type, default_value=default_value)
 
     db.session.add(layer_parameter)
+    bump_catalog_version()
     db.session.commit()
 
     layer = db.session.query(LayerType).filter(LayerType.layer_type_id == layer_id).first()
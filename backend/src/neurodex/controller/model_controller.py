@@ -1,34 +1,76 @@
 import uuid
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from flask_jwt_extended import current_user, jwt_required
 
 from neurodex import db
-from neurodex.data.models import (ActivatorTarget, LayerType, Model,
-                                  ModelActivator, ModelActivatorParameterData,
-                                  ModelLayer, ModelLayerParameterData,
-                                  PrimitiveValue)
-from neurodex.data.schema import (model_layers_schema, model_schema,
-                                  models_schema)
-from neurodex.util.decorators import own_model
+from neurodex.data import statistics
+from neurodex.data.models import Model, ModelLayer
+from neurodex.data.loading import (load_model, load_model_row,
+                                   load_model_summaries)
+from neurodex.data.schema import model_layers_schema, model_summaries_schema
+from neurodex.json_provider import jsonify
+from neurodex.service.catalog_service import CATALOG_VERSION_HEADER
+from neurodex.service.model_operations import (OperationError, add_activator,
+                                               add_layer, apply_actions,
+                                               delete_activator, delete_layer,
+                                               move_activator, move_layer,
+                                               rename_model,
+                                               set_activator_parameter,
+                                               set_layer_parameter)
+from neurodex.service.model_service import (MODEL_CACHE_CONTROL, commit_model,
+                                            model_response,
+                                            request_catalog_version)
+from neurodex.util.decorators import model_delta, own_model
+from neurodex.util.pagination import link_next_page, paginated
 
 model_blueprint = Blueprint('model', __name__, url_prefix="/api/models")
 
+MODEL_PAGE_SIZE = 100
+
+
+@model_blueprint.errorhandler(OperationError)
+def operation_error_handler(error):
+    db.session.rollback()
+    result = {'message': error.message}
+    if error.index is not None:
+        result['index'] = error.index
+    return jsonify(result), error.status
+
 
 @model_blueprint.route('', methods=['GET'])
 @jwt_required
-def get_models():
-    models = db.session.query(Model).filter(
-        Model.fk_user_id == current_user.user_id).order_by(Model.updated_at.desc()).all()
+@paginated(default_size=MODEL_PAGE_SIZE, max_size=MODEL_PAGE_SIZE)
+def get_models(cursor, limit):
+    """Returns a page of the overview of the models of the current user, most recently updated first.
+
+    Only the summary of each model is returned, the full model can be requested with ``get_model``. The cursor of
+    the next page is sent in the X-Next-Cursor and Link headers, see ``paginated``. Requests with a matching
+    If-None-Match header get a 304 response.
 
-    return models_schema.jsonify(models)
+    Returns:
+        A json string containing the summaries of the models
+    """
+    page = load_model_summaries(current_user.user_id, cursor, limit)
+
+    response = link_next_page(model_summaries_schema.jsonify(page.items), page)
+    response.add_etag()
+    response.headers['Cache-Control'] = MODEL_CACHE_CONTROL
+    return response.make_conditional(request)
 
 
 @model_blueprint.route('/<model:model>', methods=['GET'])
 @jwt_required
-@own_model
+@own_model(load_model_row)
 def get_model(model):
-    return model_schema.jsonify(model)
+    """Returns a model.
+
+    The response names the current catalog version in the X-Catalog-Version header, so the editor can request
+    the catalogs by version and cache them, see ``catalog_response``.
+    """
+    response = model_response(model)
+    response.headers[CATALOG_VERSION_HEADER] = str(request_catalog_version())
+    return response
 
 
 @model_blueprint.route('', methods=['POST'])
@@ -49,88 +91,76 @@ def post_model():
     new_model = Model(model_id=str(uuid.uuid4()), name=data['name'], fk_user_id=current_user.user_id)
 
     db.session.add(new_model)
+    statistics.count(statistics.MODELS)
     db.session.commit()
 
-    return model_schema.jsonify(new_model)
+    return model_response(load_model(new_model.model_id))
 
 
 @model_blueprint.route('/<model:model>/name', methods=['PUT'])
 @jwt_required
-@own_model
+@own_model(load_model_row)
+@model_delta
 def put_model_name(model):
     data = request.json
-    name = data['name']
 
-    name_exists = db.session.query(Model).filter(
-        Model.name == name, Model.fk_user_id == current_user.user_id).first() is not None
-
-    if name_exists:
-        return jsonify({'message': 'Du verwendest diesen Namen bereits'}), 422
-
-    model.name = name
-    db.session.commit()
-    return model_schema.jsonify(model)
+    rename_model(model, data['name'])
+    return commit_model(model)
 
 
 @model_blueprint.route('/<model:model>/layers', methods=['POST'])
 @jwt_required
-@own_model
+@own_model(load_model_row)
+@model_delta
 def post_model_layer(model):
     data = request.json
-    layer_id = data['layerId']
 
-    layer = db.session.query(LayerType).filter(LayerType.layer_type_id == layer_id).first()
-    model_layer = ModelLayer(fk_model_id=model.model_id, fk_layer_id=layer.layer_type_id, name=layer.layer_name)
-
-    model.layers.append(model_layer)
+    add_layer(model, data['layerId'])
     model.update_timestamp()
-    db.session.commit()
+    return commit_model(model)
 
-    return model_schema.jsonify(model)
 
-
-@model_blueprint.route('/<model_id>/layers', methods=['GET'])
+@model_blueprint.route('/<model:model>/layers', methods=['GET'])
 @jwt_required
-def get_model_layers(model_id):
-    model_layers = db.session.query(ModelLayer).filter(ModelLayer.fk_model_id == model_id).all()
+@own_model(load_model_row)
+def get_model_layers(model):
+    model_layers = db.session.query(ModelLayer).filter(ModelLayer.fk_model_id == model.model_id).all()
 
     return model_layers_schema.jsonify(model_layers)
 
 
 @model_blueprint.route('/<model:model>/layers/<model_layer_id>', methods=['DELETE'])
 @jwt_required
-@own_model
+@own_model(load_model_row)
+@model_delta
 def delete_model_layer(model, model_layer_id):
     """Removes a layer from a model.
 
     Removes a layer with a given id from a model.
 
     Args:
-        model_id: The id of the enclosing model
+        model: The enclosing model
         model_layer_id: The id of enclosing layer
 
     Returns:
         A json string containing the updated model
     """
-
-    db.session.query(ActivatorTarget).filter(ActivatorTarget.activator_target_id == model_layer_id).delete()
-
-    model.layers.reorder()
+    delete_layer(model, model_layer_id)
     model.update_timestamp()
 
-    db.session.commit()
-
-    return model_schema.jsonify(model)
+    return commit_model(model)
 
 
 @model_blueprint.route('/<model:model>/layers/<model_layer_id>/data/<parameter_name>', methods=['PUT'])
 @jwt_required
+@own_model(load_model_row)
+@model_delta
 def put_parameter_data(model: Model, model_layer_id: str, parameter_name: str):
     """Changes data for a parameter.
 
     Updates the data for a parameter in a layer of a model. The updated data should be included as the entry "value" in
     the form of the request.
-    If there is no data for the parameter of this layer present a new row is inserted into the database.
+    The parameter is written to the configured parameter storage.
 
     Args:
         model: The enclosing model
@@ -141,108 +171,95 @@ def put_parameter_data(model: Model, model_layer_id: str, parameter_name: str):
         A json string containing the updated model
     """
     data = request.json
-    new_value = data['newValue']
-
-    param_data = db.session.query(ModelLayerParameterData).filter(
-        ModelLayerParameterData.fk_model_layer_id == model_layer_id,
-        ModelLayerParameterData.parameter_name == parameter_name).first()
-
-    value = PrimitiveValue(value=new_value)
-
-    if(param_data is None):
-        param_data = ModelLayerParameterData(fk_model_layer_id=model_layer_id,
-                                             parameter_name=parameter_name, value=value)
-
-        db.session.add(param_data)
-    else:
-        param_data.value = value
 
+    set_layer_parameter(model, model_layer_id, parameter_name, data['newValue'])
     model.update_timestamp()
 
-    db.session.commit()
-
-    return model_schema.jsonify(model)
+    return commit_model(model)
 
 
 @model_blueprint.route('/<model:model>/layers/<model_layer_id>/order', methods=['PUT'])
 @jwt_required
+@own_model(load_model_row)
+@model_delta
 def put_model_layer_order(model, model_layer_id):
     data = request.json
-    index = data['index']
 
-    model_layer = db.session.query(ModelLayer).filter(ModelLayer.model_layer_id == model_layer_id).first()
-
-    model.layers.remove(model_layer)
-    model.layers.insert(int(index), model_layer)
-    model.layers.reorder()
+    move_layer(model, model_layer_id, data['index'])
     model.update_timestamp()
 
-    db.session.commit()
-
-    return model_schema.jsonify(model)
+    return commit_model(model)
 
 
 @model_blueprint.route('/<model:model>/activators', methods=['POST'])
 @jwt_required
+@own_model(load_model_row)
+@model_delta
 def post_model_activator(model: Model):
     data = request.json
-    activator_id = data['activatorId']
-
-    activator = ModelActivator(fk_activator_target_id=activator_id)
 
-    model.activators.append(activator)
+    add_activator(model, data['activatorId'])
     model.update_timestamp()
 
-    db.session.commit()
-
-    return model_schema.jsonify(model)
+    return commit_model(model)
 
 
 @model_blueprint.route('/<model:model>/activators/<model_activator_id>/data/<parameter_name>', methods=['PUT'])
 @jwt_required
-@own_model
+@own_model(load_model_row)
+@model_delta
 def put_activator_parameter_data(model: Model, model_activator_id: int, parameter_name: str):
     data = request.json
-    new_value = data['newValue']
-
-    value_entity = PrimitiveValue(value=new_value)
-    parameter_data = ModelActivatorParameterData(
-        fk_model_activator_id=model_activator_id, value=value_entity, parameter_name=parameter_name,)
-
-    db.session.add(parameter_data)
 
+    set_activator_parameter(model, model_activator_id, parameter_name, data['newValue'])
     model.update_timestamp()
 
-    db.session.commit()
-
-    return model_schema.jsonify(model)
+    return commit_model(model)
 
 
 @model_blueprint.route('/<model:model>/activators/<int:model_activator_id>/order', methods=['PUT'])
 @jwt_required
-@own_model
+@own_model(load_model_row)
+@model_delta
 def put_activator_order(model: Model, model_activator_id: int):
     data = request.json
-    new_index = data['newIndex']
 
-    model_activator = db.session.query(ModelActivator).filter(
-        ModelActivator.model_activator_id == model_activator_id).first()
-
-    model.activators.remove(model_activator)
-    model.activators.insert(int(new_index), model_activator)
-    model.activators.reorder()
+    move_activator(model, model_activator_id, data['newIndex'])
     model.update_timestamp()
 
-    db.session.commit()
-
-    return model_schema.jsonify(model)
+    return commit_model(model)
 
 
 @model_blueprint.route('/<model:model>/activators/<int:model_activator_id>', methods=['DELETE'])
 @jwt_required
-@own_model
+@own_model(load_model_row)
+@model_delta
 def delete_model_activator(model: Model, model_activator_id: int):
-    db.session.query(ModelActivator).filter(ModelActivator.model_activator_id == model_activator_id).delete()
-    db.session.commit()
+    delete_activator(model, model_activator_id)
+
+    return commit_model(model)
+
+
+@model_blueprint.route('/<model:model>/batch', methods=['POST'])
+@jwt_required
+@own_model(load_model_row)
+@model_delta
+def post_batch(model: Model):
+    """Applies several editor actions to a model at once.
+
+    The request contains the list of actions as "actions", they have the same format as the actions of the editor.
+    All actions are applied in one transaction, if one of them fails none of them are saved and the response
+    contains the index of the failed action.
+
+    Args:
+        model: The model that is changed
+
+    Returns:
+        A json string containing the updated model
+    """
+    data = request.json or {}
+
+    apply_actions(model, data.get('actions'))
+    model.update_timestamp()
 
-    return model_schema.jsonify(model)
+    return commit_model(model)
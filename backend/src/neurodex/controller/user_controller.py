@@ -1,14 +1,19 @@
 import uuid
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, request
 from flask_jwt_extended import current_user, jwt_required
 
-from neurodex import bcrypt, db, app
-from neurodex.data.models import User, UserMetadata
+from neurodex import db
+from neurodex.data import statistics
+from neurodex.data.models import Model, User, UserMetadata
 from neurodex.data.schema import user_schema, users_schema
+from neurodex.json_provider import jsonify
+from neurodex.service.password_service import check_password, hash_password
+from neurodex.service.user_service import invalidate_user, load_users
 from neurodex.util.decorators import needs_role
+from neurodex.util.pagination import link_next_page, paginated
 
-from neurodex.service.email_service import send_confirmation_email
+from neurodex.service.email_service import queue_confirmation_email
 import re
 
 user_blueprint = Blueprint('user', __name__, url_prefix="/api/users")
@@ -21,15 +26,21 @@ token_key = 'x-access-token'
 @user_blueprint.route('', methods=['GET'])
 @jwt_required
 @needs_role("admin")
-def get_users():
-    users = db.session.query(User).all()
-    return users_schema.jsonify(users)
+@paginated()
+def get_users(cursor, limit):
+    """Returns a page of all users, ordered by id.
+
+    The cursor of the next page is sent in the X-Next-Cursor and Link headers, see ``paginated``.
+    """
+    page = load_users(cursor, limit)
+    return link_next_page(users_schema.jsonify(page.items), page)
 
 
 @user_blueprint.route('/current', methods=['GET'])
 @jwt_required
 def get_current_user():
-    return user_schema.jsonify(current_user)
+    user = db.session.query(User).get(current_user.user_id)
+    return user_schema.jsonify(user)
 
 
 @user_blueprint.route('/<user_id>', methods=['GET'])
@@ -60,16 +71,7 @@ def post_user():
 
     confirmation_id = str(uuid.uuid4())
 
-    try:
-        send_confirmation_email(confirmation_id, email, data['name'])
-    except Exception as error:
-        app.logger.error(error.body)
-        return jsonify({
-            'message': 'Die Email konnte nicht gesendet werden. Bitte versuche es später erneut.',
-            'field': 'email'
-        }), 400
-
-    hashed_password = bcrypt.generate_password_hash(data['password']).decode('utf8')
+    hashed_password = hash_password(data['password'])
 
     new_user = User(user_id=str(uuid.uuid4()), email=email,
                     password=hashed_password, name=data['name'])
@@ -77,6 +79,9 @@ def post_user():
     user_metadata = UserMetadata(confirmation_id=confirmation_id)
     new_user.user_metadata = user_metadata
     db.session.add(new_user)
+    # Sent by the email dispatcher once the user is committed
+    queue_confirmation_email(confirmation_id, email, data['name'])
+    statistics.count(statistics.USERS)
     db.session.commit()
 
     return jsonify({'message': 'success'}), 200
@@ -90,6 +95,7 @@ def post_confirmation_id():
         return jsonify({'message': 'Dieser Bestätigungslink ist abgelaufen.'}), 400
 
     metadata.confirmation_id = None
+    statistics.count(statistics.CONFIRMED_USERS)
 
     db.session.commit()
 
@@ -99,8 +105,14 @@ def post_confirmation_id():
 @user_blueprint.route('', methods=['DELETE'])
 @jwt_required
 def delete_user():
-
-    db.session.delete(current_user)
+    user = db.session.query(User).get(current_user.user_id)
+
+    statistics.count(statistics.USERS, -1)
+    if user.user_metadata is None or user.user_metadata.confirmation_id is None:
+        statistics.count(statistics.CONFIRMED_USERS, -1)
+    statistics.count_removed_models(Model.fk_user_id == user.user_id)
+    invalidate_user(user.user_id)
+    db.session.delete(user)
     db.session.commit()
 
     return jsonify({'message': 'The user has been deleted!'})
@@ -109,33 +121,35 @@ def delete_user():
 @user_blueprint.route('/update/data', methods=['PUT'])
 @jwt_required
 def update_data():
-
     data = request.json
+    user = db.session.query(User).get(current_user.user_id)
 
-    current_user.name = data['name']
-    current_user.email = data['email']
+    user.name = data['name']
+    user.email = data['email']
 
+    invalidate_user(user.user_id)
     db.session.commit()
 
-    return user_schema.jsonify(current_user)
+    return user_schema.jsonify(user)
 
 
 @user_blueprint.route('/update/password', methods=['PUT'])
 @jwt_required
 def update_password():
-
     data = request.json
+    user = db.session.query(User).get(current_user.user_id)
 
-    if not bcrypt.check_password_hash(current_user.password, data['oldPassword']):
+    if not check_password(user, data['oldPassword']):
         return jsonify({'message': 'Password incorrect', 'field': 'oldPassword'}), 401
 
     if data['password'] != data['repeatPassword']:
         # Status Code might not be correct
         return jsonify({'message': 'Passwörter stimmen nicht überein', 'field': 'repeatPassword'}), 400
 
-    hashed_password = bcrypt.generate_password_hash(data['password']).decode('utf8')
-    current_user.password = hashed_password
+    hashed_password = hash_password(data['password'])
+    user.password = hashed_password
 
+    invalidate_user(user.user_id)
     db.session.commit()
 
-    return user_schema.jsonify(current_user)
+    return user_schema.jsonify(user)
@@ -1,14 +1,15 @@
 from werkzeug.routing import BaseConverter
 
-from neurodex import db
-from neurodex.data.models import Model
-
 
 class ModelConverter(BaseConverter):
+    """Matches the id of a model.
+
+    The model itself is resolved by ``own_model`` once the user is authenticated, so it can be filtered by its
+    owner and the endpoint can choose how much of it is loaded.
+    """
 
     def to_python(self, model_id):
-        # value should be the model_id
-        return db.session.query(Model).filter(Model.model_id == model_id).first()
+        return model_id
 
     def to_url(self, model):
-        return model.id
+        return getattr(model, 'model_id', model)
@@ -0,0 +1,84 @@
+from marshmallow import fields
+
+from .models import Function, ModelLayer
+from .schema import (FunctionSchema, LayerTypeSchema, ModelActivatorSchema,
+                     ModelLayerSchema, ModelSchema)
+
+_PASSTHROUGH_FIELDS = (fields.String, fields.Integer, fields.Boolean)
+
+
+def compile_schema(schema, overrides=None):
+    """Generates a function that serializes an object the same way the given schema does.
+
+    The marshmallow schemas stay the reference for the external representation. The generated function reads
+    the attributes of the object and builds the same dict, with the keys computed ahead of time and without
+    marshmallow's per-field dispatch. Nested schemas are compiled as well, method fields call the method of the
+    given schema instance.
+
+    Args:
+        schema: The schema instance that is compiled
+        overrides: Optional mapping of field names to functions that serialize the value of that field from the
+            object, used for method fields that dump other schemas
+
+    Returns:
+        A function that takes an object and returns its serialized dict
+    """
+    overrides = overrides or {}
+    namespace = {}
+    lines = ['def dump(obj):', '    data = {}']
+    model = getattr(schema.opts, 'model', None)
+
+    for name, field in schema.dump_fields.items():
+        key = field.data_key or name
+        attribute = field.attribute or name
+        helper = f'_{name}'
+
+        if name in overrides:
+            namespace[helper] = overrides[name]
+            lines.append(f'    data[{key!r}] = {helper}(obj)')
+            continue
+
+        if isinstance(field, fields.Method):
+            namespace[helper] = getattr(schema, field.serialize_method_name)
+            lines.append(f'    data[{key!r}] = {helper}(obj)')
+            continue
+
+        if model is not None and not hasattr(model, attribute):
+            # marshmallow leaves out attributes the object doesn't have
+            continue
+
+        lines.append(f'    value = obj.{attribute}')
+        if isinstance(field, fields.List) and isinstance(field.inner, fields.Nested):
+            namespace[helper] = compile_schema(field.inner.schema)
+            lines.append(f'    data[{key!r}] = None if value is None else [{helper}(item) for item in value]')
+        elif isinstance(field, fields.Nested):
+            namespace[helper] = compile_schema(field.schema)
+            lines.append(f'    data[{key!r}] = None if value is None else {helper}(value)')
+        elif isinstance(field, fields.DateTime):
+            lines.append(f'    data[{key!r}] = None if value is None else value.isoformat()')
+        elif isinstance(field, _PASSTHROUGH_FIELDS):
+            lines.append(f'    data[{key!r}] = value')
+        else:
+            raise TypeError(f'Can not compile field {name} of type {type(field).__name__}')
+
+    lines.append('    return data')
+    exec('\n'.join(lines), namespace)
+    return namespace['dump']
+
+
+def _dump_activator_target(model_activator):
+    value = model_activator.activator_target
+    if isinstance(value, ModelLayer):
+        return dump_model_layer(value)
+    elif isinstance(value, Function):
+        return dump_function(value)
+
+
+dump_layer_type = compile_schema(LayerTypeSchema())
+dump_function = compile_schema(FunctionSchema())
+dump_model_layer = compile_schema(ModelLayerSchema())
+dump_model_activator = compile_schema(ModelActivatorSchema(), overrides={'value': _dump_activator_target})
+dump_model = compile_schema(ModelSchema(), overrides={
+    'layers': lambda model: [dump_model_layer(layer) for layer in model.layers],
+    'activators': lambda model: [dump_model_activator(activator) for activator in model.activators],
+})
@@ -0,0 +1,109 @@
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload, with_polymorphic
+
+from neurodex import db
+
+from .models import ActivatorTarget, LayerType, Model, ModelActivator, ModelLayer
+from .pagination import DEFAULT_PAGE_SIZE, iterate_keyset, keyset_page
+from .parameter_storage import parameter_storage
+
+# The summaries of the models of a user are paged by these columns, see ix_model_user_updated_at_id
+MODEL_SUMMARY_KEYS = [Model.updated_at, Model.model_id]
+
+
+def full_model_options():
+    """Returns the loader options needed to serialize a complete model.
+
+    Every relationship that ``ModelSchema`` walks is loaded eagerly, so a model loads in a fixed number of
+    queries no matter how many layers and activators it has.
+
+    Returns:
+        A list of loader options that can be passed to ``Query.options``
+    """
+    any_target = with_polymorphic(ActivatorTarget, '*', flat=True)
+    storage = parameter_storage()
+
+    layers = selectinload(Model.layers)
+    activators = selectinload(Model.activators)
+    activator_target = activators.selectinload(ModelActivator.activator_target.of_type(any_target))
+
+    return [
+        layers.joinedload(ModelLayer.layer_type).selectinload(LayerType.parameters),
+        activator_target.joinedload(any_target.ModelLayer.layer_type).selectinload(LayerType.parameters),
+        activator_target.selectinload(any_target.Function.parameters),
+        *storage.loader_options(ModelLayer, layers),
+        *storage.loader_options(ModelActivator, activators),
+        *storage.loader_options(any_target.ModelLayer, activator_target),
+    ]
+
+
+def load_model(model_id, user_id=None):
+    """Loads a model including everything that is needed to serialize it.
+
+    Args:
+        model_id: The id of the model
+        user_id: If given, the model is only loaded if it belongs to this user
+
+    Returns:
+        The model or None if there is no such model
+    """
+    return _model_query(model_id, user_id).options(*full_model_options()).first()
+
+
+def load_model_row(model_id, user_id=None):
+    """Loads only the row of a model, its layers and activators are loaded when they are accessed.
+
+    Args:
+        model_id: The id of the model
+        user_id: If given, the model is only loaded if it belongs to this user
+
+    Returns:
+        The model or None if there is no such model
+    """
+    return _model_query(model_id, user_id).first()
+
+
+def load_model_summaries(user_id, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Loads a page of the overview of the models of a user.
+
+    The layer and activator counts are computed by the database in the same query, none of the layers or
+    activators themselves are loaded.
+
+    Args:
+        user_id: The id of the owner of the models
+        cursor: The cursor of the page, None for the first page
+        limit: The maximum number of models of the page
+
+    Returns:
+        A ``Page`` of rows with the columns model_id, name, created_at, updated_at, layer_count and
+        activator_count, most recently updated first
+    """
+    query = _model_summaries_query().filter(Model.fk_user_id == user_id)
+    return keyset_page(query, MODEL_SUMMARY_KEYS, cursor, limit, descending=True)
+
+
+def iterate_model_summaries(batch_size=500):
+    """Iterates over the summaries of the models of all users, ordered by id.
+
+    Returns:
+        An iterator of rows with the columns of ``load_model_summaries`` and fk_user_id
+    """
+    query = _model_summaries_query().add_columns(Model.fk_user_id)
+    return iterate_keyset(query, [Model.model_id], batch_size)
+
+
+def _model_summaries_query():
+    layer_count = db.session.query(func.count(ModelLayer.model_layer_id)).filter(
+        ModelLayer.fk_model_id == Model.model_id).correlate(Model).label('layer_count')
+    activator_count = db.session.query(func.count(ModelActivator.model_activator_id)).filter(
+        ModelActivator.fk_model_id == Model.model_id).correlate(Model).label('activator_count')
+
+    return db.session.query(Model.model_id, Model.name, Model.created_at, Model.updated_at,
+                            layer_count, activator_count)
+
+
+def _model_query(model_id, user_id):
+    query = db.session.query(Model).filter(Model.model_id == model_id)
+    if user_id is not None:
+        query = query.filter(Model.fk_user_id == user_id)
+    return query
@@ -0,0 +1,231 @@
+from flask import current_app
+from sqlalchemy import and_, func, inspect, select
+
+from neurodex import db
+from neurodex.service.catalog_service import CATALOG_VERSION_ID
+
+from .models import (Base, CatalogVersion, LayerType, LayerValue, Model,
+                     ModelActivator, ModelActivatorParameterData, ModelLayer,
+                     PrimitiveValue, SchemaVersion, User, Value)
+from .ordering import POSITION_GAP
+from .statistics import refresh_statistics
+
+SCHEMA_VERSION_ID = 1
+# Arbitrary key of the postgres advisory lock that keeps workers from migrating at the same time
+MIGRATION_LOCK_KEY = 7261
+
+MIGRATIONS = []
+# Number of duplicates of each unique index that a failed migration reports
+REPORTED_DUPLICATES = 20
+# Ids of stale parameter values that are deleted per statement
+STALE_VALUES_PER_STATEMENT = 500
+
+
+class MigrationError(Exception):
+    """Raised if a migration can't be applied to the data of the database."""
+
+
+def migration(function):
+    """Registers a function as the next migration of the schema.
+
+    Migrations are applied in the order they are registered, the version of the schema is the number of applied
+    migrations. Each migration receives a connection inside of a transaction. Since new databases are created from
+    the current models, a migration has to skip changes that are already present.
+    """
+    MIGRATIONS.append(function)
+    return function
+
+
+@migration
+def add_parameter_columns(connection):
+    """Adds the columns of the document parameter storage."""
+    _add_column(connection, ModelLayer.__table__.c.parameters)
+    _add_column(connection, ModelActivator.__table__.c.parameters)
+
+
+@migration
+def add_lookup_indexes(connection):
+    """Adds the indexes of the columns that models, users and parameters are looked up by.
+
+    Raises:
+        MigrationError: If the rows of a table violate one of its new unique indexes, e.g. two users with the same
+            email. The duplicates have to be resolved by hand before the migration can be applied.
+    """
+    _remove_stale_activator_parameters(connection)
+    inspector = inspect(connection)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        existing = [index['name'] for index in inspector.get_indexes(table.name)]
+        missing += [index for index in table.indexes if index.name not in existing]
+
+    duplicates = [message for index in missing if index.unique for message in _find_duplicates(connection, index)]
+    if duplicates:
+        raise MigrationError('Unique indexes can\'t be created, resolve these duplicates first:\n' +
+                             '\n'.join(duplicates))
+
+    for index in missing:
+        index.create(bind=connection)
+
+
+@migration
+def spread_positions(connection):
+    """Spreads the positions of layers and activators for the sparse ordering."""
+    for owner_class in (ModelLayer, ModelActivator):
+        table = owner_class.__table__
+        connection.execute(table.update().values(position=(table.c.position + 1) * POSITION_GAP))
+
+
+@migration
+def add_model_revision(connection):
+    """Adds the revision counter of models."""
+    _add_column(connection, Model.__table__.c.revision)
+
+
+@migration
+def extend_model_summary_index(connection):
+    """Replaces the index of the models of a user by one that includes the model id as tie breaker."""
+    existing = [index['name'] for index in inspect(connection).get_indexes(Model.__tablename__)]
+    if 'ix_model_user_updated_at' in existing:
+        connection.execute('DROP INDEX ix_model_user_updated_at')
+    for index in Model.__table__.indexes:
+        if index.name not in existing:
+            index.create(bind=connection)
+
+
+@migration
+def add_statistics(connection):
+    """Counts the existing users, models, layers and activators for the admin statistics."""
+    refresh_statistics(connection)
+
+
+@migration
+def add_catalog_tracking(connection):
+    """Adds the columns the catalog import uses to skip unchanged layer types and to mark removed ones."""
+    _add_column(connection, LayerType.__table__.c.catalog_hash)
+    _add_column(connection, LayerType.__table__.c.removed_at)
+
+
+@migration
+def add_catalog_version(connection):
+    """Creates the row of the catalog version, which ``bump_catalog_version`` increments."""
+    table = CatalogVersion.__table__
+    exists = connection.execute(select([table.c.catalog_version_id]).where(
+        table.c.catalog_version_id == CATALOG_VERSION_ID)).first() is not None
+    if not exists:
+        connection.execute(table.insert().values(catalog_version_id=CATALOG_VERSION_ID, version=0))
+
+
+@migration
+def add_user_revision(connection):
+    """Adds the revision counter of users that the user caches of the workers are checked against."""
+    _add_column(connection, User.__table__.c.revision)
+
+
+@migration
+def unique_activator_parameters(connection):
+    """Keeps only the newest value of each parameter of an activator and makes the parameter names unique.
+
+    Older versions inserted a new parameter row and value on every change of an activator parameter.
+    """
+    _remove_stale_activator_parameters(connection)
+    table = ModelActivatorParameterData.__table__
+    existing = [index['name'] for index in inspect(connection).get_indexes(table.name)]
+    for index in table.indexes:
+        if index.name not in existing:
+            index.create(bind=connection)
+
+
+def schema_version(connection):
+    """Returns the version of the schema of the database."""
+    table = SchemaVersion.__table__
+    version = connection.execute(
+        table.select().with_only_columns([table.c.version]).where(table.c.schema_version_id == SCHEMA_VERSION_ID)
+    ).scalar()
+    return version or 0
+
+
+def upgrade():
+    """Creates missing tables and applies all migrations the database hasn't seen yet.
+
+    Every migration runs in its own transaction together with the update of the version. On postgres the
+    transaction holds an advisory lock, so the first request of several workers can't apply a migration twice.
+
+    Returns:
+        The list of names of the applied migrations
+    """
+    Base.metadata.create_all(bind=db.engine)
+
+    applied = []
+    for version, function in enumerate(MIGRATIONS, start=1):
+        with db.engine.begin() as connection:
+            if connection.dialect.name == 'postgresql':
+                connection.execute('SELECT pg_advisory_xact_lock(%s)', MIGRATION_LOCK_KEY)
+            if schema_version(connection) >= version:
+                continue
+
+            function(connection)
+            _set_schema_version(connection, version)
+            applied.append(function.__name__)
+            current_app.logger.info(f'Applied migration {version}: {function.__name__}')
+    return applied
+
+
+def _add_column(connection, column):
+    table = column.table
+    if column.name in [existing['name'] for existing in inspect(connection).get_columns(table.name)]:
+        return
+
+    definition = f'{column.name} {column.type.compile(dialect=connection.dialect)}'
+    if column.server_default is not None:
+        definition += f' DEFAULT {column.server_default.arg}'
+    if not column.nullable:
+        definition += ' NOT NULL'
+    connection.execute(f'ALTER TABLE {table.name} ADD COLUMN {definition}')
+
+
+def _set_schema_version(connection, version):
+    table = SchemaVersion.__table__
+    updated = connection.execute(
+        table.update().where(table.c.schema_version_id == SCHEMA_VERSION_ID).values(version=version)
+    ).rowcount
+    if not updated:
+        connection.execute(table.insert().values(schema_version_id=SCHEMA_VERSION_ID, version=version))
+
+
+def _find_duplicates(connection, index):
+    columns = list(index.columns)
+    primary_key = list(index.table.primary_key.columns)
+    groups = connection.execute(select(columns).group_by(*columns).having(func.count() > 1).limit(
+        REPORTED_DUPLICATES)).fetchall()
+
+    messages = []
+    for group in groups:
+        condition = and_(*[column == value for column, value in zip(columns, group)])
+        rows = connection.execute(select(primary_key).where(condition)).fetchall()
+        values = ', '.join(f'{column.name}={value!r}' for column, value in zip(columns, group))
+        keys = '; '.join(', '.join(f'{column.name}={value!r}' for column, value in zip(primary_key, row))
+                         for row in rows)
+        messages.append(f'{index.table.name} ({values}) in the rows {keys}, needed by {index.name}')
+    return messages
+
+
+def _remove_stale_activator_parameters(connection):
+    """Deletes all but the newest row of each parameter of an activator, together with the values of the deleted
+    rows. Values are inserted with increasing ids, so the newest row references the highest value id."""
+    table = ModelActivatorParameterData.__table__
+    keys = [table.c.fk_model_activator_id, table.c.parameter_name]
+    newest = select(keys + [func.max(table.c.fk_value_id).label('fk_value_id')]).group_by(*keys).having(
+        func.count() > 1).alias('newest')
+    stale = [row.fk_value_id for row in connection.execute(select([table.c.fk_value_id]).select_from(
+        table.join(newest, and_(table.c.fk_model_activator_id == newest.c.fk_model_activator_id,
+                                table.c.parameter_name == newest.c.parameter_name))
+    ).where(table.c.fk_value_id != newest.c.fk_value_id))]
+
+    for start in range(0, len(stale), STALE_VALUES_PER_STATEMENT):
+        value_ids = stale[start:start + STALE_VALUES_PER_STATEMENT]
+        connection.execute(table.delete().where(table.c.fk_value_id.in_(value_ids)))
+        for column in (PrimitiveValue.__table__.c.primitive_value_id, LayerValue.__table__.c.layer_value_id,
+                       Value.__table__.c.value_id):
+            connection.execute(column.table.delete().where(column.in_(value_ids)))
+    if stale:
+        current_app.logger.info(f'Removed {len(stale)} stale activator parameter values')
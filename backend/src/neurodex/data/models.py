@@ -1,12 +1,17 @@
-from sqlalchemy import (TIMESTAMP, Column, ForeignKey, Integer,
-                        String, Table, Text, UniqueConstraint, Boolean)
+from datetime import datetime
+
+from sqlalchemy import (JSON, TIMESTAMP, Boolean, Column, Date, ForeignKey,
+                        Index, Integer, String, Table, Text, UniqueConstraint)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.ext.orderinglist import ordering_list
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 Base = declarative_base()
 
+# Parameters of the document parameter storage, stored as jsonb on postgres
+ParameterDocument = JSON().with_variant(JSONB(), 'postgresql')
+
 user_role_table = Table('user_role', Base.metadata,
                         Column('user_id', Text, ForeignKey('user.user_id')),
                         Column('role_id', Text, ForeignKey('role.role_id'))
@@ -20,8 +25,10 @@ class User(Base):
 
     user_id = Column(Text, primary_key=True, nullable=False)
     name = Column(Text, nullable=False)
-    email = Column(Text, nullable=False)
+    email = Column(Text, nullable=False, unique=True, index=True)
     password = Column(Text, nullable=False)
+    # Incremented whenever the data or the roles of the user change, see neurodex.service.user_service
+    revision = Column(Integer, nullable=False, server_default='0')
     roles = relationship("Role", secondary=user_role_table, back_populates="users")
     user_metadata = relationship("UserMetadata", back_populates="user", uselist=False)
 
@@ -31,7 +38,7 @@ class UserMetadata(Base):
     __tablename__ = "user_metadata"
 
     fk_user_id = Column(String, ForeignKey('user.user_id', ondelete='CASCADE'), primary_key=True)
-    confirmation_id = Column(Text, nullable=True)
+    confirmation_id = Column(Text, nullable=True, index=True)
     user = relationship("User", back_populates="user_metadata")
 
 
@@ -65,11 +72,18 @@ class Model(Base):
     fk_user_id = Column(String, ForeignKey('user.user_id', ondelete='CASCADE'))
     created_at = Column(TIMESTAMP(timezone=False), nullable=False, server_default=func.now())
     updated_at = Column(TIMESTAMP(timezone=False), nullable=False, server_default=func.now(), onupdate=func.now())
+    # Incremented with every change of the model, its layers or its activators
+    revision = Column(Integer, nullable=False, server_default='0')
+
+    # Positions are sparse and maintained by neurodex.data.ordering
+    layers = relationship("ModelLayer", order_by="ModelLayer.position")
+    activators = relationship("ModelActivator", order_by="ModelActivator.position")
 
-    layers = relationship("ModelLayer", order_by="ModelLayer.position",
-                          collection_class=ordering_list('position'))
-    activators = relationship("ModelActivator", order_by="ModelActivator.position",
-                              collection_class=ordering_list('position'))
+    __table_args__ = (
+        # Covers the keyset pagination of the models of a user, see load_model_summaries
+        Index('ix_model_user_updated_at_id', 'fk_user_id', 'updated_at', 'model_id'),
+        Index('ix_model_user_name', 'fk_user_id', 'name', unique=True),
+    )
 
     def update_timestamp(self):
         self.updated_at = func.now()
@@ -85,10 +99,11 @@ class ModelLayer(ActivatorTarget):
 
     model_layer_id = Column(Integer, ForeignKey(
         'activator_target.activator_target_id', ondelete='CASCADE'), primary_key=True)
-    fk_model_id = Column(Text, ForeignKey('model.model_id', ondelete='CASCADE'))
+    fk_model_id = Column(Text, ForeignKey('model.model_id', ondelete='CASCADE'), index=True)
     fk_layer_id = Column(Text, ForeignKey('layer_type.layer_type_id', ondelete='CASCADE'))
     name = Column(Text, nullable=False)
     position = Column(Integer, nullable=False)
+    parameters = Column(ParameterDocument)
 
     parameter_data = relationship("ModelLayerParameterData")
     model = relationship("Model", back_populates="layers")
@@ -105,7 +120,7 @@ class ModelLayerParameterData(Base):
 
     fk_model_layer_id = Column(Integer, ForeignKey("model_layer.model_layer_id", ondelete='CASCADE'), primary_key=True)
     parameter_name = Column(Text, nullable=False, primary_key=True)
-    fk_value_id = Column(Integer, ForeignKey("value.value_id"))
+    fk_value_id = Column(Integer, ForeignKey("value.value_id"), index=True)
     value = relationship('Value')
 
     __table_args__ = (UniqueConstraint('fk_model_layer_id', 'parameter_name', name='model_layer_parameter_name_uc'),)
@@ -118,6 +133,10 @@ class LayerType(Base):
     layer_type_id = Column(Text, primary_key=True, nullable=False)
     description = Column(Text)
     layer_name = Column(Text, nullable=False)
+    # Hash of the catalog entry the layer type was imported from, None for layer types created through the API
+    catalog_hash = Column(Text, nullable=True)
+    # Set once the layer type is missing from the imported catalog, existing layers keep using it
+    removed_at = Column(TIMESTAMP(timezone=False), nullable=True)
 
     parameters = relationship('LayerTypeParameter', passive_deletes=True)
 
@@ -160,9 +179,11 @@ class FunctionParameter(Base):
 class ModelActivator(Base):
     __tablename__ = "model_activator"
     model_activator_id = Column(Integer, primary_key=True)
-    fk_model_id = Column(Text, ForeignKey('model.model_id', ondelete='CASCADE'))
-    fk_activator_target_id = Column(Integer, ForeignKey("activator_target.activator_target_id", ondelete='CASCADE'))
+    fk_model_id = Column(Text, ForeignKey('model.model_id', ondelete='CASCADE'), index=True)
+    fk_activator_target_id = Column(Integer, ForeignKey("activator_target.activator_target_id", ondelete='CASCADE'),
+                                    index=True)
     position = Column(Integer, nullable=False)
+    parameters = Column(ParameterDocument)
 
     model = relationship("Model", back_populates="activators")
     parameter_data = relationship("ModelActivatorParameterData")
@@ -174,12 +195,17 @@ class ModelActivatorParameterData(Base):
 
     fk_model_activator_id = Column(Integer, ForeignKey(
         'model_activator.model_activator_id', ondelete='CASCADE'), primary_key=True,)
-    fk_value_id = Column(Integer, ForeignKey("value.value_id"), primary_key=True)
+    fk_value_id = Column(Integer, ForeignKey("value.value_id"), primary_key=True, index=True)
     parameter_name = Column(Text, nullable=False, primary_key=True)
 
     model_activator = relationship("ModelActivator", back_populates="parameter_data")
     value = relationship('Value')
 
+    __table_args__ = (
+        # Older versions inserted a row on every change, see the migration unique_activator_parameters
+        Index('ix_model_activator_parameter_name', 'fk_model_activator_id', 'parameter_name', unique=True),
+    )
+
 
 class Value(Base):
     __tablename__ = 'value'
@@ -198,7 +224,7 @@ class LayerValue(Value):
     __tablename__ = "layer_value"
 
     layer_value_id = Column(Integer, ForeignKey('value.value_id'), primary_key=True)
-    fk_model_layer_id = Column(Integer, ForeignKey("model_layer.model_layer_id"))
+    fk_model_layer_id = Column(Integer, ForeignKey("model_layer.model_layer_id"), index=True)
     value = relationship("ModelLayer")
 
     __mapper_args__ = {
@@ -215,3 +241,66 @@ class PrimitiveValue(Value):
     __mapper_args__ = {
         'polymorphic_identity': 'primitive_value',
     }
+
+
+class CatalogVersion(Base):
+    """Holds the version of the catalog of layer types and functions.
+
+    The version is incremented whenever the catalog changes, so cached copies of it can be invalidated.
+    """
+    __tablename__ = "catalog_version"
+
+    catalog_version_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class SchemaVersion(Base):
+    """Holds the version of the database schema, i.e. the number of migrations that were applied to it."""
+    __tablename__ = "schema_version"
+
+    schema_version_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class Statistic(Base):
+    """Holds a counter of the admin statistics, maintained by neurodex.data.statistics."""
+    __tablename__ = "statistic"
+
+    name = Column(Text, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class StatisticHistory(Base):
+    """Holds the value of a counter of the admin statistics on a day."""
+    __tablename__ = "statistic_history"
+
+    day = Column(Date, primary_key=True)
+    name = Column(Text, primary_key=True)
+    value = Column(Integer, nullable=False)
+
+
+class OutboxEmail(Base):
+    """Holds an email that is sent by the email dispatcher, see neurodex.service.email_dispatcher.
+
+    Emails are written in the transaction of the change they belong to and sent after it was committed.
+    """
+    __tablename__ = "email_outbox"
+
+    email_id = Column(Integer, primary_key=True)
+    # Name of the template, the transports know how to render each template
+    template = Column(Text, nullable=False)
+    recipient = Column(Text, nullable=False)
+    recipient_name = Column(Text, nullable=False)
+    data = Column(JSON, nullable=False)
+    # pending, sending (claimed by a dispatcher until next_attempt_at), sent or failed
+    status = Column(Text, nullable=False, default='pending')
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(TIMESTAMP(timezone=False), nullable=False, default=datetime.utcnow)
+    created_at = Column(TIMESTAMP(timezone=False), nullable=False, default=datetime.utcnow)
+    sent_at = Column(TIMESTAMP(timezone=False), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # Covers the query of the dispatcher for due emails
+        Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
@@ -0,0 +1,99 @@
+from collections import namedtuple
+
+from sqlalchemy import func, inspect
+
+from neurodex import db
+
+from .models import ModelActivator, ModelLayer
+
+# Distance between the positions of neighbouring elements after they are appended or renumbered
+POSITION_GAP = 1024
+
+# An ordered collection of a model: the name of the relationship, the class of its elements, the column referencing
+# the model and the primary key of the elements
+OrderedCollection = namedtuple('OrderedCollection', ['attribute', 'entity', 'parent', 'key'])
+
+LAYERS = OrderedCollection('layers', ModelLayer, ModelLayer.fk_model_id, ModelLayer.model_layer_id)
+ACTIVATORS = OrderedCollection('activators', ModelActivator, ModelActivator.fk_model_id,
+                               ModelActivator.model_activator_id)
+
+
+def append(model, collection, element):
+    """Adds an element to the end of a collection of a model.
+
+    Positions are sparse, so adding, moving or deleting an element doesn't change the position of any other
+    element. Only the order of the positions is meaningful. The collection is only loaded if it was loaded before.
+
+    Args:
+        model: The model the element is added to
+        collection: The ``OrderedCollection`` the element is added to
+        element: The new element
+    """
+    last = db.session.query(func.max(collection.entity.position)).filter(
+        collection.parent == model.model_id).scalar()
+    element.position = POSITION_GAP if last is None else last + POSITION_GAP
+    setattr(element, collection.parent.key, model.model_id)
+
+    if collection.attribute in inspect(model).unloaded:
+        db.session.add(element)
+    else:
+        getattr(model, collection.attribute).append(element)
+
+
+def move(model, collection, item, index):
+    """Moves an element of a collection of a model to a new index.
+
+    Only the position of the moved element is changed, it is placed between the positions of its new neighbours.
+    If there is no free position between them the collection is renumbered first.
+
+    Args:
+        model: The model of the collection
+        collection: The ``OrderedCollection`` of the element
+        item: The element that is moved
+        index: The index of the element after it was moved
+    """
+    position = _free_position(collection, item, index)
+    if position is None:
+        renumber(collection, model.model_id)
+        position = _free_position(collection, item, index)
+    item.position = position
+
+    if collection.attribute not in inspect(model).unloaded:
+        # Sorting doesn't change which elements belong to the collection, so it isn't recorded as a change
+        getattr(model, collection.attribute).sort(key=lambda element: element.position)
+
+
+def renumber(collection, parent_id):
+    """Spreads the positions of a collection evenly, keeping their order."""
+    elements = db.session.query(collection.entity).filter(collection.parent == parent_id).order_by(
+        collection.entity.position).all()
+    for number, element in enumerate(elements, start=1):
+        element.position = number * POSITION_GAP
+    db.session.flush()
+
+
+def _free_position(collection, item, index):
+    siblings = db.session.query(collection.entity.position).filter(
+        collection.parent == getattr(item, collection.parent.key), collection.key != getattr(item, collection.key.key)
+    ).order_by(collection.entity.position)
+
+    if index <= 0:
+        before, after = None, siblings.limit(1).scalar()
+    else:
+        neighbours = [row.position for row in siblings.offset(index - 1).limit(2)]
+        if not neighbours:
+            # Moved behind the last element
+            last = siblings.order_by(None).with_entities(func.max(collection.entity.position))
+            before, after = last.scalar(), None
+        else:
+            before, after = neighbours[0], neighbours[1] if len(neighbours) > 1 else None
+
+    if before is None and after is None:
+        return POSITION_GAP
+    elif before is None:
+        return after - POSITION_GAP
+    elif after is None:
+        return before + POSITION_GAP
+    elif after - before > 1:
+        return (before + after) // 2
+    return None
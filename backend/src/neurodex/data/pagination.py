@@ -0,0 +1,114 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import literal, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# A page of a keyset paginated query: its items and the cursor of the next page, None on the last page
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor wasn't created by ``keyset_page`` for the same keys."""
+
+
+class ComparableTimestamp(FunctionElement):
+    """A timestamp in a form that compares like the time it stands for.
+
+    SQLite stores timestamps as text, without fraction if they were set by ``CURRENT_TIMESTAMP`` and with
+    microseconds if they were bound from Python. A time without fraction sorts before the same time bound from
+    Python, so both are padded to microseconds. Other databases compare the timestamps as they are.
+    """
+    name = 'comparable_timestamp'
+
+
+@compiles(ComparableTimestamp)
+def _compile_comparable_timestamp(element, compiler, **kwargs):
+    return compiler.process(element.clauses, **kwargs)
+
+
+@compiles(ComparableTimestamp, 'sqlite')
+def _compile_sqlite_comparable_timestamp(element, compiler, **kwargs):
+    return f"substr({compiler.process(element.clauses, **kwargs)} || '.000000', 1, 26)"
+
+
+def keyset_page(query, keys, cursor=None, limit=DEFAULT_PAGE_SIZE, descending=False):
+    """Loads one page of a query, ordered by a unique combination of columns.
+
+    Instead of skipping the items of the previous pages with an offset, the page continues behind the keys of the
+    last item of the previous page. With an index on the keys every page is loaded in the same time, no matter how
+    far the client has paged.
+
+    Args:
+        query: The query, it must not be ordered yet
+        keys: The columns the items are ordered by, together they have to be unique. Each item needs an attribute
+            with the name of each column.
+        cursor: The ``next_cursor`` of the previous page or None for the first page
+        limit: The maximum number of items of the page
+        descending: Whether the items are ordered descending instead of ascending
+
+    Returns:
+        A ``Page``
+
+    Raises:
+        InvalidCursor: If the cursor can't be decoded
+    """
+    if cursor is not None:
+        columns = [_comparable(key, key) for key in keys]
+        values = [_comparable(key, literal(value, type_=key.type))
+                  for key, value in zip(keys, decode_cursor(cursor, keys))]
+        if descending:
+            query = query.filter(tuple_(*columns) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+
+    query = query.order_by(*[key.desc() if descending else key for key in keys])
+    # One item more than requested tells if there is a next page
+    items = query.limit(limit + 1).all()
+    if len(items) <= limit:
+        return Page(items, None)
+
+    items = items[:limit]
+    return Page(items, encode_cursor([getattr(items[-1], key.key) for key in keys]))
+
+
+def iterate_keyset(query, keys, batch_size=500):
+    """Iterates over all items of a query, loading them in pages of ``batch_size`` items.
+
+    Only one page is held in memory at a time, as long as the caller doesn't keep references to the items.
+    """
+    cursor = None
+    while True:
+        page = keyset_page(query, keys, cursor, batch_size)
+        yield from page.items
+        if page.next_cursor is None:
+            return
+        cursor = page.next_cursor
+
+
+def _comparable(key, expression):
+    if key.type.python_type is datetime:
+        return ComparableTimestamp(expression)
+    return expression
+
+
+def encode_cursor(values):
+    document = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(document, separators=(',', ':')).encode('utf8')).decode('ascii')
+
+
+def decode_cursor(cursor, keys):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise InvalidCursor(cursor)
+        return [datetime.fromisoformat(value) if key.type.python_type is datetime else value
+                for key, value in zip(keys, values)]
+    except (TypeError, ValueError, UnicodeError) as error:
+        raise InvalidCursor(cursor) from error
@@ -0,0 +1,195 @@
+from flask import current_app
+from sqlalchemy import and_, exists, inspect, select
+from sqlalchemy.orm import selectinload, with_polymorphic
+
+from neurodex import db
+
+from .models import (LayerValue, ModelActivator, ModelActivatorParameterData,
+                     ModelLayer, ModelLayerParameterData, PrimitiveValue,
+                     Value)
+
+# Parameters are stored either as {"value": "<primitive>"} or as {"layer": <model layer id>}.
+PRIMITIVE_KEY = 'value'
+LAYER_KEY = 'layer'
+
+
+class TableParameterStorage(object):
+    """Stores every parameter as a parameter data row that references a ``Value`` row."""
+
+    name = 'tables'
+
+    def loader_options(self, owner_class, path=None):
+        """Returns the loader options that load the parameters of layers or activators.
+
+        Args:
+            owner_class: The class (or polymorphic alias) of the layers or activators
+            path: The loader option that loads the layers or activators, e.g. ``selectinload(Model.layers)``,
+                None if they are the entities of the query
+
+        Returns:
+            A list of loader options
+        """
+        any_value = with_polymorphic(Value, [PrimitiveValue, LayerValue], flat=True)
+        parameter_data_class = _parameter_data_class(owner_class)
+        load = selectinload if path is None else path.selectinload
+        return [load(owner_class.parameter_data).joinedload(parameter_data_class.value.of_type(any_value))]
+
+    def read(self, owner):
+        """Returns the parameters of a layer or activator as a dict of parameter names to stored values."""
+        parameters = {}
+        for parameter_data in owner.parameter_data:
+            value = parameter_data.value
+            if isinstance(value, LayerValue):
+                parameters[parameter_data.parameter_name] = {LAYER_KEY: value.fk_model_layer_id}
+            else:
+                parameters[parameter_data.parameter_name] = {PRIMITIVE_KEY: value.value}
+        return parameters
+
+    def write(self, owner, name, stored_value):
+        """Sets a single parameter of a layer or activator.
+
+        The value row of the parameter is updated in place if it has the right type. Otherwise a new value row is
+        inserted and the previous one is deleted, so no unreferenced value rows are left behind.
+        """
+        parameter_data = next((item for item in owner.parameter_data if item.parameter_name == name), None)
+        previous = None if parameter_data is None else parameter_data.value
+
+        if LAYER_KEY in stored_value:
+            if isinstance(previous, LayerValue):
+                previous.fk_model_layer_id = stored_value[LAYER_KEY]
+                return
+            value = LayerValue(fk_model_layer_id=stored_value[LAYER_KEY])
+        else:
+            if isinstance(previous, PrimitiveValue):
+                previous.value = stored_value[PRIMITIVE_KEY]
+                return
+            value = PrimitiveValue(value=stored_value[PRIMITIVE_KEY])
+
+        if parameter_data is None:
+            parameter_data_class = _parameter_data_class(type(owner))
+            owner.parameter_data.append(parameter_data_class(parameter_name=name, value=value))
+        else:
+            parameter_data.value = value
+            if previous is not None:
+                db.session.delete(previous)
+
+    def write_all(self, owner, parameters):
+        """Replaces all parameters of a layer or activator."""
+        for name, stored_value in parameters.items():
+            self.write(owner, name, stored_value)
+
+
+class DocumentParameterStorage(object):
+    """Stores all parameters of a layer or activator as one json document on its own row."""
+
+    name = 'document'
+
+    def loader_options(self, owner_class, path=None):
+        return []
+
+    def read(self, owner):
+        return owner.parameters or {}
+
+    def write(self, owner, name, stored_value):
+        # A new dict is assigned so the change is detected
+        owner.parameters = dict(owner.parameters or {}, **{name: stored_value})
+
+    def write_all(self, owner, parameters):
+        owner.parameters = dict(parameters)
+
+
+STORAGES = {storage.name: storage for storage in (TableParameterStorage(), DocumentParameterStorage())}
+
+
+def parameter_storage():
+    """Returns the parameter storage that is configured with PARAMETER_STORAGE."""
+    return STORAGES[current_app.config['PARAMETER_STORAGE']]
+
+
+def dump_parameters(owner):
+    """Serializes the parameters of a layer or activator to their external representation."""
+    parameters = {}
+    for name, stored_value in parameter_storage().read(owner).items():
+        if LAYER_KEY in stored_value:
+            parameters[name] = {'id': stored_value[LAYER_KEY]}
+        else:
+            parameters[name] = {'value': stored_value[PRIMITIVE_KEY]}
+    return parameters
+
+
+def migrate_parameters(source, target, batch_size=500):
+    """Copies the parameters of all layers and activators from one storage to another.
+
+    The owners are processed in batches of ``batch_size``, each batch is committed on its own. The source is
+    left untouched, so switching PARAMETER_STORAGE back is possible until the first write.
+
+    Args:
+        source: The storage the parameters are read from
+        target: The storage the parameters are written to
+        batch_size: The number of layers or activators per transaction
+
+    Returns:
+        A dict with the number of migrated layers and activators
+    """
+    counts = {}
+    for owner_class, key in ((ModelLayer, ModelLayer.model_layer_id),
+                             (ModelActivator, ModelActivator.model_activator_id)):
+        query = db.session.query(owner_class).options(*source.loader_options(owner_class)).order_by(key)
+        count = 0
+        last_id = None
+        while True:
+            batch = query if last_id is None else query.filter(key > last_id)
+            owners = batch.limit(batch_size).all()
+            if not owners:
+                break
+
+            for owner in owners:
+                target.write_all(owner, source.read(owner))
+            last_id = getattr(owners[-1], key.key)
+            count += len(owners)
+            db.session.commit()
+        counts[owner_class.__tablename__] = count
+    return counts
+
+
+def compact_values(batch_size=1000):
+    """Deletes value rows that are not referenced by any parameter.
+
+    Values are orphaned when the parameter data of a deleted layer or activator is removed by the database, or by
+    older versions that inserted a new value on every change. They are deleted in batches of ``batch_size``, each
+    batch is committed on its own so the job can run next to the application.
+
+    Args:
+        batch_size: The number of value rows per transaction
+
+    Returns:
+        A dict with the number of deleted value rows per value type
+    """
+    value = Value.__table__
+    references = (ModelLayerParameterData.__table__.c.fk_value_id,
+                  ModelActivatorParameterData.__table__.c.fk_value_id)
+    orphaned = select([value.c.value_id, value.c.type]).where(
+        and_(*[~exists().where(reference == value.c.value_id) for reference in references])
+    ).order_by(value.c.value_id).limit(batch_size)
+
+    counts = {}
+    while True:
+        rows = db.session.execute(orphaned).fetchall()
+        if not rows:
+            break
+
+        value_ids = [row.value_id for row in rows]
+        for column in (PrimitiveValue.__table__.c.primitive_value_id, LayerValue.__table__.c.layer_value_id):
+            db.session.execute(column.table.delete().where(column.in_(value_ids)))
+        db.session.execute(value.delete().where(value.c.value_id.in_(value_ids)))
+        db.session.commit()
+
+        for row in rows:
+            counts[row.type] = counts.get(row.type, 0) + 1
+    return counts
+
+
+def _parameter_data_class(owner_class):
+    if issubclass(inspect(owner_class).class_, ModelLayer):
+        return ModelLayerParameterData
+    return ModelActivatorParameterData
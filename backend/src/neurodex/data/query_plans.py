@@ -0,0 +1,102 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import literal, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from neurodex import db
+
+from .models import (LayerValue, Model, ModelActivator,
+                     ModelActivatorParameterData, ModelLayer,
+                     ModelLayerParameterData, User, UserMetadata)
+
+
+class Explain(Executable, ClauseElement):
+    """Returns the query plan of a statement instead of executing it."""
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kwargs):
+    prefix = 'EXPLAIN QUERY PLAN ' if compiler.dialect.name == 'sqlite' else 'EXPLAIN (FORMAT JSON) '
+    return prefix + compiler.process(element.statement, **kwargs)
+
+
+def hot_queries():
+    """Returns the queries that run on every request of their endpoint.
+
+    Returns:
+        A list of tuples of a description, the queried table and the query
+    """
+    query = db.session.query
+    return [
+        ('models of a user', 'model',
+         query(Model).filter(Model.fk_user_id == 'user').order_by(Model.updated_at.desc(), Model.model_id.desc())),
+        ('next page of the models of a user', 'model',
+         query(Model).filter(Model.fk_user_id == 'user', tuple_(Model.updated_at, Model.model_id) < tuple_(
+             literal(datetime(2020, 1, 1), type_=Model.updated_at.type), literal('model'))).order_by(
+             Model.updated_at.desc(), Model.model_id.desc())),
+        ('page of users', 'user', query(User).filter(User.user_id > 'user').order_by(User.user_id)),
+        ('model name of a user', 'model',
+         query(Model).filter(Model.name == 'name', Model.fk_user_id == 'user')),
+        ('user by email', 'user', query(User).filter(User.email == 'email')),
+        ('user by confirmation id', 'user_metadata',
+         query(UserMetadata).filter(UserMetadata.confirmation_id == 'confirmation')),
+        ('layers of a model', 'model_layer', query(ModelLayer).filter(ModelLayer.fk_model_id == 'model')),
+        ('activators of a model', 'model_activator',
+         query(ModelActivator).filter(ModelActivator.fk_model_id == 'model')),
+        ('activators of a target', 'model_activator',
+         query(ModelActivator).filter(ModelActivator.fk_activator_target_id == 1)),
+        ('parameters of layers', 'model_layer_parameter_data',
+         query(ModelLayerParameterData).filter(ModelLayerParameterData.fk_model_layer_id.in_([1, 2]))),
+        ('parameters of activators', 'model_activator_parameter',
+         query(ModelActivatorParameterData).filter(ModelActivatorParameterData.fk_model_activator_id.in_([1, 2]))),
+        ('layer parameters of a value', 'model_layer_parameter_data',
+         query(ModelLayerParameterData).filter(ModelLayerParameterData.fk_value_id == 1)),
+        ('activator parameters of a value', 'model_activator_parameter',
+         query(ModelActivatorParameterData).filter(ModelActivatorParameterData.fk_value_id == 1)),
+        ('values referencing a layer', 'layer_value', query(LayerValue).filter(LayerValue.fk_model_layer_id == 1)),
+    ]
+
+
+def check_query_plans():
+    """Checks that none of the hot queries scans its whole table.
+
+    The planner prefers sequential scans on small tables, so postgres is told to avoid them while the plans are
+    created. A remaining sequential scan means there is no index it could use.
+
+    Returns:
+        A list of tuples of the description of the query, the plan and whether it uses an index
+    """
+    results = []
+    with db.engine.connect() as connection:
+        transaction = connection.begin()
+        if connection.dialect.name == 'postgresql':
+            connection.execute('SET LOCAL enable_seqscan = off')
+
+        for description, table, query in hot_queries():
+            rows = connection.execute(Explain(query.statement)).fetchall()
+            if connection.dialect.name == 'sqlite':
+                plan = [row[-1] for row in rows]
+                scans = [step for step in plan if _is_sqlite_table_scan(step, table)]
+            else:
+                plan = rows[0][0] if isinstance(rows[0][0], list) else json.loads(rows[0][0])
+                scans = [node for node in _plan_nodes(plan[0]['Plan'])
+                         if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == table]
+            results.append((description, plan, not scans))
+        transaction.rollback()
+    return results
+
+
+def _is_sqlite_table_scan(step, table):
+    words = step.replace(' TABLE ', ' ').split()
+    return words[:2] == ['SCAN', table] and 'INDEX' not in words
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _plan_nodes(child)
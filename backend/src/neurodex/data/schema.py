@@ -1,30 +1,39 @@
+from flask_marshmallow.schema import sentinel
+
 from neurodex import ma
+from neurodex.json_provider import jsonify
 from neurodex.util import camelcase
 
 from .models import (Function, FunctionParameter, LayerType,
                      LayerTypeParameter, Model, ModelActivator, ModelLayer,
-                     ModelLayerParameterData, Role, User, Value)
+                     Role, User)
+from .parameter_storage import dump_parameters
 
 
-class CamelCaseSchema(ma.SQLAlchemyAutoSchema):
-    """Schema that uses camel-case for its external representation
-    and snake-case for its internal representation.
+class JsonifyMixin:
+    """Mixin for schemas that create their responses with the JSON provider of the app."""
+
+    def jsonify(self, obj, many=sentinel, *args, **kwargs):
+        if many is sentinel:
+            many = self.many
+        data = self.dump(obj, many=many)
+        return jsonify(data, *args, **kwargs)
+
+
+class CamelCaseMixin:
+    """Mixin for schemas that use camel-case for their external representation
+    and snake-case for their internal representation.
     """
 
     def on_bind_field(self, field_name, field_obj):
         field_obj.data_key = camelcase(field_obj.data_key or field_name)
 
 
-class ParameterData(ma.Nested):
-    def __init__(self, nested, key, value, *args, **kwargs):
-        super(ParameterData, self).__init__(nested, many=True, *args, **kwargs)
-        self.key = key
-        self.value = value
+class CamelCaseSchema(JsonifyMixin, CamelCaseMixin, ma.SQLAlchemyAutoSchema):
+    """Auto schema that uses camel-case for its external representation
+    and snake-case for its internal representation.
+    """
 
-    def _serialize(self, nested_obj, attr, obj):
-        nested_list = super(ParameterData, self)._serialize(nested_obj, attr, obj)
-        nested_dict = {item[self.key]: item[self.value]['value'] for item in nested_list if item}
-        return nested_dict
 
 # =================================================================
 # Schema Definitions
@@ -35,7 +44,7 @@ class UserSchema(CamelCaseSchema):
 
     class Meta:
         model = User
-        exclude = ('password',)
+        exclude = ('password', 'revision')
 
     roles = ma.Pluck("RoleSchema", 'role_id', many=True)
 
@@ -48,15 +57,35 @@ class RoleSchema(CamelCaseSchema):
 class ModelSchema(CamelCaseSchema):
     class Meta:
         model = Model
+        exclude = ('revision',)
 
     user = ma.Nested("UserSchema")
     activators = ma.List(ma.Nested("ModelActivatorSchema"))
     layers = ma.List(ma.Nested("ModelLayerSchema"))
 
 
+class ModelSummarySchema(JsonifyMixin, CamelCaseMixin, ma.Schema):
+    """Lightweight representation of a model without its layers and activators.
+
+    Serializes the rows returned by ``load_model_summaries``.
+    """
+    model_id = ma.String()
+    name = ma.String()
+    created_at = ma.DateTime()
+    updated_at = ma.DateTime()
+    layer_count = ma.Integer()
+    activator_count = ma.Integer()
+
+
+class ModelExportSchema(ModelSummarySchema):
+    """A model summary together with the id of its owner, serializes the rows of ``iterate_model_summaries``."""
+    user_id = ma.String(attribute='fk_user_id')
+
+
 class LayerTypeSchema(CamelCaseSchema):
     class Meta:
         model = LayerType
+        exclude = ('catalog_hash', 'removed_at')
 
     parameters = ma.List(ma.Nested("LayerParameterSchema"))
 
@@ -79,49 +108,35 @@ class FunctionSchema(CamelCaseSchema):
     parameters = ma.List(ma.Nested("FunctionParameterSchema"))
 
 
-class ValueSchema(CamelCaseSchema):
-    class Meta:
-        model = Value
-        exclude = ("type",)
-
-    value = ma.Method("serialize_value")
-
-    def serialize_value(self, obj):
-        value = obj.value
-        if isinstance(value, ModelLayer):
-            return {'value': value.layer_name, 'id': value.id}
-        else:
-            return {'value': value}
-
-
 class ModelLayerSchema(CamelCaseSchema):
     class Meta:
         model = ModelLayer
+        exclude = ('parameters',)
 
     display_name = ma.Method("_display_name")
 
     layer_type = ma.Nested("LayerTypeSchema")
-    parameter_data = ParameterData("ParamaterDataSchema", key="parameterName", value="value")
+    parameter_data = ma.Method("serialize_parameter_data")
 
     def _display_name(self, model_layer):
         id = model_layer.model_layer_id
         name = model_layer.name
         return f"{name}{id}"
 
-
-class ParamaterDataSchema(CamelCaseSchema):
-    class Meta:
-        model = ModelLayerParameterData
-
-    value = ma.Nested("ValueSchema")
+    def serialize_parameter_data(self, model_layer):
+        return dump_parameters(model_layer)
 
 
 class ModelActivatorSchema(CamelCaseSchema):
     class Meta:
         model = ModelActivator
+        exclude = ('parameters',)
 
     value = ma.Method('serialize_value')
-    parameter_data = ParameterData("ParamaterDataSchema", key="parameterName", value="value")
+    parameter_data = ma.Method("serialize_parameter_data")
+
+    def serialize_parameter_data(self, obj):
+        return dump_parameters(obj)
 
     def serialize_value(self, obj):
         value = obj.activator_target
@@ -131,14 +146,82 @@ class ModelActivatorSchema(CamelCaseSchema):
             return activation_function_schema.dump(value)
 
 
+class ModelLayerReferenceSchema(ModelLayerSchema):
+    """A model layer that references its layer type by id instead of nesting it."""
+    class Meta:
+        model = ModelLayer
+        exclude = ('parameters', 'layer_type')
+
+    layer_type_id = ma.String(attribute="fk_layer_id")
+
+
+class ModelActivatorReferenceSchema(ModelActivatorSchema):
+    """A model activator that references its target by type and id instead of nesting it."""
+    class Meta:
+        model = ModelActivator
+        exclude = ('parameters', 'value')
+
+    target = ma.Method('serialize_target')
+
+    def serialize_target(self, obj):
+        target = obj.activator_target
+        if target is not None:
+            return {'type': target.type, 'id': obj.fk_activator_target_id}
+
+
+class NormalizedModelSchema(CamelCaseSchema):
+    """Normalized representation of a model.
+
+    Every layer, layer type and function is serialized exactly once into the ``entities`` table, keyed by its id.
+    ``layers`` holds the ids of the layers in order and the activators reference their targets.
+    """
+    class Meta:
+        model = Model
+        exclude = ('revision',)
+
+    layers = ma.Method('serialize_layers')
+    activators = ma.List(ma.Nested("ModelActivatorReferenceSchema"))
+    entities = ma.Method('serialize_entities')
+
+    def serialize_layers(self, model):
+        return [layer.activator_target_id for layer in model.layers]
+
+    def serialize_entities(self, model):
+        layers = {layer.activator_target_id: layer for layer in model.layers}
+        functions = {}
+        for activator in model.activators:
+            target = activator.activator_target
+            if isinstance(target, ModelLayer):
+                layers.setdefault(target.activator_target_id, target)
+            elif isinstance(target, Function):
+                functions.setdefault(target.activator_target_id, target)
+        layer_types = {layer.layer_type.layer_type_id: layer.layer_type for layer in layers.values()}
+
+        return {
+            'layers': _dump_by_id(model_layer_references_schema, layers),
+            'layerTypes': _dump_by_id(layer_types_schema, layer_types),
+            'functions': _dump_by_id(activation_functions_schema, functions),
+        }
+
+
+def _dump_by_id(schema, entities):
+    return {str(id): data for id, data in zip(entities, schema.dump(entities.values()))}
+
+
 user_schema = UserSchema()
 users_schema = UserSchema(many=True)
 
 model_schema = ModelSchema()
 models_schema = ModelSchema(many=True)
 
+model_summaries_schema = ModelSummarySchema(many=True)
+model_export_schema = ModelExportSchema()
+
+normalized_model_schema = NormalizedModelSchema()
+
 model_layer_schema = ModelLayerSchema()
 model_layers_schema = ModelLayerSchema(many=True)
+model_layer_references_schema = ModelLayerReferenceSchema(many=True)
 
 layer_type_schema = LayerTypeSchema()
 layer_types_schema = LayerTypeSchema(many=True)
@@ -0,0 +1,172 @@
+from collections import Counter
+from datetime import date, timedelta
+
+from sqlalchemy import and_, event, func, select
+
+from neurodex import db
+
+from .models import (Model, ModelActivator, ModelLayer, Statistic,
+                     StatisticHistory, User, UserMetadata)
+
+USERS = 'users'
+CONFIRMED_USERS = 'confirmed_users'
+MODELS = 'models'
+LAYERS = 'layers'
+ACTIVATORS = 'activators'
+# The counters that are recorded in the daily history
+TOTALS = (USERS, CONFIRMED_USERS, MODELS, LAYERS, ACTIVATORS)
+# Prefix of the counters of the layers of each layer type, e.g. "layer_type:torch.nn.Linear"
+LAYER_TYPE_PREFIX = 'layer_type:'
+
+# Key of the changes of the counters in the info of the session
+DELTAS_KEY = 'statistic_deltas'
+
+
+def count(name, delta=1):
+    """Changes a counter when the current transaction is committed.
+
+    The changes are collected in the session and written right before the commit, so the rows of the counters are
+    only locked for a moment and changes that are rolled back aren't counted.
+
+    Args:
+        name: The name of the counter
+        delta: The amount the counter is changed by
+    """
+    if delta:
+        db.session.info.setdefault(DELTAS_KEY, Counter())[name] += delta
+
+
+def layer_type_counter(layer_type_id):
+    """Returns the name of the counter of the layers of a layer type."""
+    return LAYER_TYPE_PREFIX + layer_type_id
+
+
+def count_removed_layer(model_layer_id, layer_type_id):
+    """Counts a layer and the activators that reference it as removed, has to be called before it is deleted."""
+    count(LAYERS, -1)
+    if layer_type_id is not None:
+        count(layer_type_counter(layer_type_id), -1)
+    count(ACTIVATORS, -db.session.query(ModelActivator).filter(
+        ModelActivator.fk_activator_target_id == model_layer_id).count())
+
+
+def count_removed_models(*criteria):
+    """Counts the models matching the criteria and their layers and activators as removed.
+
+    Has to be called before the models are deleted, their layers and activators are deleted by the database.
+    """
+    count(MODELS, -db.session.query(Model).filter(*criteria).count())
+    count(ACTIVATORS, -db.session.query(ModelActivator).join(Model).filter(*criteria).count())
+
+    layer_types = db.session.query(ModelLayer.fk_layer_id, func.count(ModelLayer.model_layer_id)).join(
+        Model, ModelLayer.fk_model_id == Model.model_id).filter(*criteria).group_by(ModelLayer.fk_layer_id)
+    for layer_type_id, number in layer_types:
+        count(LAYERS, -number)
+        if layer_type_id is not None:
+            count(layer_type_counter(layer_type_id), -number)
+
+
+def read_statistics():
+    """Returns the values of all counters by name."""
+    return dict(db.session.query(Statistic.name, Statistic.value))
+
+
+def read_counters(connection):
+    """Returns the values of all counters by name, read with a connection outside of the session."""
+    table = Statistic.__table__
+    return dict(connection.execute(select([table.c.name, table.c.value])).fetchall())
+
+
+def compute_statistics(connection):
+    """Counts users, models, layers and activators from scratch.
+
+    Returns:
+        A dict with the value of each counter by name
+    """
+    user = User.__table__
+    model_layer = ModelLayer.__table__
+    confirmed = user.outerjoin(UserMetadata.__table__)
+
+    values = {
+        USERS: connection.execute(select([func.count()]).select_from(user)).scalar(),
+        CONFIRMED_USERS: connection.execute(select([func.count()]).select_from(confirmed).where(
+            UserMetadata.__table__.c.confirmation_id.is_(None))).scalar(),
+        MODELS: connection.execute(select([func.count()]).select_from(Model.__table__)).scalar(),
+        LAYERS: connection.execute(select([func.count()]).select_from(model_layer)).scalar(),
+        ACTIVATORS: connection.execute(select([func.count()]).select_from(ModelActivator.__table__)).scalar(),
+    }
+    layer_types = connection.execute(select([model_layer.c.fk_layer_id, func.count()]).where(
+        model_layer.c.fk_layer_id.isnot(None)).group_by(model_layer.c.fk_layer_id))
+    for layer_type_id, number in layer_types:
+        values[layer_type_counter(layer_type_id)] = number
+    return values
+
+
+def refresh_statistics(connection):
+    """Replaces the counters by freshly computed values and records them in the history of today.
+
+    The counters are maintained on every change, a refresh only corrects them after the database was changed
+    behind the application's back. It counts all rows of the counted tables.
+
+    Returns:
+        A dict with the value of each counter by name
+    """
+    values = compute_statistics(connection)
+    table = Statistic.__table__
+
+    connection.execute(table.delete().where(table.c.name.notin_(list(values))))
+    for name, value in values.items():
+        _write(connection, table, {'name': name}, value)
+    record_history(connection, values)
+    return values
+
+
+def record_history(connection, values, day=None):
+    """Records the current values of the totals as the values of a day, today by default."""
+    day = day or date.today()
+    for name in TOTALS:
+        _write(connection, StatisticHistory.__table__, {'day': day, 'name': name}, values.get(name, 0))
+
+
+def read_history(days):
+    """Returns the recorded values of the totals of the last days.
+
+    Returns:
+        A list of dicts with the day and the values of the totals by name, oldest day first. Days without a
+        recorded value are missing.
+    """
+    history = db.session.query(StatisticHistory).filter(
+        StatisticHistory.day > date.today() - timedelta(days=days)).order_by(StatisticHistory.day)
+
+    entries = {}
+    for row in history:
+        entries.setdefault(row.day, {'day': row.day})[row.name] = row.value
+    return list(entries.values())
+
+
+@event.listens_for(db.session, 'before_commit')
+def _apply_deltas(session):
+    deltas = session.info.pop(DELTAS_KEY, None)
+    if not deltas:
+        return
+
+    table = Statistic.__table__
+    # Sorted, so concurrent transactions lock the rows in the same order
+    for name in sorted(deltas):
+        if not deltas[name]:
+            continue
+        updated = session.execute(table.update().where(table.c.name == name).values(
+            value=table.c.value + deltas[name])).rowcount
+        if not updated:
+            session.execute(table.insert().values(name=name, value=deltas[name]))
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_deltas(session):
+    session.info.pop(DELTAS_KEY, None)
+
+
+def _write(connection, table, key, value):
+    condition = and_(*[table.c[column] == column_value for column, column_value in key.items()])
+    if not connection.execute(table.update().where(condition).values(value=value)).rowcount:
+        connection.execute(table.insert().values(value=value, **key))
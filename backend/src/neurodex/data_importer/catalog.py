@@ -0,0 +1,138 @@
+"""Reads and writes the catalog artifact, without importing torch.
+
+The catalog is extracted from torch by ``flask catalog build`` (see ``importer``) and written as json::
+
+    {
+        "format_version": 2,
+        "torch_version": "1.5.0",
+        "created_at": "2020-06-01T12:00:00",
+        "layer_types": [{
+            "layer_type_id": "torch.nn.Linear",
+            "layer_name": "Linear",
+            "doc_hash": "<sha256 of the docstring>",
+            "description": "<div class=\\"document\\">...</div>",
+            "parameters": [{"name": "in_features", "description": "...", "type": "int", "default_value": null,
+                            "required": true}, ...]
+        }, ...]
+    }
+
+Web workers only load the artifact, so they don't pay for the import of torch.
+"""
+import hashlib
+import json
+import os
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import bindparam, select
+
+from neurodex import db
+from neurodex.data.models import LayerType, LayerTypeParameter
+
+# Incremented whenever the structure of the artifact changes
+CATALOG_FORMAT_VERSION = 2
+# Layer types written per statement by import_catalog
+IMPORT_CHUNK_SIZE = 100
+# The fields of an entry that are stored in the database
+ENTRY_FIELDS = ('layer_name', 'description', 'parameters')
+
+# The ids of the layer types that import_catalog added, changed and marked as removed, and the number of unchanged
+# layer types
+CatalogDiff = namedtuple('CatalogDiff', ['added', 'changed', 'removed', 'unchanged'])
+
+
+class CatalogError(Exception):
+    """Raised if the catalog artifact is missing or can't be read."""
+
+
+def write_catalog(catalog, path):
+    """Writes a catalog to ``path``, replacing an existing artifact only once it is complete."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf8') as file:
+        json.dump(catalog, file, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def read_catalog(path):
+    """Reads the catalog artifact.
+
+    Raises:
+        CatalogError: If the artifact doesn't exist or was written in another format
+    """
+    try:
+        with open(path, encoding='utf8') as file:
+            catalog = json.load(file)
+    except FileNotFoundError:
+        raise CatalogError(f'The catalog {path} has not been built, run "flask catalog build"')
+    except ValueError as error:
+        raise CatalogError(f'The catalog {path} can\'t be read: {error}')
+
+    if catalog.get('format_version') != CATALOG_FORMAT_VERSION:
+        raise CatalogError(f'The catalog {path} has format version {catalog.get("format_version")}, expected '
+                           f'{CATALOG_FORMAT_VERSION}. Build it again with "flask catalog build".')
+    return catalog
+
+
+def import_catalog(catalog, chunk_size=IMPORT_CHUNK_SIZE):
+    """Brings the layer types of the database up to date with a catalog, as part of the current transaction.
+
+    Each imported layer type stores the hash of its entry, only entries whose hash differs are written. Layer types
+    of earlier imports that are missing from the catalog are marked as removed instead of deleted, the layers of
+    existing models keep them. Layer types created through the API aren't touched.
+
+    Returns:
+        A ``CatalogDiff``, layer types that were removed before and are part of the catalog again count as changed
+    """
+    table = LayerType.__table__
+    existing = {row.layer_type_id: row for row in db.session.execute(
+        select([table.c.layer_type_id, table.c.catalog_hash, table.c.removed_at]))}
+    entries = {entry['layer_type_id']: entry for entry in catalog['layer_types']}
+    hashes = {layer_type_id: entry_hash(entry) for layer_type_id, entry in entries.items()}
+
+    added = [key for key in entries if key not in existing]
+    changed = [key for key in entries if key in existing and (
+        existing[key].catalog_hash != hashes[key] or existing[key].removed_at is not None)]
+    removed = [key for key, row in existing.items()
+               if key not in entries and row.catalog_hash is not None and row.removed_at is None]
+
+    for chunk in _chunks(added, chunk_size):
+        db.session.execute(table.insert(), [dict(_layer_type_row(entries[key], hashes[key]), layer_type_id=key)
+                                            for key in chunk])
+        _insert_parameters([entries[key] for key in chunk])
+
+    # The other columns are set from the keys of the rows
+    update = table.update().where(table.c.layer_type_id == bindparam('key')).values(removed_at=None)
+    parameter_table = LayerTypeParameter.__table__
+    for chunk in _chunks(changed, chunk_size):
+        db.session.execute(update, [dict(_layer_type_row(entries[key], hashes[key]), key=key) for key in chunk])
+        db.session.execute(parameter_table.delete().where(parameter_table.c.fk_layer_type_id.in_(chunk)))
+        _insert_parameters([entries[key] for key in chunk])
+
+    now = datetime.utcnow()
+    for chunk in _chunks(removed, chunk_size):
+        db.session.execute(table.update().where(table.c.layer_type_id.in_(chunk)).values(removed_at=now))
+
+    return CatalogDiff(added, changed, removed, len(entries) - len(added) - len(changed))
+
+
+def entry_hash(entry):
+    """Returns a hash of the fields of a catalog entry that are stored in the database."""
+    content = json.dumps([entry[field] for field in ENTRY_FIELDS], sort_keys=True)
+    return hashlib.sha256(content.encode('utf8')).hexdigest()
+
+
+def _layer_type_row(entry, catalog_hash):
+    return {'layer_name': entry['layer_name'], 'description': entry['description'], 'catalog_hash': catalog_hash}
+
+
+def _insert_parameters(entries):
+    rows = [dict(parameter, fk_layer_type_id=entry['layer_type_id']) for entry in entries
+            for parameter in entry['parameters']]
+    if rows:
+        db.session.execute(LayerTypeParameter.__table__.insert(), rows)
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
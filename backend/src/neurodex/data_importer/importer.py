@@ -1,39 +1,86 @@
-
+import hashlib
 import inspect
+import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 
+import docutils
 import torch.nn
-import re
+from docutils.core import publish_parts
 
-from neurodex.data.models import LayerType, LayerTypeParameter
+from .catalog import CATALOG_FORMAT_VERSION
 
-from docutils.core import publish_parts
-import docutils
+# Part of the hash of every docstring. Increment it when the extraction of descriptions or parameters changes, so
+# the next build extracts all docstrings again instead of reusing the entries of the previous catalog.
+EXTRACTOR_VERSION = 1
 
 
-def get_layers():
-    pytorch_module = sys.modules[torch.nn.modules.__name__]
-    list_of_modules = inspect.getmembers(pytorch_module, inspect.isclass)
+def build_catalog(previous=None, processes=None):
+    """Extracts the catalog of layer types from torch, see ``neurodex.data_importer.catalog`` for its format.
+
+    Rendering docstrings with docutils is slow, so only docstrings that changed since the ``previous`` catalog are
+    rendered and parsed, in a pool of ``processes`` processes. The entries of unchanged docstrings are reused.
+
+    Args:
+        previous: The catalog of the previous build or None to extract all docstrings
+        processes: The number of processes, the number of CPUs by default
+
+    Returns:
+        A tuple of the catalog and the number of extracted docstrings
+    """
+    previous_entries = {}
+    if previous is not None:
+        previous_entries = {entry['layer_type_id']: entry for entry in previous['layer_types']}
+
     layer_types = []
-    layer_type_parameters = []
-
-    for name, cls in list_of_modules:
-        if cls.__doc__:
-            try:
-                description = publish_parts(cls.__doc__, writer_name='html')['html_body']
-            except docutils.utils.SystemMessage:
-                description = cls.__doc__
+    extract = []
+    for name, cls in get_layer_classes():
         layer_type_id = "torch.nn." + name
-        layer_type = LayerType(layer_type_id=layer_type_id, description=description, layer_name=name)
-        parameters = get_parameters(layer_type_id, cls)
-        layer_types.append(layer_type)
-        layer_type_parameters.extend(parameters)
+        doc_string = cls.__doc__ or ''
+        doc_hash = hash_doc_string(doc_string)
+        entry = previous_entries.get(layer_type_id)
+        if entry is None or entry['doc_hash'] != doc_hash:
+            entry = {'layer_type_id': layer_type_id, 'layer_name': name, 'doc_hash': doc_hash}
+            extract.append((entry, doc_string))
+        layer_types.append(entry)
+
+    if extract:
+        with ProcessPoolExecutor(processes) as pool:
+            extracted = pool.map(extract_doc_string, [doc_string for entry, doc_string in extract], chunksize=8)
+            for (entry, doc_string), (description, parameters) in zip(extract, extracted):
+                entry.update(description=description, parameters=parameters)
+
+    catalog = {
+        'format_version': CATALOG_FORMAT_VERSION,
+        'torch_version': torch.__version__,
+        'created_at': datetime.utcnow().isoformat(),
+        'layer_types': layer_types,
+    }
+    return catalog, len(extract)
+
+
+def get_layer_classes():
+    pytorch_module = sys.modules[torch.nn.modules.__name__]
+    return inspect.getmembers(pytorch_module, inspect.isclass)
+
+
+def hash_doc_string(doc_string):
+    return hashlib.sha256(f'{EXTRACTOR_VERSION}\n{doc_string}'.encode('utf8')).hexdigest()
 
-    return layer_types, layer_type_parameters
+
+def extract_doc_string(doc_string):
+    """Returns the description rendered as html and the parameters of a layer type from its docstring."""
+    if not doc_string:
+        return None, []
+    try:
+        description = publish_parts(doc_string, writer_name='html')['html_body']
+    except docutils.utils.SystemMessage:
+        description = doc_string
+    return description, get_parameters(doc_string)
 
 
-def get_parameters(layer_type_id, cls):
-    doc_string = cls.__doc__
+def get_parameters(doc_string):
     if not doc_string:
         return []
     doc_string_parts = doc_string.split(u"\n")
@@ -88,17 +135,11 @@ def get_parameters(layer_type_id, cls):
                 if ':math:' in default:
                     default = default.replace(':math:', '')
 
-        layer_type_parameter = LayerTypeParameter(
-            fk_layer_type_id=layer_type_id,
-            name=name,
-            description=description,
-            type=type,
-            default_value=default,
-            required=required
-        )
-
-        result_parameters.append(layer_type_parameter)
+        result_parameters.append({
+            'name': name,
+            'description': description,
+            'type': type,
+            'default_value': default,
+            'required': required
+        })
     return result_parameters
-
-
-get_parameters("", torch.nn.CTCLoss)
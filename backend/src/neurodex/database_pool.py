@@ -0,0 +1,161 @@
+import os
+import time
+from threading import Lock
+
+from sqlalchemy import exc
+from sqlalchemy.pool import NullPool, QueuePool
+
+# Pooler mode of pgbouncer in which a server connection is only assigned for the duration of a transaction
+TRANSACTION_POOLER = 'transaction'
+
+
+class PoolMetrics(object):
+    """Counts the checkouts of a connection pool of a worker and how long they waited for a connection.
+
+    Each engine has metrics of its own, see ``instrument_pool``. They survive the recreation of the pool, e.g. after
+    ``engine.dispose()``.
+    """
+
+    def __init__(self):
+        self.checked_out = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._lock = Lock()
+
+    def record_checkout(self, seconds):
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def record_timeout(self, seconds):
+        with self._lock:
+            self.timeouts += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def record_checkin(self):
+        with self._lock:
+            self.checked_out -= 1
+
+    def stats(self, pool, bind):
+        """Returns the metrics together with the current state of a pool.
+
+        Args:
+            pool: The pool of the engine, its size and overflow are only reported for a ``QueuePool``
+            bind: The name of the bind of the engine the metrics are labelled with
+        """
+        with self._lock:
+            result = {
+                'bind': bind,
+                'pid': os.getpid(),
+                'pool': type(pool).__name__,
+                'checkedOut': self.checked_out,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'averageWaitMs': self.wait_seconds / max(self.checkouts + self.timeouts, 1) * 1000,
+                'maxWaitMs': self.max_wait_seconds * 1000,
+            }
+        if isinstance(pool, QueuePool):
+            result.update(size=pool.size(), idle=pool.checkedin(), overflow=max(pool.overflow(), 0),
+                          maxOverflow=pool._max_overflow, timeout=pool.timeout())
+        return result
+
+
+# Name of the bind of the primary database in the metrics
+PRIMARY_BIND = 'primary'
+
+# The metrics of the pools of this worker by the name of the bind of their engine
+pool_metrics = {}
+
+
+def bind_metrics(bind):
+    """Returns the metrics of the pool of a bind, None for the primary database."""
+    return pool_metrics.setdefault(bind or PRIMARY_BIND, PoolMetrics())
+
+
+class InstrumentedPoolMixin(object):
+    """Records the checkouts of a pool in its ``metrics``, those of the primary database unless set by
+    ``instrument_pool``."""
+
+    metrics = bind_metrics(None)
+
+    def _do_get(self):
+        start = time.monotonic()
+        try:
+            record = super(InstrumentedPoolMixin, self)._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.monotonic() - start)
+            raise
+        self.metrics.record_checkout(time.monotonic() - start)
+        return record
+
+    def _do_return_conn(self, conn):
+        self.metrics.record_checkin()
+        super(InstrumentedPoolMixin, self)._do_return_conn(conn)
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedNullPool(InstrumentedPoolMixin, NullPool):
+    pass
+
+
+def instrument_pool(poolclass, bind):
+    """Returns a pool class that records its checkouts in the metrics of a bind.
+
+    All engines are created with the same options, so the class of an instrumented pool is derived for each bind. A
+    recreated pool keeps its class and with it the metrics. Other pool classes are returned unchanged.
+    """
+    if poolclass is None or not issubclass(poolclass, InstrumentedPoolMixin):
+        return poolclass
+    return type(poolclass.__name__, (poolclass,), {'metrics': bind_metrics(bind)})
+
+
+def engine_options(config):
+    """Builds the options of the database engine from the configuration of the app.
+
+    Every worker gets its own pool of ``DATABASE_POOL_SIZE`` connections that can grow by
+    ``DATABASE_MAX_OVERFLOW`` connections under load. Behind pgbouncer in transaction mode
+    (``DATABASE_POOLER = 'transaction'``) connections aren't pooled by the app, pgbouncer already does that.
+    SQLite databases keep the defaults of Flask-SQLAlchemy.
+
+    Args:
+        config: The configuration of the app
+
+    Returns:
+        A dict of keyword arguments of ``create_engine``
+    """
+    if config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return {}
+
+    if config['DATABASE_POOLER'] == TRANSACTION_POOLER:
+        return {'poolclass': InstrumentedNullPool}
+
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config['DATABASE_POOL_SIZE'],
+        'max_overflow': config['DATABASE_MAX_OVERFLOW'],
+        'pool_timeout': config['DATABASE_POOL_TIMEOUT'],
+        'pool_recycle': config['DATABASE_POOL_RECYCLE'],
+        'pool_pre_ping': config['DATABASE_POOL_PRE_PING'],
+    }
+    if config['DATABASE_STATEMENT_TIMEOUT']:
+        options['connect_args'] = {'options': f'-c statement_timeout={config["DATABASE_STATEMENT_TIMEOUT"]}'}
+    return options
+
+
+def set_local_statement_timeout(timeout):
+    """Returns a listener of the ``after_begin`` session event that sets the statement timeout of the transaction.
+
+    pgbouncer in transaction mode doesn't accept the timeout as a startup parameter of the connection and
+    hands the server connection to other clients after each transaction, so it is set in every transaction.
+    """
+    def after_begin(session, transaction, connection):
+        connection.execute(f'SET LOCAL statement_timeout = {int(timeout)}')
+    return after_begin
@@ -0,0 +1,147 @@
+import math
+import time
+from threading import Lock
+
+from flask import _app_ctx_stack, current_app, g, has_request_context, request
+from flask_sqlalchemy import SignallingSession, SQLAlchemy, _EngineConnector
+from sqlalchemy import orm
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.sql.expression import SelectBase
+
+from neurodex.database_pool import instrument_pool
+
+# Key of the replica in SQLALCHEMY_BINDS
+REPLICA_BIND = 'replica'
+# Requests can force reads from the primary by sending "primary" in this header
+ROUTE_HEADER = 'X-Database-Route'
+# Set after a write, requests that carry it read from the primary until the replica has caught up
+READ_PRIMARY_COOKIE = 'read_primary'
+READ_METHODS = ('GET', 'HEAD')
+
+# Seconds the replica is behind, on an idle primary nothing is missing even if the last replay was long ago
+POSTGRES_LAG_QUERY = '''
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+'''
+
+
+class RoutingSession(SignallingSession):
+    """A session that reads from the replica while ``g.read_replica`` is set.
+
+    Only selects are sent to the replica. Flushes, bulk changes and textual statements go to the primary, and once
+    a request wrote something all its following reads go to the primary as well.
+    """
+
+    def __init__(self, db, **options):
+        self._db = db
+        super(RoutingSession, self).__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        if has_request_context() and g.get('read_replica'):
+            if not self._flushing and isinstance(clause, SelectBase):
+                return self._db.get_engine(self.app, bind=REPLICA_BIND)
+            g.read_replica = False
+        return super(RoutingSession, self).get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """Flask-SQLAlchemy with sessions that route reads to the replica, see ``RoutingSession``.
+
+    Each application context gets its own session. By default Flask-SQLAlchemy shares one session per thread (or
+    greenlet), which nested contexts and recycled thread idents of threaded and gevent workers would share.
+    """
+
+    def create_scoped_session(self, options=None):
+        options = dict(options or {})
+        options.setdefault('scopefunc', _app_context_id)
+        return super(RoutingSQLAlchemy, self).create_scoped_session(options)
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def make_connector(self, app=None, bind=None):
+        return _BindConnector(self, self.get_app(app), bind)
+
+
+class _BindConnector(_EngineConnector):
+    """Creates the engine of a bind with a pool that records into the metrics of the bind."""
+
+    def get_options(self, sa_url, echo):
+        options = super(_BindConnector, self).get_options(sa_url, echo)
+        if 'poolclass' in options:
+            options['poolclass'] = instrument_pool(options['poolclass'], self._bind)
+        return options
+
+
+def _app_context_id():
+    return id(_app_ctx_stack.top)
+
+
+class ReplicaMonitor(object):
+    """Remembers how far the replica is behind the primary, so each worker only checks it now and then."""
+
+    def __init__(self):
+        self.lag = None
+        self._checked_at = None
+        self._lock = Lock()
+
+    def current_lag(self, engine, check_interval):
+        """Returns the lag of the replica in seconds, or None if it can't be reached.
+
+        Args:
+            engine: The engine of the replica
+            check_interval: Seconds the last result is reused for
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < check_interval:
+                return self.lag
+            self._checked_at = now
+
+        try:
+            with engine.connect() as connection:
+                lag = connection.scalar(POSTGRES_LAG_QUERY) if connection.dialect.name == 'postgresql' else 0
+                self.lag = float(lag)
+        except DBAPIError as error:
+            current_app.logger.warning(f'Replica is not available: {error}')
+            self.lag = None
+        return self.lag
+
+
+replica_monitor = ReplicaMonitor()
+
+
+def replica_configured():
+    return REPLICA_BIND in (current_app.config.get('SQLALCHEMY_BINDS') or {})
+
+
+def route_request():
+    """Decides whether the current request reads from the replica, registered as ``before_request`` handler.
+
+    Reads go to the replica if one is configured, the request doesn't change anything (GET or HEAD), it didn't ask
+    for the primary, its client didn't write in the last ``REPLICA_MAX_LAG`` seconds and the replica isn't
+    further behind than that.
+    """
+    g.read_replica = False
+    if not replica_configured() or request.method not in READ_METHODS:
+        return
+    if request.headers.get(ROUTE_HEADER) == 'primary' or READ_PRIMARY_COOKIE in request.cookies:
+        return
+
+    engine = current_app.extensions['sqlalchemy'].db.get_engine(current_app, bind=REPLICA_BIND)
+    lag = replica_monitor.current_lag(engine, current_app.config['REPLICA_LAG_CHECK_INTERVAL'])
+    g.read_replica = lag is not None and lag <= current_app.config['REPLICA_MAX_LAG']
+
+
+def remember_writes(response):
+    """Lets the client of a write read from the primary until the replica has it, registered as ``after_request``."""
+    if not replica_configured():
+        return response
+
+    if request.method not in READ_METHODS and response.status_code < 400:
+        response.set_cookie(READ_PRIMARY_COOKIE, '1', max_age=math.ceil(current_app.config['REPLICA_MAX_LAG']),
+                            path='/api/', httponly=True, samesite='Lax')
+    response.headers[ROUTE_HEADER] = 'replica' if g.get('read_replica') else 'primary'
+    return response
@@ -0,0 +1,120 @@
+import json
+from datetime import datetime
+
+import orjson
+from flask import current_app, stream_with_context
+from flask.json import JSONEncoder
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def default(obj):
+    """Converts objects that json can't serialize natively.
+
+    Datetimes are converted to iso format and iterables to lists. Everything else is handled by Flask's encoder.
+    """
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    try:
+        iterable = iter(obj)
+    except TypeError:
+        pass
+    else:
+        return list(iterable)
+    return JSONEncoder().default(obj)
+
+
+class JSONProvider(object):
+    """Serializes responses with the json module of the standard library.
+
+    The output is the same as the one of ``flask.jsonify``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def dumps(self, obj, pretty=False):
+        """Serializes an object to json.
+
+        Args:
+            obj: The object to serialize
+            pretty: Whether the output should be indented
+
+        Returns:
+            The json document as bytes
+        """
+        if pretty:
+            indent, separators = 2, (", ", ": ")
+        else:
+            indent, separators = None, (",", ":")
+        return json.dumps(obj, default=default, indent=indent, separators=separators,
+                          ensure_ascii=self.app.config['JSON_AS_ASCII'],
+                          sort_keys=self.app.config['JSON_SORT_KEYS']).encode('utf8')
+
+    def response(self, *args, **kwargs):
+        """Creates a json response, takes the same arguments as ``flask.jsonify``."""
+        if args and kwargs:
+            raise TypeError("jsonify() behavior undefined when passed both args and kwargs")
+        elif len(args) == 1:
+            data = args[0]
+        else:
+            data = args or kwargs
+
+        pretty = self.app.config['JSONIFY_PRETTYPRINT_REGULAR'] or self.app.debug
+        return self.app.response_class(self.dumps(data, pretty) + b"\n", mimetype=self.app.config['JSONIFY_MIMETYPE'])
+
+
+class OrjsonProvider(JSONProvider):
+    """Serializes responses with orjson.
+
+    Produces the same output as ``JSONProvider`` except for floats. Documents that orjson would serialize
+    differently otherwise, i.e. pretty printed ones, ones that need ascii escaping and ones with non-string keys or
+    integers beyond 64 bit, are serialized by the standard library instead.
+
+    Floats differ in two ways, clients parse both the same:
+
+    - NaN and Infinity are serialized as null. The standard library writes them as ``NaN`` and ``Infinity``, which
+      is not valid json and fails in ``JSON.parse`` of the browser.
+    - Small exponents have no leading zero, e.g. ``1e-7`` instead of ``1e-07``. The value is the same.
+    """
+
+    def dumps(self, obj, pretty=False):
+        if pretty:
+            return super(OrjsonProvider, self).dumps(obj, pretty)
+
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if self.app.config['JSON_SORT_KEYS']:
+            option |= orjson.OPT_SORT_KEYS
+
+        try:
+            result = orjson.dumps(obj, default=default, option=option)
+        except orjson.JSONEncodeError:
+            return super(OrjsonProvider, self).dumps(obj, pretty)
+
+        if self.app.config['JSON_AS_ASCII'] and not result.isascii():
+            return super(OrjsonProvider, self).dumps(obj, pretty)
+        return result
+
+
+def jsonify(*args, **kwargs):
+    """Creates a json response with the JSON provider of the current app."""
+    return current_app.json_provider.response(*args, **kwargs)
+
+
+def ndjson_response(items, dump):
+    """Creates a streamed response with one json document per line.
+
+    The documents are serialized while the response is sent, so only the item that is currently serialized has to
+    be held in memory. The request context stays available to the iteration of ``items``.
+
+    Args:
+        items: An iterable of the items of the response
+        dump: Function that converts an item to a json serializable object
+    """
+    provider = current_app.json_provider
+
+    def generate():
+        for item in items:
+            yield provider.dumps(dump(item)) + b"\n"
+
+    return current_app.response_class(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
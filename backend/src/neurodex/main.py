@@ -1,7 +1,12 @@
-from flask import jsonify, send_from_directory
+from flask import send_from_directory
 from werkzeug.exceptions import HTTPException
 
-from neurodex import BUILD_ROOT, app, db
+from neurodex import BUILD_ROOT, app
+from neurodex.command.catalog_command import catalog_cli
+from neurodex.command.email_command import email_cli
+from neurodex.command.parameter_command import parameter_cli
+from neurodex.command.schema_command import schema_cli
+from neurodex.command.stats_command import stats_cli
 from neurodex.controller.admin_controller import admin_blueprint
 from neurodex.controller.authentication_controller import auth_blueprint
 from neurodex.controller.functions_controller import functions_blueprint
@@ -9,8 +14,11 @@ from neurodex.controller.layer_controller import layer_blueprint
 from neurodex.controller.model_controller import model_blueprint
 from neurodex.controller.user_controller import user_blueprint
 from neurodex.converter.model_converter import ModelConverter
-from neurodex.data.models import Base
-from neurodex.util import CustomJSONEncoder, init_db
+from neurodex.data.migrations import upgrade
+from neurodex.database_routing import remember_writes, route_request
+from neurodex.json_provider import jsonify
+from neurodex.service.password_service import password_hasher
+from neurodex.util import init_db
 
 app.url_map.converters['model'] = ModelConverter
 app.register_blueprint(auth_blueprint)
@@ -19,13 +27,21 @@ app.register_blueprint(model_blueprint)
 app.register_blueprint(layer_blueprint)
 app.register_blueprint(functions_blueprint)
 app.register_blueprint(admin_blueprint)
-app.json_encoder = CustomJSONEncoder
+app.cli.add_command(parameter_cli)
+app.cli.add_command(schema_cli)
+app.cli.add_command(stats_cli)
+app.cli.add_command(email_cli)
+app.cli.add_command(catalog_cli)
+app.before_request(route_request)
+app.after_request(remember_writes)
 
 
 @app.before_first_request
 def setup():
-    Base.metadata.create_all(bind=db.engine)
+    upgrade()
     init_db()
+    # Calibrates the cost of password hashes before the first login needs it
+    password_hasher.rounds
 
 
 @app.errorhandler(HTTPException)
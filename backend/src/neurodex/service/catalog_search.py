@@ -0,0 +1,168 @@
+import heapq
+import html
+import re
+from bisect import bisect_left
+from threading import Lock
+
+from sqlalchemy import select
+
+from neurodex import db
+from neurodex.data.models import LayerType, LayerTypeParameter
+from neurodex.service.catalog_service import get_catalog_version
+
+DEFAULT_RESULTS = 20
+MAX_RESULTS = 100
+# How much a match in each field counts, an exact match of a word counts twice as much as a match of its prefix
+NAME_WEIGHT = 8
+ID_WEIGHT = 4
+PARAMETER_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+EXACT_MATCH_FACTOR = 2
+# The results contain the first sentence of the description, shortened to SUMMARY_LENGTH characters
+SUMMARY_LENGTH = 160
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+(?:_[a-z0-9]+)*')
+# Splits names like "BatchNorm2d" into "Batch", "Norm" and "2d"
+CAMEL_CASE_PATTERN = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+[a-z]*')
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def tokenize(text):
+    """Returns the lower-cased words of a text, words joined by underscores also as their parts."""
+    tokens = []
+    for word in WORD_PATTERN.findall(text.lower()):
+        tokens.append(word)
+        if '_' in word:
+            tokens.extend(part for part in word.split('_') if part)
+    return tokens
+
+
+def tokenize_name(name):
+    """Returns the words of a layer name, including the parts of a camel-cased name."""
+    return tokenize(name) + [part.lower() for part in CAMEL_CASE_PATTERN.findall(name)]
+
+
+def description_text(description):
+    """Returns the text of a description that is rendered as html."""
+    return ' '.join(html.unescape(TAG_PATTERN.sub(' ', description or '')).split())
+
+
+class SearchIndex(object):
+    """An inverted index of the layer types of a catalog version.
+
+    Every word of the name, the id, the parameter names and the description of a layer type points to the layer
+    types that contain it, together with the weight of the best field it occurs in. The sorted list of all words
+    finds the words that start with a searched prefix.
+    """
+
+    def __init__(self, version, entries):
+        """Indexes layer types.
+
+        Args:
+            version: The catalog version the layer types belong to
+            entries: The layer types as dicts in the format of the catalog artifact, see
+                ``neurodex.data_importer.catalog``
+        """
+        self.version = version
+        self.results = []
+        self.postings = {}
+        for document, entry in enumerate(sorted(entries, key=lambda entry: entry['layer_name'].lower())):
+            text = description_text(entry['description'])
+            parameter_names = [parameter['name'] for parameter in entry['parameters']]
+            self.results.append({
+                'layerTypeId': entry['layer_type_id'],
+                'layerName': entry['layer_name'],
+                'summary': _summary(text),
+                'parameters': parameter_names,
+            })
+
+            self._add(document, tokenize_name(entry['layer_name']), NAME_WEIGHT)
+            self._add(document, tokenize(entry['layer_type_id']), ID_WEIGHT)
+            self._add(document, tokenize(' '.join(parameter_names)), PARAMETER_WEIGHT)
+            self._add(document, tokenize(text), DESCRIPTION_WEIGHT)
+        self.tokens = sorted(self.postings)
+
+    def search(self, query, limit=DEFAULT_RESULTS):
+        """Returns the layer types that match every word of a query, best matches first.
+
+        Words match exactly or as prefix, so incomplete words can be searched while they are typed. An empty query
+        returns the first layer types by name.
+
+        Returns:
+            A list of at most ``limit`` results with the id, name, summary and parameter names of a layer type
+        """
+        terms = tokenize(query)
+        if not terms:
+            return self.results[:limit]
+
+        scores = None
+        for term in terms:
+            term_scores = self._match(term)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {document: scores[document] + score for document, score in term_scores.items()
+                          if document in scores}
+            if not scores:
+                return []
+
+        # Documents are numbered by name, so equal scores are ordered by name
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [dict(self.results[document], score=score) for document, score in best]
+
+    def _add(self, document, tokens, weight):
+        for token in tokens:
+            documents = self.postings.setdefault(token, {})
+            if documents.get(document, 0) < weight:
+                documents[document] = weight
+
+    def _match(self, term):
+        scores = {document: weight * EXACT_MATCH_FACTOR for document, weight in self.postings.get(term, {}).items()}
+        for index in range(bisect_left(self.tokens, term), len(self.tokens)):
+            token = self.tokens[index]
+            if not token.startswith(term):
+                break
+            if token != term:
+                for document, weight in self.postings[token].items():
+                    if scores.get(document, 0) < weight:
+                        scores[document] = weight
+        return scores
+
+
+_index = None
+_index_lock = Lock()
+
+
+def search_index():
+    """Returns the search index of the current catalog, rebuilt in this worker once the catalog version changed."""
+    global _index
+    version = get_catalog_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = SearchIndex(version, _load_entries())
+        return _index
+
+
+def _load_entries():
+    layer_type = LayerType.__table__
+    parameter = LayerTypeParameter.__table__
+    entries = {}
+    for row in db.session.execute(select([layer_type.c.layer_type_id, layer_type.c.layer_name,
+                                          layer_type.c.description]).where(layer_type.c.removed_at.is_(None))):
+        entries[row.layer_type_id] = {'layer_type_id': row.layer_type_id, 'layer_name': row.layer_name,
+                                      'description': row.description, 'parameters': []}
+    for row in db.session.execute(select([parameter.c.fk_layer_type_id, parameter.c.name])):
+        if row.fk_layer_type_id in entries:
+            entries[row.fk_layer_type_id]['parameters'].append({'name': row.name})
+    return list(entries.values())
+
+
+def _summary(text):
+    sentence = text.split('. ', 1)[0].rstrip('.') + '.' if text else text
+    if len(sentence) <= SUMMARY_LENGTH:
+        return sentence
+    return sentence[:SUMMARY_LENGTH].rsplit(' ', 1)[0] + ' …'
@@ -0,0 +1,105 @@
+import gzip
+import hashlib
+from collections import namedtuple
+
+import brotli
+from flask import Response, request
+
+from neurodex import db
+from neurodex.data.models import CatalogVersion
+
+CATALOG_VERSION_ID = 1
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+# Sent with catalogs and models, so clients can request the catalogs by version
+CATALOG_VERSION_HEADER = 'X-Catalog-Version'
+
+CachedCatalog = namedtuple('CachedCatalog', ['version', 'etag', 'encodings'])
+
+# Serialized catalogs of this worker, keyed by the name of the catalog
+_catalogs = {}
+
+
+def get_catalog_version():
+    """Returns the current version of the catalog."""
+    version = db.session.query(CatalogVersion.version).filter(
+        CatalogVersion.catalog_version_id == CATALOG_VERSION_ID).scalar()
+    return version or 0
+
+
+def bump_catalog_version():
+    """Increments the catalog version.
+
+    The change is part of the current transaction, so it becomes visible together with the catalog changes
+    when the caller commits. The row of the version is created by the migration ``add_catalog_version``, so
+    concurrent first changes of the catalog can't both insert it.
+    """
+    db.session.query(CatalogVersion).filter(CatalogVersion.catalog_version_id == CATALOG_VERSION_ID).update(
+        {CatalogVersion.version: CatalogVersion.version + 1}, synchronize_session=False)
+
+
+def catalog_response(name, serialize):
+    """Creates a cacheable response for a catalog.
+
+    The serialized catalog is cached per worker together with its gzip and brotli compressed forms, and is only
+    serialized again once the catalog version changes. Requests that send a matching If-None-Match header get a
+    304 response. Requests for the current version (``?v=<version>``) may be cached by the client indefinitely,
+    clients learn the version from the X-Catalog-Version header of the models.
+
+    Args:
+        name: The name of the catalog, used as the cache key
+        serialize: A function that returns the serialized catalog as bytes
+
+    Returns:
+        The response containing the catalog in the best encoding the client accepts
+    """
+    version = get_catalog_version()
+    catalog = _catalogs.get(name)
+    if catalog is None or catalog.version != version:
+        catalog = _build_catalog(name, version, serialize())
+        _catalogs[name] = catalog
+
+    if request.args.get('v') == str(version):
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        cache_control = REVALIDATE_CACHE_CONTROL
+
+    encoding = _choose_encoding()
+    etag = _encoded_etag(catalog.etag, encoding)
+
+    if any(request.if_none_match.contains(_encoded_etag(catalog.etag, e)) for e in catalog.encodings):
+        response = Response(status=304)
+    else:
+        response = Response(catalog.encodings[encoding], mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers[CATALOG_VERSION_HEADER] = str(version)
+    return response
+
+
+def _build_catalog(name, version, body):
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    encodings = {
+        'identity': body,
+        'gzip': gzip.compress(body),
+        'br': brotli.compress(body),
+    }
+    return CachedCatalog(version=version, etag=f'{name}-{version}-{digest}', encodings=encodings)
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if accepted[encoding]:
+            return encoding
+    return 'identity'
+
+
+def _encoded_etag(etag, encoding):
+    if encoding == 'identity':
+        return etag
+    return f'{etag}-{encoding}'
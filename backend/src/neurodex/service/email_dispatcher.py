@@ -0,0 +1,142 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from neurodex import db
+from neurodex.data.models import OutboxEmail
+from neurodex.service.email_service import UndeliverableEmail
+
+PENDING = 'pending'
+# Claimed by a dispatcher, next_attempt_at is the end of its lease
+SENDING = 'sending'
+SENT = 'sent'
+FAILED = 'failed'
+
+
+def retry_delay(attempts, base_delay, max_delay):
+    """Returns the seconds to wait before the next attempt to send an email.
+
+    The delay doubles with every failed attempt up to ``max_delay``. It is reduced by up to half at random, so
+    emails that failed together aren't retried together.
+    """
+    delay = min(base_delay * 2 ** (attempts - 1), max_delay)
+    return delay * random.uniform(0.5, 1)
+
+
+def dispatch_emails(transport, batch_size=50):
+    """Sends the due emails of the outbox, at most ``batch_size`` of them.
+
+    The emails are claimed in a short transaction first: they are marked as sending and leased to this dispatcher
+    for EMAIL_LEASE seconds, several dispatchers skip the emails of each other. They are sent after the claim was
+    committed and the result of each email is committed on its own, so no row lock or connection is held while an
+    email is sent. An email that fails is retried with a growing delay until EMAIL_MAX_ATTEMPTS attempts failed,
+    then it is marked as failed. Emails are sent at least once: if the dispatcher dies, its emails are claimed
+    again once their lease ended.
+
+    Args:
+        transport: The transport the emails are sent with, see ``email_transport``
+        batch_size: The maximum number of emails that are sent
+
+    Returns:
+        The number of emails that were attempted
+    """
+    config = current_app.config
+    emails = _claim_emails(batch_size, config['EMAIL_LEASE'])
+
+    for email in emails:
+        if email.attempts > config['EMAIL_MAX_ATTEMPTS']:
+            # The lease of the last attempt ended without a result, e.g. because sending it stopped the dispatcher
+            _fail(email, email.last_error or 'The dispatcher stopped while sending the email')
+            continue
+        try:
+            transport.send(email)
+        except UndeliverableEmail as error:
+            _fail(email, error)
+        except Exception as error:
+            if email.attempts >= config['EMAIL_MAX_ATTEMPTS']:
+                _fail(email, error)
+            else:
+                delay = retry_delay(email.attempts, config['EMAIL_RETRY_DELAY'], config['EMAIL_MAX_RETRY_DELAY'])
+                _record(email, status=PENDING, next_attempt_at=datetime.utcnow() + timedelta(seconds=delay),
+                        last_error=str(error))
+                current_app.logger.warning(f'Sending email {email.email_id} failed, retrying in {delay:.0f} s: {error}')
+        else:
+            _record(email, status=SENT, sent_at=datetime.utcnow(), last_error=None)
+
+    return len(emails)
+
+
+def _claim_emails(batch_size, lease):
+    now = datetime.utcnow()
+    emails = db.session.query(OutboxEmail).filter(
+        OutboxEmail.status.in_([PENDING, SENDING]), OutboxEmail.next_attempt_at <= now
+    ).order_by(OutboxEmail.next_attempt_at).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    for email in emails:
+        email.status = SENDING
+        email.attempts += 1
+        email.next_attempt_at = now + timedelta(seconds=lease)
+    db.session.flush()
+    # Detached emails keep their values after the commit, sending them doesn't need the database
+    for email in emails:
+        db.session.expunge(email)
+    db.session.commit()
+    return emails
+
+
+def _record(email, **values):
+    """Commits the result of sending a claimed email."""
+    db.session.query(OutboxEmail).filter(OutboxEmail.email_id == email.email_id, OutboxEmail.status == SENDING).update(
+        values, synchronize_session=False)
+    db.session.commit()
+
+
+def run_dispatcher(transport, batch_size=50, interval=5, should_stop=lambda: False):
+    """Sends the emails of the outbox until ``should_stop`` returns True.
+
+    Full batches are followed by the next batch right away, otherwise the dispatcher waits ``interval`` seconds.
+    Errors of the database are logged and retried after the interval.
+    """
+    while not should_stop():
+        try:
+            attempted = dispatch_emails(transport, batch_size)
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception('Dispatching emails failed')
+            attempted = 0
+        finally:
+            db.session.remove()
+
+        if attempted < batch_size:
+            _sleep(interval, should_stop)
+
+
+def retry_failed_emails():
+    """Queues all failed emails again, returns their number."""
+    retried = db.session.query(OutboxEmail).filter(OutboxEmail.status == FAILED).update(
+        {OutboxEmail.status: PENDING, OutboxEmail.attempts: 0, OutboxEmail.next_attempt_at: datetime.utcnow()},
+        synchronize_session=False)
+    db.session.commit()
+    return retried
+
+
+def purge_sent_emails(days):
+    """Deletes the emails that were sent more than ``days`` days ago, returns their number."""
+    purged = db.session.query(OutboxEmail).filter(
+        OutboxEmail.status == SENT, OutboxEmail.sent_at < datetime.utcnow() - timedelta(days=days)
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return purged
+
+
+def _fail(email, error):
+    _record(email, status=FAILED, last_error=str(error))
+    current_app.logger.error(f'Email {email.email_id} to {email.recipient} could not be sent: {error}')
+
+
+def _sleep(seconds, should_stop):
+    deadline = time.monotonic() + seconds
+    while not should_stop() and time.monotonic() < deadline:
+        time.sleep(min(0.5, seconds))
@@ -1,25 +1,158 @@
-from neurodex import sg, app
+import json
+import os
+import smtplib
+from email.message import EmailMessage
+from threading import local
 
+from python_http_client.exceptions import HTTPError
+from sendgrid import SendGridAPIClient
 
-def send_confirmation_email(confirmation_id, email, name):
+from neurodex import app, db
+from neurodex.data.models import OutboxEmail
+
+SENDER_EMAIL = 'no-reply@neurodex.app'
+SENDER_NAME = 'Neurodex'
+
+CONFIRMATION_TEMPLATE = 'confirmation'
+# Ids of the dynamic templates of SendGrid
+SENDGRID_TEMPLATE_IDS = {
+    CONFIRMATION_TEMPLATE: 'd-335db9b46c12429eae2b7a662752ea07',
+}
+# Subject and text of the templates for transports without SendGrid's templates
+TEXT_TEMPLATES = {
+    CONFIRMATION_TEMPLATE: (
+        'Bestätige deine E-Mail Adresse',
+        'Hallo {name},\n\nbitte bestätige deine E-Mail Adresse: {confirmationLink}\n\nDein Neurodex Team\n',
+    ),
+}
+
+_clients = local()
+
+
+class UndeliverableEmail(Exception):
+    """Raised by a transport if an email can't be delivered, no matter how often it is retried."""
+
+
+def sendgrid_client():
+    """Returns the SendGrid client of the current thread.
+
+    All requests built from a client share its headers, which are updated in place, so threads (greenlets under
+    gevent) don't share a client.
+    """
+    client = getattr(_clients, 'client', None)
+    if client is None:
+        client = _clients.client = SendGridAPIClient(app.config['SENDGRID_API_KEY'])
+    return client
+
+
+def queue_email(template, recipient, recipient_name, data):
+    """Adds an email to the outbox, it is sent by the email dispatcher once the current transaction is committed.
+
+    Args:
+        template: The name of the template, e.g. ``CONFIRMATION_TEMPLATE``
+        recipient: The email address of the recipient
+        recipient_name: The name of the recipient
+        data: The values the template is filled with
+
+    Returns:
+        The queued ``OutboxEmail``
+    """
+    email = OutboxEmail(template=template, recipient=recipient, recipient_name=recipient_name, data=data)
+    db.session.add(email)
+    return email
+
+
+def queue_confirmation_email(confirmation_id, email, name):
     base_url = app.config['BASE_URL']
-    data = {
-        "template_id": "d-335db9b46c12429eae2b7a662752ea07",
-        "from": {
-            "email": "no-reply@neurodex.app",
-            "name": "Neurodex"
-        },
-        "personalizations": [{
-            "to": [
-                {
-                    "email": email,
-                    "name": name
-                }
-            ],
-            "dynamic_template_data": {
-                "confirmationLink": f"{base_url}/confirm-email/{confirmation_id}",
-                "name": name
-            }
-        }]
-    }
-    return sg.client.mail.send.post(request_body=data)
+    return queue_email(CONFIRMATION_TEMPLATE, email, name, {
+        "confirmationLink": f"{base_url}/confirm-email/{confirmation_id}",
+        "name": name
+    })
+
+
+def render_text(email):
+    """Returns the subject and the text of an email."""
+    subject, text = TEXT_TEMPLATES[email.template]
+    return subject, text.format(**email.data)
+
+
+class SendGridTransport(object):
+    """Sends emails with the dynamic templates of SendGrid."""
+
+    name = 'sendgrid'
+
+    def send(self, email):
+        data = {
+            "template_id": SENDGRID_TEMPLATE_IDS[email.template],
+            "from": {
+                "email": SENDER_EMAIL,
+                "name": SENDER_NAME
+            },
+            "personalizations": [{
+                "to": [
+                    {
+                        "email": email.recipient,
+                        "name": email.recipient_name
+                    }
+                ],
+                "dynamic_template_data": email.data
+            }]
+        }
+        try:
+            sendgrid_client().client.mail.send.post(request_body=data)
+        except HTTPError as error:
+            # Rate limits and errors of SendGrid are retried, rejected emails are not
+            if 400 <= error.status_code < 500 and error.status_code != 429:
+                raise UndeliverableEmail(f'{error.status_code}: {error.body}') from error
+            raise
+
+
+class SmtpTransport(object):
+    """Sends emails as plain text to an SMTP server, e.g. a local stub like MailHog."""
+
+    name = 'smtp'
+
+    def send(self, email):
+        subject, text = render_text(email)
+        message = EmailMessage()
+        message['Subject'] = subject
+        message['From'] = f'{SENDER_NAME} <{SENDER_EMAIL}>'
+        message['To'] = f'{email.recipient_name} <{email.recipient}>'
+        message.set_content(text)
+
+        with smtplib.SMTP(app.config['SMTP_HOST'], app.config['SMTP_PORT'], timeout=30) as smtp:
+            smtp.send_message(message)
+
+
+class FileTransport(object):
+    """Writes every email as a json file to EMAIL_FILE_DIRECTORY instead of sending it, for development and tests."""
+
+    name = 'file'
+
+    def send(self, email):
+        directory = app.config['EMAIL_FILE_DIRECTORY']
+        os.makedirs(directory, exist_ok=True)
+        subject, text = render_text(email)
+        content = {
+            'emailId': email.email_id,
+            'template': email.template,
+            'recipient': email.recipient,
+            'recipientName': email.recipient_name,
+            'subject': subject,
+            'text': text,
+            'data': email.data,
+        }
+
+        path = os.path.join(directory, f'{email.email_id}-{email.template}.json')
+        # Written under a temporary name, so readers never see a partial file
+        with open(path + '.tmp', 'w', encoding='utf8') as file:
+            json.dump(content, file, ensure_ascii=False, indent=2)
+        os.replace(path + '.tmp', path)
+
+
+TRANSPORTS = {transport.name: transport for transport in (SendGridTransport(), SmtpTransport(), FileTransport())}
+
+
+def email_transport():
+    """Returns the transport that is configured with EMAIL_TRANSPORT."""
+    return TRANSPORTS[app.config['EMAIL_TRANSPORT']]
@@ -0,0 +1,193 @@
+from sqlalchemy import inspect
+
+from neurodex import db
+from neurodex.data import statistics
+from neurodex.data.models import (ActivatorTarget, Function, LayerType,
+                                  Model, ModelActivator, ModelLayer)
+from neurodex.data.ordering import ACTIVATORS, LAYERS, append, move
+from neurodex.data.parameter_storage import PRIMITIVE_KEY, parameter_storage
+
+# Prefix of ids that reference the layer or activator created by an earlier action of a batch, e.g. "$0"
+BATCH_REFERENCE_PREFIX = '$'
+
+
+class OperationError(Exception):
+    """Raised when an operation can't be applied to a model.
+
+    Args:
+        message: The message that is shown to the user
+        status: The http status of the response
+        index: The index of the failed action, if it was part of a batch
+    """
+
+    def __init__(self, message, status=422, index=None):
+        super(OperationError, self).__init__(message)
+        self.message = message
+        self.status = status
+        self.index = index
+
+
+def rename_model(model, name):
+    name_exists = db.session.query(Model).filter(
+        Model.name == name, Model.fk_user_id == model.fk_user_id).first() is not None
+
+    if name_exists:
+        raise OperationError('Du verwendest diesen Namen bereits')
+
+    model.name = name
+
+
+def add_layer(model, layer_type_id):
+    layer = _found(db.session.query(LayerType).filter(
+        LayerType.layer_type_id == layer_type_id, LayerType.removed_at.is_(None)).first(),
+        f'Layer type {layer_type_id} not found')
+    model_layer = ModelLayer(fk_layer_id=layer.layer_type_id, name=layer.layer_name)
+
+    append(model, LAYERS, model_layer)
+    statistics.count(statistics.LAYERS)
+    statistics.count(statistics.layer_type_counter(layer.layer_type_id))
+    return model_layer
+
+
+def delete_layer(model, model_layer_id):
+    model_layer = _found(_model_layer_query(model, model_layer_id).with_entities(
+        ModelLayer.model_layer_id, ModelLayer.fk_layer_id).first(), f'Layer {model_layer_id} not found')
+    statistics.count_removed_layer(model_layer.model_layer_id, model_layer.fk_layer_id)
+
+    db.session.query(ActivatorTarget).filter(ActivatorTarget.activator_target_id == model_layer_id).delete()
+    db.session.expire(model, ['layers', 'activators'])
+
+
+def set_layer_parameter(model, model_layer_id, parameter_name, new_value):
+    model_layer = _found(_model_layer_query(model, model_layer_id).first(), f'Layer {model_layer_id} not found')
+    parameter_storage().write(model_layer, parameter_name, {PRIMITIVE_KEY: new_value})
+
+
+def move_layer(model, model_layer_id, index):
+    model_layer = _found(_model_layer_query(model, model_layer_id).first(), f'Layer {model_layer_id} not found')
+    move(model, LAYERS, model_layer, _position(index))
+
+
+def add_activator(model, activator_target_id):
+    """Adds an activator of a function or of a layer of the same model to a model."""
+    try:
+        target = db.session.query(ActivatorTarget).filter(
+            ActivatorTarget.activator_target_id == int(activator_target_id)).first()
+    except (TypeError, ValueError):
+        target = None
+    if not isinstance(target, Function) and not (isinstance(target, ModelLayer)
+                                                 and target.fk_model_id == model.model_id):
+        raise OperationError(f'Activator target {activator_target_id} not found', status=404)
+    activator = ModelActivator(fk_activator_target_id=activator_target_id)
+
+    append(model, ACTIVATORS, activator)
+    statistics.count(statistics.ACTIVATORS)
+    return activator
+
+
+def set_activator_parameter(model, model_activator_id, parameter_name, new_value):
+    model_activator = _found(_model_activator_query(model, model_activator_id).first(),
+                             f'Activator {model_activator_id} not found')
+    parameter_storage().write(model_activator, parameter_name, {PRIMITIVE_KEY: new_value})
+
+
+def move_activator(model, model_activator_id, index):
+    model_activator = _found(_model_activator_query(model, model_activator_id).first(),
+                             f'Activator {model_activator_id} not found')
+    move(model, ACTIVATORS, model_activator, _position(index))
+
+
+def delete_activator(model, model_activator_id):
+    deleted = _model_activator_query(model, model_activator_id).delete()
+    if not deleted:
+        raise OperationError(f'Activator {model_activator_id} not found', status=404)
+    statistics.count(statistics.ACTIVATORS, -deleted)
+    db.session.expire(model, ['activators'])
+
+
+# The actions of the editor (see frontend/src/util/api.ts) and how they are applied
+ACTIONS = {
+    'UPDATE_MODEL_NAME': lambda model, action, ref: rename_model(model, action['newName']),
+    'ADD_LAYER': lambda model, action, ref: add_layer(model, action['layerTypeId']),
+    'DELETE_LAYER': lambda model, action, ref: delete_layer(model, ref(action['modelLayerId'])),
+    'UPDATE_MODEL_LAYER_PARAMETER_DATA': lambda model, action, ref: set_layer_parameter(
+        model, ref(action['modelLayerId']), action['parameterName'], action['newValue']),
+    'UPDATE_MODEL_LAYER_ORDER': lambda model, action, ref: move_layer(model, ref(action['modelLayerId']),
+                                                                      action['index']),
+    'ADD_MODEL_ACTIVATOR': lambda model, action, ref: add_activator(model, ref(action['activatorId'])),
+    'UPDATE_MODEL_ACTIVATOR_PARAMETER_DATA': lambda model, action, ref: set_activator_parameter(
+        model, ref(action['modelActivatorId']), action['parameterName'], action['newValue']),
+    'UPDATE_MODEL_ACTIVATOR_ORDER': lambda model, action, ref: move_activator(model, ref(action['activatorId']),
+                                                                              action['newIndex']),
+    'DELETE_MODEL_ACTIVATOR': lambda model, action, ref: delete_activator(model, ref(action['modelActivatorId'])),
+}
+
+
+def apply_actions(model, actions):
+    """Applies a list of editor actions to a model, in order.
+
+    The actions are applied in the current transaction, the caller commits them. Ids of layers and activators can
+    reference the layer or activator that was added by an earlier action of the list, e.g. ``"$0"`` for the one
+    added by the first action.
+
+    Args:
+        model: The model that is changed
+        actions: The list of actions, each a dict with a ``type`` and the fields of that type
+
+    Raises:
+        OperationError: If an action is unknown, incomplete or can't be applied. Its ``index`` is the index of
+            the action.
+    """
+    if not isinstance(actions, list):
+        raise OperationError('The actions must be a list')
+    created = {}
+
+    def ref(value):
+        if not isinstance(value, str) or not value.startswith(BATCH_REFERENCE_PREFIX):
+            return value
+        element = created.get(value[len(BATCH_REFERENCE_PREFIX):])
+        if element is None:
+            raise OperationError(f'{value} does not reference an earlier action that added an element')
+        db.session.flush()
+        return inspect(element).identity[0]
+
+    for index, action in enumerate(actions):
+        try:
+            if not isinstance(action, dict):
+                raise OperationError('An action must be an object')
+            operation = ACTIONS.get(action.get('type'))
+            if operation is None:
+                raise OperationError(f'Unknown action {action.get("type")}')
+            try:
+                element = operation(model, action, ref)
+            except KeyError as error:
+                raise OperationError(f'Missing field {error.args[0]}')
+        except OperationError as error:
+            error.index = index
+            raise
+
+        if element is not None:
+            created[str(index)] = element
+
+
+def _found(row, message):
+    if row is None:
+        raise OperationError(message, status=404)
+    return row
+
+
+def _position(index):
+    try:
+        return int(index)
+    except (TypeError, ValueError):
+        raise OperationError(f'{index!r} is not a valid position')
+
+
+def _model_layer_query(model, model_layer_id):
+    return db.session.query(ModelLayer).filter(
+        ModelLayer.model_layer_id == model_layer_id, ModelLayer.fk_model_id == model.model_id)
+
+
+def _model_activator_query(model, model_activator_id):
+    return db.session.query(ModelActivator).filter(
+        ModelActivator.model_activator_id == model_activator_id, ModelActivator.fk_model_id == model.model_id)
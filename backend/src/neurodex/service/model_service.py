@@ -0,0 +1,201 @@
+from collections import OrderedDict
+from threading import Lock
+
+from flask import abort, current_app, g, request
+from sqlalchemy import inspect
+
+from neurodex import app, db
+from neurodex.data.loading import load_model
+from neurodex.data.compiled_schema import dump_model
+from neurodex.data.models import Model
+from neurodex.data.schema import normalized_model_schema
+from neurodex.json_provider import jsonify
+from neurodex.service.catalog_service import get_catalog_version
+from neurodex.util.json_patch import make_patch
+
+JSON_PATCH_MIMETYPE = 'application/json-patch+json'
+REVISION_HEADER = 'X-Model-Revision'
+MODEL_CACHE_CONTROL = 'private, no-cache'
+CONFLICT_MESSAGE = 'Das Modell wurde in der Zwischenzeit geändert'
+
+
+class DocumentCache(object):
+    """A bounded cache of the last serialized document of each model that drops the least recently used entry when
+    it is full.
+
+    Entries are stored together with the entity tag of the served model. A document is only returned for the same
+    tag, so entries of older revisions are never used, also not in other workers that missed the change.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, etag):
+        """Returns the cached document of a model or None if the cached document has another tag."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, etag, document):
+        """Caches a document, the caller must not change it afterwards."""
+        with self._lock:
+            self._entries[key] = (etag, document)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+document_cache = DocumentCache(app.config['MODEL_DOCUMENT_CACHE_SIZE'])
+
+
+def model_etag(model):
+    """Returns the entity tag of a model in the requested format.
+
+    The serialized model contains the layer types of the catalog, so the tag consists of the revision and the catalog
+    version, e.g. ``12.3``. The tag is sent as a weak tag because the same revision is sent with different content
+    encodings.
+    """
+    etag = f'{model.revision}.{request_catalog_version()}'
+    if request.args.get('format') == 'normalized':
+        return f'{etag}-normalized'
+    return etag
+
+
+def request_catalog_version():
+    """Returns the catalog version, it is only queried once per request."""
+    if 'catalog_version' not in g:
+        g.catalog_version = get_catalog_version()
+    return g.catalog_version
+
+
+def model_response(model):
+    """Serializes a model in the format requested by the client.
+
+    Clients can opt into the normalized format by adding ``format=normalized`` to the query string. The revision
+    of the model is sent in the X-Model-Revision header and as entity tag. Requests whose If-None-Match header
+    contains the current tag get a 304 response without the model being serialized.
+
+    Args:
+        model: The model, its layers and activators are loaded if they aren't loaded yet
+
+    Returns:
+        A json response containing the model
+    """
+    etag = model_etag(model)
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        document = document_cache.get(_cache_key(model), etag)
+        if document is None:
+            if 'layers' in inspect(model).unloaded:
+                model = load_model(model.model_id)
+            document = _dump(model, etag)
+        response = jsonify(document)
+
+    _set_revision_headers(response, model.revision, etag)
+    return response
+
+
+def check_preconditions(model):
+    """Rejects the change of a model if the client expects a different revision.
+
+    Clients that send the entity tag of their copy of the model in the If-Match header get a 412 response if the
+    model was changed in the meantime.
+
+    Args:
+        model: The model that is about to be changed
+    """
+    if request.if_match and not request.if_match.star_tag:
+        if _parse_revision(request.if_match) != model.revision:
+            abort(412, CONFLICT_MESSAGE)
+
+
+def capture_base_document(model):
+    """Remembers the state of a model before it is changed.
+
+    This only happens if the client accepts a JSON Patch response, the revision it sent in the X-Model-Revision
+    header is the current revision of the model and this worker still has the document of that revision cached.
+    Otherwise the full model is returned, nothing is loaded for the patch.
+
+    Args:
+        model: The model that is about to be changed
+    """
+    revision = request.headers.get(REVISION_HEADER)
+    if revision != str(model.revision) or JSON_PATCH_MIMETYPE not in request.accept_mimetypes.values():
+        return
+
+    g.base_document = document_cache.get(_cache_key(model), model_etag(model))
+
+
+def commit_model(model):
+    """Increments the revision of a model, commits the changes and creates the response for the changed model.
+
+    Clients that name the revision of their copy in the If-Match or X-Model-Revision header only change the model if
+    the revision is still the one the model was loaded with. Otherwise another request changed the model concurrently
+    and nothing is saved. Changes of other clients are saved in any case, the last change wins.
+
+    The changed model is reloaded and serialized once. If a base document was captured by ``capture_base_document``
+    only a JSON Patch against it is returned, otherwise the full model.
+
+    Args:
+        model: The changed model
+
+    Returns:
+        A response containing either the patch or the full model
+    """
+    query = db.session.query(Model).filter(Model.model_id == model.model_id)
+    if request.if_match or REVISION_HEADER in request.headers:
+        query = query.filter(Model.revision == model.revision)
+    updated = query.update({Model.revision: Model.revision + 1}, synchronize_session=False)
+    if not updated:
+        db.session.rollback()
+        abort(412 if request.if_match else 409, CONFLICT_MESSAGE)
+
+    base_document = g.pop('base_document', None)
+    db.session.commit()
+    if base_document is None:
+        return model_response(load_model(model.model_id))
+
+    model = load_model(model.model_id)
+    etag = model_etag(model)
+    response = jsonify(make_patch(base_document, _dump(model, etag)))
+    response.mimetype = JSON_PATCH_MIMETYPE
+    _set_revision_headers(response, model.revision, etag)
+    return response
+
+
+def _set_revision_headers(response, revision, etag):
+    response.headers[REVISION_HEADER] = str(revision)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = MODEL_CACHE_CONTROL
+
+
+def _parse_revision(etags):
+    # Accepts the tags of both formats, e.g. W/"12.3" or "12.3-normalized", and tags without catalog version
+    for etag in etags.as_set(include_weak=True):
+        revision = etag.split('-')[0].split('.')[0]
+        if revision.isdigit():
+            return int(revision)
+    return None
+
+
+def _cache_key(model):
+    return model.model_id, request.args.get('format') == 'normalized'
+
+
+def _dump(model, etag):
+    if request.args.get('format') == 'normalized':
+        document = normalized_model_schema.dump(model)
+    else:
+        document = dump_model(model)
+    document_cache.put(_cache_key(model), etag, document)
+    return document
@@ -0,0 +1,150 @@
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from threading import BoundedSemaphore, Lock
+
+import bcrypt
+from werkzeug.exceptions import ServiceUnavailable
+
+from neurodex import app
+
+# The cost that is measured to calibrate the cost of the target latency
+CALIBRATION_ROUNDS = 8
+CALIBRATION_SAMPLES = 3
+
+
+class PasswordHashingBusy(ServiceUnavailable):
+    """Raised if more passwords are waiting to be hashed than PASSWORD_HASH_QUEUE_SIZE allows."""
+
+    description = 'Zu viele Anmeldungen gleichzeitig. Bitte versuche es gleich noch einmal.'
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf8'), bcrypt.gensalt(rounds)).decode('utf8')
+
+
+def _check(password_hash, password):
+    return bcrypt.checkpw(password.encode('utf8'), password_hash.encode('utf8'))
+
+
+def hash_rounds(password_hash):
+    """Returns the cost a bcrypt hash was created with."""
+    return int(password_hash.split('$')[2])
+
+
+def calibrate_rounds(target_ms, min_rounds, max_rounds):
+    """Returns the cost at which hashing a password takes about ``target_ms`` milliseconds on this machine.
+
+    Every round doubles the time, so the time of a cheap hash is measured and extrapolated.
+    """
+    seconds = min(_measure(CALIBRATION_ROUNDS) for _ in range(CALIBRATION_SAMPLES))
+    rounds = CALIBRATION_ROUNDS + round(math.log2(target_ms / 1000 / max(seconds, 1e-6)))
+    return max(min_rounds, min(rounds, max_rounds))
+
+
+def _measure(rounds):
+    start = time.perf_counter()
+    _hash('calibration', rounds)
+    return time.perf_counter() - start
+
+
+class PasswordHasher(object):
+    """Hashes and checks passwords with bcrypt in a pool of processes of each worker.
+
+    Requests wait for the pool instead of keeping the CPU of their worker busy, and at most PASSWORD_HASH_QUEUE_SIZE
+    of them wait at once. Further requests fail right away with ``PasswordHashingBusy``, so a burst of logins can't
+    occupy all workers. With no processes the passwords are hashed in the calling thread.
+
+    The pool is created on first use in every process, after gunicorn forked its workers.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._rounds = None
+        self._pool = None
+        self._pool_pid = None
+        self._slots = BoundedSemaphore(config['PASSWORD_HASH_QUEUE_SIZE'])
+        self._lock = Lock()
+
+    @property
+    def rounds(self):
+        """The cost of new hashes, BCRYPT_LOG_ROUNDS or calibrated to PASSWORD_HASH_TARGET_MS."""
+        if self._rounds is None:
+            rounds = self.config['BCRYPT_LOG_ROUNDS']
+            if rounds is None:
+                rounds = calibrate_rounds(self.config['PASSWORD_HASH_TARGET_MS'],
+                                          self.config['BCRYPT_MIN_LOG_ROUNDS'], self.config['BCRYPT_MAX_LOG_ROUNDS'])
+                app.logger.info(f'Calibrated bcrypt to {rounds} rounds')
+            self._rounds = rounds
+        return self._rounds
+
+    def hash(self, password):
+        """Returns the bcrypt hash of a password."""
+        return self._run(_hash, password, self.rounds)
+
+    def check(self, password_hash, password):
+        """Returns whether a password matches its hash."""
+        return self._run(_check, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Returns whether a hash should be replaced by a hash with the current cost.
+
+        A calibrated cost may differ by one round between workers, hashes one round above the cost are kept, so the
+        workers don't re-hash each other's hashes on every login.
+        """
+        rounds = hash_rounds(password_hash)
+        return rounds < self.rounds or rounds > self.rounds + 1
+
+    def _run(self, function, *args):
+        if not self.config['PASSWORD_HASH_WORKERS']:
+            return function(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+        try:
+            future = self._executor().submit(function, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # A request that stops waiting leaves its hash in the pool, the slot is only free once the pool is done with it
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.config['PASSWORD_HASH_TIMEOUT'])
+        except FutureTimeout:
+            # Drops the hash if it is still queued, a running hash finishes
+            future.cancel()
+            raise PasswordHashingBusy()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool_pid != os.getpid():
+                # A pool inherited from the parent process has no processes in this one. Forked, so the processes
+                # don't import the app again.
+                self._pool = ProcessPoolExecutor(self.config['PASSWORD_HASH_WORKERS'],
+                                                 mp_context=multiprocessing.get_context('fork'))
+                self._pool_pid = os.getpid()
+            return self._pool
+
+
+password_hasher = PasswordHasher(app.config)
+
+
+def hash_password(password):
+    """Returns the bcrypt hash of a password, see ``PasswordHasher``."""
+    return password_hasher.hash(password)
+
+
+def check_password(user, password):
+    """Returns whether a password is the password of a user.
+
+    If the hash of the user was created with a different cost, it is replaced by a hash with the current cost. The
+    caller commits the change.
+    """
+    if not password_hasher.check(user.password, password):
+        return False
+    if password_hasher.needs_rehash(user.password):
+        user.password = password_hasher.hash(password)
+    return True
@@ -0,0 +1,122 @@
+import time
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+from sqlalchemy.orm import selectinload
+
+from neurodex import app, db
+from neurodex.data.models import User
+from neurodex.data.pagination import (DEFAULT_PAGE_SIZE, iterate_keyset,
+                                      keyset_page)
+
+# What authenticated requests need to know about their user. Role ids are upper-cased.
+CachedUser = namedtuple('CachedUser', ['user_id', 'name', 'email', 'roles', 'revision'])
+
+
+class UserCache(object):
+    """A bounded cache of users that drops the least recently used entry when it is full.
+
+    Entries expire after ``ttl`` seconds. ``invalidate`` only reaches the cache of the current worker, so a hit is
+    checked against the revision of the user in the database, which every worker sees. Checking the revision is a
+    single lookup of the primary key, cheaper than loading the user and its roles.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, user_id, load, revision):
+        """Returns the cached user with the given id.
+
+        Args:
+            user_id: The id of the user
+            load: Function that loads the user on a miss, called with the id
+            revision: Function that returns the current revision of the user or None if it doesn't exist, called
+                with the id on a hit. Entries of another revision count as miss.
+
+        Returns:
+            The user or None if ``load`` didn't find it. Missing users are not cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > now and entry[1].revision == revision(user_id):
+            with self._lock:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+            return entry[1]
+
+        with self._lock:
+            self.misses += 1
+
+        user = load(user_id)
+        if user is not None:
+            with self._lock:
+                self._entries[user_id] = (now + self.ttl, user)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns the size of the cache and its hit and miss counters."""
+        with self._lock:
+            return {'size': len(self._entries), 'maxSize': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+
+user_cache = UserCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+
+
+def get_cached_user(user_id):
+    """Returns the identity and roles of a user, from the cache of this worker if possible."""
+    return user_cache.get(user_id, _load_user, _user_revision)
+
+
+def invalidate_user(user_id):
+    """Invalidates the cached copies of a user in all workers, has to be called whenever the data or the roles of a
+    user change.
+
+    Increments the revision of the user as part of the current transaction, the caller commits it together with the
+    change. The entry of the current worker is removed right away.
+    """
+    db.session.query(User).filter(User.user_id == user_id).update(
+        {User.revision: User.revision + 1}, synchronize_session=False)
+    user_cache.invalidate(user_id)
+
+
+def load_users(cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Loads a page of all users ordered by id, the roles of the users of the page are loaded in one query."""
+    return keyset_page(_users_query(), [User.user_id], cursor, limit)
+
+
+def iterate_users(batch_size=500):
+    """Iterates over all users ordered by id, loading them and their roles in batches."""
+    return iterate_keyset(_users_query(), [User.user_id], batch_size)
+
+
+def _users_query():
+    return db.session.query(User).options(selectinload(User.roles))
+
+
+def _load_user(user_id):
+    user = db.session.query(User).options(selectinload(User.roles)).filter(User.user_id == user_id).first()
+    if user is None:
+        return None
+    return CachedUser(user.user_id, user.name, user.email, frozenset(role.role_id.upper() for role in user.roles),
+                      user.revision)
+
+
+def _user_revision(user_id):
+    return db.session.query(User.revision).filter(User.user_id == user_id).scalar()
@@ -1,26 +1,12 @@
 import os
 import uuid
-from datetime import datetime
 
 import yaml
-from flask.json import JSONEncoder
 
-from neurodex import bcrypt, db
+from neurodex import db
+from neurodex.data import statistics
 from neurodex.data.models import Role, User
-
-
-class CustomJSONEncoder(JSONEncoder):
-
-    def default(self, obj):
-        try:
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            iterable = iter(obj)
-        except TypeError:
-            pass
-        else:
-            return list(iterable)
-        return JSONEncoder.default(self, obj)
+from neurodex.service.password_service import hash_password
 
 
 def init_db():
@@ -51,12 +37,14 @@ def init_roles(roles):
 
 def init_users(users):
     for user in users:
-        pw = bcrypt.generate_password_hash(user['password']).decode('utf8')
+        pw = hash_password(user['password'])
         user_model = User(user_id=str(uuid.uuid4()), email=user['email'], password=pw, name=user['name'])
         for role in user['roles']:
             role_model = db.session.query(Role).filter(Role.role_id == role).first()
             user_model.roles.append(role_model)
         db.session.add(user_model)
+        statistics.count(statistics.USERS)
+        statistics.count(statistics.CONFIRMED_USERS)
         db.session.commit()
 
 
@@ -3,26 +3,57 @@ from functools import wraps
 from flask import abort
 from flask_jwt_extended import current_user
 
+from neurodex.data.loading import load_model
+from neurodex.service.model_service import (capture_base_document,
+                                            check_preconditions)
 
-def own_model(fn):
-    @wraps(fn)
-    def wrapped_function(*args, **kwargs):
-        model = kwargs['model']
-        if model is None or model.fk_user_id != current_user.user_id:
-            abort(404)
 
-        return fn(*args, **kwargs)
+def own_model(loader=load_model):
+    """Resolves the model of a ``<model:model>`` route for its owner.
 
-    return wrapped_function
+    The model is loaded by the given loader, filtered by the current user in the query. Endpoints that only change
+    a model use ``load_model_row`` and don't load the layers and activators they don't touch.
+
+    Args:
+        loader: The function that loads the model, called with the model id and the id of the current user
+    """
+    def own_model(fn):
+        @wraps(fn)
+        def wrapped_function(*args, **kwargs):
+            model = loader(kwargs['model'], current_user.user_id)
+            if model is None:
+                abort(404)
+
+            kwargs['model'] = model
+            return fn(*args, **kwargs)
+        return wrapped_function
+    return own_model
 
 
 def needs_role(role):
     def needs_role(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            if role.upper() not in list(map(lambda role: role.role_id.upper(), current_user.roles)):
+            if role.upper() not in current_user.roles:
                 abort(403)
 
             return fn(*args, **kwargs)
         return decorator
     return needs_role
+
+
+def model_delta(fn):
+    """Prepares an endpoint that changes a model.
+
+    Changes based on an outdated revision (If-Match) are rejected. The state of the model is captured before the
+    endpoint changes it, so the endpoint can answer with a JSON Patch instead of the full model. The endpoint has
+    to return the result of ``commit_model``. Has to be applied below ``own_model``.
+    """
+    @wraps(fn)
+    def wrapped_function(*args, **kwargs):
+        check_preconditions(kwargs['model'])
+        capture_base_document(kwargs['model'])
+
+        return fn(*args, **kwargs)
+
+    return wrapped_function
@@ -0,0 +1,43 @@
+def make_patch(source, target, path=''):
+    """Creates a JSON Patch (RFC 6902) that transforms one json document into another.
+
+    Objects are compared key by key and lists element by element, so unchanged parts of the documents do not
+    show up in the patch.
+
+    Args:
+        source: The document the patch is applied to
+        target: The document that results from applying the patch
+        path: The JSON pointer of the documents, used for recursion
+
+    Returns:
+        A list of patch operations
+    """
+    if source == target:
+        return []
+
+    if isinstance(source, dict) and isinstance(target, dict):
+        operations = [{'op': 'remove', 'path': _join(path, key)} for key in source if key not in target]
+        for key, value in target.items():
+            if key in source:
+                operations.extend(make_patch(source[key], value, _join(path, key)))
+            else:
+                operations.append({'op': 'add', 'path': _join(path, key), 'value': value})
+        return operations
+
+    if isinstance(source, list) and isinstance(target, list):
+        common = min(len(source), len(target))
+        operations = []
+        for index in range(common):
+            operations.extend(make_patch(source[index], target[index], _join(path, index)))
+        for index in range(common, len(target)):
+            operations.append({'op': 'add', 'path': _join(path, index), 'value': target[index]})
+        for index in reversed(range(common, len(source))):
+            operations.append({'op': 'remove', 'path': _join(path, index)})
+        return operations
+
+    return [{'op': 'replace', 'path': path, 'value': target}]
+
+
+def _join(path, token):
+    token = str(token).replace('~', '~0').replace('/', '~1')
+    return f'{path}/{token}'
@@ -0,0 +1,47 @@
+from functools import wraps
+
+from flask import abort, request
+from werkzeug.urls import url_encode
+
+from neurodex.data.pagination import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE,
+                                      InvalidCursor)
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def paginated(default_size=DEFAULT_PAGE_SIZE, max_size=MAX_PAGE_SIZE):
+    """Passes the page requested by the ``cursor`` and ``limit`` query arguments to an endpoint.
+
+    The endpoint receives them as the keyword arguments ``cursor`` and ``limit``. Limits that aren't numbers from 1 to
+    ``max_size`` and cursors that can't be decoded are answered with a 400 response.
+    """
+    def paginated(fn):
+        @wraps(fn)
+        def wrapped_function(*args, **kwargs):
+            try:
+                limit = int(request.args.get('limit', default_size))
+            except ValueError:
+                limit = None
+            if limit is None or not 0 < limit <= max_size:
+                abort(400, f'limit has to be between 1 and {max_size}')
+
+            try:
+                return fn(*args, cursor=request.args.get('cursor'), limit=limit, **kwargs)
+            except InvalidCursor:
+                abort(400, 'Invalid cursor')
+        return wrapped_function
+    return paginated
+
+
+def link_next_page(response, page):
+    """Adds the cursor and the url of the next page to the headers of a page response.
+
+    The body of the response stays the list of items. Clients follow the ``next`` link or repeat the request
+    with the ``X-Next-Cursor`` header as ``cursor`` argument until the header is missing.
+    """
+    if page.next_cursor is not None:
+        arguments = request.args.copy()
+        arguments['cursor'] = page.next_cursor
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+        response.headers.add('Link', f'<{request.base_url}?{url_encode(arguments)}>; rel="next"')
+    return response
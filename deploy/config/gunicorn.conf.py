@@ -1,6 +1,24 @@
+import os
+
 bind = '0.0.0.0:8081'
-worker_class = 'sync'
+# sync workers handle one request at a time, a slow request (bcrypt, sending an email) blocks the worker.
+# gthread workers handle `threads` requests at once, gevent workers up to `worker_connections` requests. Compare
+# them with backend/benchmarks/worker_benchmark.py.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+# Each worker opens up to DATABASE_POOL_SIZE + DATABASE_MAX_OVERFLOW connections, keep
+# workers * (DATABASE_POOL_SIZE + DATABASE_MAX_OVERFLOW) below max_connections of postgres (or the pool of pgbouncer).
+# /api/admin/stats/database-pool shows how many connections a worker actually needs and how long requests wait.
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
 loglevel = 'warn'
 accesslog = '/app/logs/access.log'
 acceslogformat = "%(h)s %(l)s %(u)s %(t)s %(r)s %(s)s %(b)s %(f)s %(a)s"
 errorlog = '/app/logs/access.log'
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        # psycopg2 blocks the whole worker while it waits for postgres unless it yields to other greenlets
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
@@ -1,14 +1,34 @@
 import { cleanup, render, screen, act, fireEvent } from '@testing-library/react';
 import React from 'react';
 import MockModelContextProvider from '../../contexts/modelcontext.mock';
+import { LayerType } from '../../data/models';
+import { api } from '../../util/api';
 import generate from '../../util/generate';
 import LayersModal from './LayersModal';
 import { Modal } from '../utility/Modal';
 
 afterEach(cleanup);
 
+const mockLayerApi = (layers: LayerType[]) => {
+  const mockApi = jest.spyOn(api, 'get');
+  mockApi.mockImplementation((path) => {
+    if (path === 'layers/search') {
+      const results = layers.map((layer) => ({
+        layerTypeId: layer.layerTypeId,
+        layerName: layer.layerName,
+        summary: '',
+        parameters: layer.parameters.map((parameter) => parameter.name),
+      }));
+      return Promise.resolve(new Response(JSON.stringify(results))) as any;
+    }
+    const layer = layers.find((layer) => path === 'layers/' + layer.layerTypeId);
+    return Promise.resolve(new Response(JSON.stringify(layer))) as any;
+  });
+  return mockApi;
+};
+
 describe('LayersModal', () => {
-  it('shows all available layers', () => {
+  it('shows the found layers', async () => {
     const layers = [
       generate.layerType(),
       generate.layerType(),
@@ -16,32 +36,52 @@ describe('LayersModal', () => {
       generate.layerType(),
       generate.layerType(),
     ];
+    const mockApi = mockLayerApi(layers);
+
+    render(
+      <MockModelContextProvider>
+        <Modal component={<LayersModal />} />
+      </MockModelContextProvider>
+    );
+
+    expect((await screen.findAllByText('Verwenden')).length).toBe(5);
+    expect(mockApi).toBeCalledWith('layers/search', { searchParams: { q: '' } });
+    mockApi.mockRestore();
+  });
+
+  it('shows the description of the selected layer', async () => {
+    const layer = generate.layerType();
+    const mockApi = mockLayerApi([layer]);
 
     render(
-      <MockModelContextProvider availableLayers={layers}>
+      <MockModelContextProvider>
         <Modal component={<LayersModal />} />
       </MockModelContextProvider>
     );
 
-    expect(screen.getAllByText('Verwenden').length).toBe(5);
+    expect(await screen.findByText(layer.description as string)).toBeDefined();
+    expect(mockApi).toBeCalledWith('layers/' + layer.layerTypeId);
+    mockApi.mockRestore();
   });
 
   it('adds layer with button click', async () => {
     const updateModel = jest.fn();
     const layer = generate.layerType();
+    const mockApi = mockLayerApi([layer]);
 
     render(
-      <MockModelContextProvider availableLayers={[layer]} updateModel={updateModel}>
+      <MockModelContextProvider updateModel={updateModel}>
         <Modal component={<LayersModal />} />
       </MockModelContextProvider>
     );
 
-    const useButton = screen.getAllByText('Verwenden')[0];
+    const useButton = (await screen.findAllByText('Verwenden'))[0];
 
     await act(async () => {
       fireEvent.click(useButton);
     });
 
     expect(updateModel).toBeCalledWith({ type: 'ADD_LAYER', layerTypeId: layer.layerTypeId });
+    mockApi.mockRestore();
   });
 });
@@ -1,25 +1,78 @@
 import classNames from 'classnames';
 import React, { ChangeEvent, useEffect, useState } from 'react';
+import { toast } from 'react-toastify';
 import { useModelContext } from '../../contexts/ModelProvider';
-import { LayerType } from '../../data/models';
+import { LayerSearchResult, LayerType } from '../../data/models';
+import { api } from '../../util/api';
 import { Modal, useModal } from '../utility/Modal';
 
+// Milliseconds after the last keystroke before the layers are searched
+const SEARCH_DELAY = 200;
+
 type LayersPopupProps = {};
 
 const LayersModal: React.FC<LayersPopupProps> = () => {
   const modal = useModal();
   const [filterText, setFilterText] = useState('');
-  const { availableLayers, updateModel } = useModelContext();
-  const [layerTypes, setLayerTypes] = useState(availableLayers);
+  const { updateModel } = useModelContext();
+  const [layerTypes, setLayerTypes] = useState<LayerSearchResult[]>([]);
+
+  const [activeLayerId, setActiveLayerId] = useState<string | null>(null);
+  const [activeLayer, setActiveLayer] = useState<LayerType | null>(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    /**
+     * Searches the layers on the server, only the results of the latest search are shown
+     */
+    const searchLayers = async () => {
+      try {
+        const response = await api.get('layers/search', { searchParams: { q: filterText } });
+        const results: LayerSearchResult[] = await response.json();
+        if (!cancelled) {
+          setLayerTypes(results);
+          setActiveLayerId((id) => id ?? results[0]?.layerTypeId ?? null);
+        }
+      } catch (error) {
+        if (!cancelled) {
+          toast.error('Fehler beim Laden der Layer');
+        }
+      }
+    };
 
-  const [activeLayer, setActiveLayer] = useState<LayerType | null>(availableLayers[0]);
+    const timeout = setTimeout(searchLayers, filterText ? SEARCH_DELAY : 0);
+    return () => {
+      cancelled = true;
+      clearTimeout(timeout);
+    };
+  }, [filterText]);
 
   useEffect(() => {
-    const filteredLayers = availableLayers.filter((layerType) =>
-      layerType.layerTypeId.toLowerCase().includes(filterText.toLowerCase())
-    );
-    setLayerTypes(filteredLayers);
-  }, [availableLayers, filterText]);
+    let cancelled = false;
+    /**
+     * Fetches the description of the selected layer, the search results don't contain it
+     */
+    const fetchLayer = async (id: string) => {
+      try {
+        const response = await api.get('layers/' + encodeURIComponent(id));
+        const layer: LayerType = await response.json();
+        if (!cancelled) {
+          setActiveLayer(layer);
+        }
+      } catch (error) {
+        if (!cancelled) {
+          toast.error('Fehler beim Laden des Layers');
+        }
+      }
+    };
+
+    if (activeLayerId) {
+      fetchLayer(activeLayerId);
+    }
+    return () => {
+      cancelled = true;
+    };
+  }, [activeLayerId]);
 
   const handleFilterInput = (event: ChangeEvent<HTMLInputElement>) => {
     setFilterText(event.target.value);
@@ -45,7 +98,7 @@ const LayersModal: React.FC<LayersPopupProps> = () => {
             onChange={handleFilterInput}
           />
           {layerTypes.map((element) => {
-            const active = activeLayer?.layerTypeId === element.layerTypeId;
+            const active = activeLayerId === element.layerTypeId;
             const classes = classNames(
               'px-2 py-4 w-full border-b cursor-pointer flex justify-between items-center group',
               {
@@ -53,8 +106,15 @@ const LayersModal: React.FC<LayersPopupProps> = () => {
               }
             );
             return (
-              <div className={classes} onClick={() => setActiveLayer(element)} key={element.layerTypeId}>
-                <h3 className="font-mono text-xl">{element.layerTypeId}</h3>
+              <div
+                className={classes}
+                onClick={() => setActiveLayerId(element.layerTypeId)}
+                key={element.layerTypeId}
+              >
+                <div>
+                  <h3 className="font-mono text-xl">{element.layerTypeId}</h3>
+                  <p className="text-sm text-gray-700">{element.summary}</p>
+                </div>
                 <div className="flex">
                   <a
                     href={'https://pytorch.org/docs/1.4.0/nn.html#' + element.layerTypeId}
@@ -1,12 +1,11 @@
-import React, { useEffect, useState } from 'react';
-import { Function, LayerType, Model } from '../data/models';
+import React, { useEffect, useRef, useState } from 'react';
+import { Function, Model } from '../data/models';
 import { Actions, api, dispatchModelApi } from '../util/api';
 import { toast } from 'react-toastify';
 
 type ModelContextProps = {
   model: Model;
   setModel: React.Dispatch<React.SetStateAction<Model>>;
-  availableLayers: LayerType[];
   activationFunctions: Function[];
   updateModel: (action: Actions) => Promise<boolean>;
 };
@@ -15,16 +14,24 @@ export const ModelContext = React.createContext<ModelContextProps | null>(null);
 
 export type ModelContextProviderProps = {
   initialModel: Model;
+  // The catalog version of the model response, the catalogs of a version can be cached indefinitely
+  catalogVersion?: string | null;
 };
 
-export const ModelContextProvider: React.FC<ModelContextProviderProps> = ({ children, initialModel }) => {
+export const ModelContextProvider: React.FC<ModelContextProviderProps> = ({
+  children,
+  initialModel,
+  catalogVersion,
+}) => {
   const [model, setModel] = useState<Model>(initialModel);
-  const [availableLayers, setAvailableLayers] = useState<LayerType[]>([]);
+  // The model as the backend returned it last, changes are returned as a patch against it
+  const servedModel = useRef<Model>(initialModel);
   const [activationFunctions, setActivationFunctions] = useState<Function[]>([]);
 
   const updateModel = async (action: Actions) => {
     try {
-      const newModel = await dispatchModelApi(model.modelId, action);
+      const newModel = await dispatchModelApi(model.modelId, action, servedModel.current);
+      servedModel.current = newModel;
       setModel(newModel);
     } catch (error) {
       const errorJson = await error.response.json();
@@ -39,23 +46,10 @@ export const ModelContextProvider: React.FC<ModelContextProviderProps> = ({ chil
   };
 
   useEffect(() => {
-    /**
-     * Fetches all available layers into the state
-     */
-    const fetchLayers = async () => {
-      try {
-        const response = await api.get('layers');
-        const layers = await response.json();
-        setAvailableLayers(layers);
-      } catch (error) {
-        toast.error('Fehler beim Laden der Layer');
-        setAvailableLayers([]);
-      }
-    };
-
     const fetchActivationFunctions = async () => {
       try {
-        const response = await api.get('functions');
+        const options = catalogVersion ? { searchParams: { v: catalogVersion } } : undefined;
+        const response = await api.get('functions', options);
         const functions = await response.json();
         setActivationFunctions(functions);
       } catch (error) {
@@ -64,9 +58,8 @@ export const ModelContextProvider: React.FC<ModelContextProviderProps> = ({ chil
       }
     };
 
-    fetchLayers();
     fetchActivationFunctions();
-  }, []);
+  }, [catalogVersion]);
 
   return (
     <ModelContext.Provider
@@ -74,7 +67,6 @@ export const ModelContextProvider: React.FC<ModelContextProviderProps> = ({ chil
         updateModel,
         model,
         setModel,
-        availableLayers,
         activationFunctions,
       }}
     >
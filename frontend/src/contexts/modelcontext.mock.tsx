@@ -1,6 +1,6 @@
 import React from 'react';
 import { ModelContext } from '../../src/contexts/ModelProvider';
-import { ModelLayer, Function, LayerType } from '../../src/data/models';
+import { ModelLayer, Function } from '../../src/data/models';
 import { Actions } from '../../src/util/api';
 
 type MockModelContextProvider = {
@@ -8,7 +8,6 @@ type MockModelContextProvider = {
   functions?: any[];
   updateModel?: (action: Actions) => Promise<boolean>;
   activationFunctions?: Function[];
-  availableLayers?: LayerType[];
 };
 
 export const mockModel = {
@@ -32,7 +31,6 @@ const MockModelContextProvider: React.FC<MockModelContextProvider> = ({
   functions,
   updateModel,
   activationFunctions,
-  availableLayers,
 }) => {
   return (
     <ModelContext.Provider
@@ -44,7 +42,6 @@ const MockModelContextProvider: React.FC<MockModelContextProvider> = ({
         },
         updateModel: updateModel || jest.fn(),
         setModel: () => {},
-        availableLayers: availableLayers || [],
         activationFunctions: activationFunctions || [],
       }}
     >
@@ -14,6 +14,17 @@ export type Model = {
   updatedAt: string;
   layers: ModelLayer[];
   activators: ModelActivator[];
+  // The revision from the X-Model-Revision header, not part of the serialized model
+  revision?: number;
+};
+
+export type ModelSummary = {
+  modelId: string;
+  name: string;
+  createdAt: string;
+  updatedAt: string;
+  layerCount: number;
+  activatorCount: number;
 };
 
 export type ModelActivator = {
@@ -38,6 +49,14 @@ export type LayerType = {
   parameters: LayerParameter[];
 };
 
+export type LayerSearchResult = {
+  layerTypeId: string;
+  layerName: string;
+  summary: string;
+  parameters: string[];
+  score?: number;
+};
+
 export type LayerParameter = {
   name: string;
   description: string;
@@ -8,23 +8,19 @@ import Navigation from '../components/navigation/NavigationBar';
 import { Modal, useModal } from '../components/utility/Modal';
 import FormField from '../components/utility/FormField';
 import LoadingIndicator from '../components/utility/LoadingIndicator';
-import { Model } from '../data/models';
-import { api } from '../util/api';
+import { ModelSummary } from '../data/models';
+import { api, getAllPages } from '../util/api';
 Settings.defaultLocale = 'de';
 
 const Homepage: React.FC = () => {
   const [creatingNewModel, setCreatingNewModel] = useState(false);
-  const [models, setModels] = useState<Model[]>([]);
+  const [models, setModels] = useState<ModelSummary[]>([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     const loadModels = async () => {
       setLoading(true);
-      const response = await api.get('models');
-      if (response.status === 200) {
-        const models = await response.json();
-        setModels(models);
-      }
+      setModels(await getAllPages<ModelSummary>('models'));
       setLoading(false);
     };
     loadModels();
@@ -48,7 +44,7 @@ const Homepage: React.FC = () => {
 
         {loading && <LoadingIndicator text="Loading models..." />}
         {!loading &&
-          models.map((model: Model) => {
+          models.map((model: ModelSummary) => {
             return <ModelCard model={model} key={model.modelId} />;
           })}
         {creatingNewModel && <Modal component={<CreateModelModal />} onClose={hideAddModelModal} />}
@@ -58,7 +54,7 @@ const Homepage: React.FC = () => {
 };
 
 type ModelCardProps = {
-  model: Model;
+  model: ModelSummary;
 };
 
 const ModelCard: React.FC<ModelCardProps> = ({ model }) => {
@@ -13,7 +13,7 @@ import { useAuth } from '../contexts/AuthProvider';
 import { ModelContextProvider, useModelContext } from '../contexts/ModelProvider';
 import { usePage } from '../contexts/PageProvider';
 import { Model } from '../data/models';
-import { api } from '../util/api';
+import { api, readModel } from '../util/api';
 import { exitFullscreen, requestFullscreen } from '../util/fullscreen';
 import { Modal } from '../components/utility/Modal';
 import SettingsModal from '../components/modelpage/SettingsModal';
@@ -169,6 +169,7 @@ export const Modelpage: React.FC = () => {
 const ModelpageWrapper = () => {
   const { modelId } = useParams();
   const [model, setModel] = useState<Model | undefined>(undefined);
+  const [catalogVersion, setCatalogVersion] = useState<string | null>(null);
   const { setPageTitle } = usePage();
 
   useEffect(() => {
@@ -178,8 +179,9 @@ const ModelpageWrapper = () => {
     const fetchModel = async () => {
       const response = await api.get('models/' + modelId);
       if (response.status === 200) {
-        const model = await response.json();
+        const model = await readModel(response);
         setPageTitle(model.name);
+        setCatalogVersion(response.headers.get('X-Catalog-Version'));
         setModel(model);
       }
     };
@@ -198,7 +200,7 @@ const ModelpageWrapper = () => {
     );
   } else {
     return (
-      <ModelContextProvider initialModel={model}>
+      <ModelContextProvider initialModel={model} catalogVersion={catalogVersion}>
         <Modelpage />
       </ModelContextProvider>
     );
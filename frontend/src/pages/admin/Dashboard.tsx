@@ -7,12 +7,24 @@ import { api } from '../../util/api';
 
 type DashboardData = {
   userCount: number;
+  confirmedUserCount: number;
   modelCount: number;
+  layerCount: number;
+  activatorCount: number;
+  layerTypeUsage: Record<string, number>;
+};
+
+type HistoryEntry = {
+  day: string;
+  userCount: number;
+  modelCount: number;
+  layerCount: number;
 };
 
 const Dashboard: React.FC = () => {
   const [loading, setLoading] = useState(true);
   const [data, setData] = useState<DashboardData>();
+  const [history, setHistory] = useState<HistoryEntry[]>([]);
   const { setPageTitle } = usePage();
 
   useEffect(() => {
@@ -21,6 +33,8 @@ const Dashboard: React.FC = () => {
       const statsResponse = await api.get('admin/stats');
       setData(await statsResponse.json());
       setLoading(false);
+      const historyResponse = await api.get('admin/stats/history', { searchParams: { days: 14 } });
+      setHistory(await historyResponse.json());
     };
     fetchStats();
     return () => setPageTitle('');
@@ -36,6 +50,7 @@ const Dashboard: React.FC = () => {
         >
           <h2 className="text-xl font-bold">Benutzer</h2>
           {!loading && <h2 className="">{data?.userCount} registrierte Benutzer</h2>}
+          {!loading && <p className="text-sm">davon {data?.confirmedUserCount} bestätigt</p>}
           {loading && <FontAwesomeIcon icon={faSpinner} spin />}
         </Link>
         <Link
@@ -49,9 +64,36 @@ const Dashboard: React.FC = () => {
         <div className="bg-white rounded p-5 m-2">
           <h2 className="text-xl font-bold">Modelle</h2>
           {!loading && <h2 className="">{data?.modelCount} erstellte Modelle</h2>}
+          {!loading && (
+            <p className="text-sm">
+              {data?.layerCount} Layer, {data?.activatorCount} Aktivatoren
+            </p>
+          )}
           {loading && <FontAwesomeIcon icon={faSpinner} spin />}
         </div>
       </div>
+      {history.length > 0 && (
+        <table className="bg-white rounded m-2">
+          <thead>
+            <tr>
+              <th className="p-2 text-left">Tag</th>
+              <th className="p-2 text-right">Benutzer</th>
+              <th className="p-2 text-right">Modelle</th>
+              <th className="p-2 text-right">Layer</th>
+            </tr>
+          </thead>
+          <tbody>
+            {history.map((entry) => (
+              <tr key={entry.day}>
+                <td className="p-2">{entry.day}</td>
+                <td className="p-2 text-right">{entry.userCount}</td>
+                <td className="p-2 text-right">{entry.modelCount}</td>
+                <td className="p-2 text-right">{entry.layerCount}</td>
+              </tr>
+            ))}
+          </tbody>
+        </table>
+      )}
     </div>
   );
 };
@@ -1,4 +1,4 @@
-import { api, dispatchModelApi } from './api';
+import { api, dispatchModelApi, dispatchModelApiBatch, getAllPages } from './api';
 import { Model } from '../data/models';
 import generate from './generate';
 
@@ -91,6 +91,57 @@ describe('dispatchModelApi', () => {
       modelActivatorId: 3,
     });
     expect(returnedModel).toStrictEqual(model);
-    expect(mock).toBeCalledWith('models/some-model-id/activators/3');
+    expect(mock).toBeCalledWith('models/some-model-id/activators/3', {});
+  });
+
+  it('applies a JSON Patch to the base model', async () => {
+    const mock = jest.spyOn(api, 'put');
+    const patch = [{ op: 'replace', path: '/name', value: 'new-name' }];
+    mock.mockResolvedValue(
+      new Response(JSON.stringify(patch), {
+        headers: { 'Content-Type': 'application/json-patch+json', 'X-Model-Revision': '4' },
+      })
+    );
+
+    const returnedModel: Model = await dispatchModelApi(
+      modelId,
+      { type: 'UPDATE_MODEL_NAME', newName: 'new-name' },
+      { ...model, revision: 3 }
+    );
+    expect(returnedModel).toStrictEqual({ ...model, name: 'new-name', revision: 4 });
+    expect(mock).toBeCalledWith('models/some-model-id/name', {
+      json: { name: 'new-name' },
+      headers: { Accept: 'application/json-patch+json, application/json', 'X-Model-Revision': '3' },
+    });
+  });
+});
+
+describe('dispatchModelApiBatch', () => {
+  it('sends all actions in one request', async () => {
+    const model = generate.model({ modelId });
+    const mock = jest.spyOn(api, 'post');
+    mock.mockResolvedValue(buildResponse(model));
+
+    const batch = [
+      { type: 'ADD_LAYER' as const, layerTypeId: '3' },
+      { type: 'DELETE_MODEL_ACTIVATOR' as const, modelActivatorId: 3 },
+    ];
+    const returnedModel: Model = await dispatchModelApiBatch(modelId, batch);
+    expect(returnedModel).toStrictEqual(model);
+    expect(mock).toBeCalledWith('models/some-model-id/batch', { json: { actions: batch } });
+  });
+});
+
+describe('getAllPages', () => {
+  it('follows the cursor until the last page', async () => {
+    const mock = jest.spyOn(api, 'get');
+    mock
+      .mockResolvedValueOnce(new Response(JSON.stringify([1, 2]), { headers: { 'X-Next-Cursor': 'next' } }))
+      .mockResolvedValueOnce(new Response(JSON.stringify([3])));
+
+    const items = await getAllPages<number>('models');
+    expect(items).toStrictEqual([1, 2, 3]);
+    expect(mock).toHaveBeenNthCalledWith(1, 'models', undefined);
+    expect(mock).toHaveBeenNthCalledWith(2, 'models', { searchParams: { cursor: 'next' } });
   });
 });
@@ -1,5 +1,9 @@
-import ky, { NormalizedOptions } from 'ky';
+import ky, { NormalizedOptions, Options } from 'ky';
 import { Model } from '../data/models';
+import { applyPatch } from './jsonPatch';
+
+const JSON_PATCH_MIMETYPE = 'application/json-patch+json';
+const REVISION_HEADER = 'X-Model-Revision';
 
 const refreshToken = async (request: Request, options: NormalizedOptions, response: Response) => {
   if (response.status === 401) {
@@ -21,65 +25,102 @@ export const api = ky.extend({
   },
 });
 
-const addLayer = async (modelId: string, layerTypeId: string) => {
+// Loads every page of a paginated list, following the cursor the backend sends with each page
+export const getAllPages = async <T>(path: string): Promise<T[]> => {
+  const items: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const response: Response = await api.get(path, cursor ? { searchParams: { cursor } } : undefined);
+    items.push(...(await response.json()));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+
+  return items;
+};
+
+// Asks for a JSON Patch against the base model instead of the full model, the backend still answers with the full
+// model if it doesn't have the revision of the base model anymore
+const changeOptions = (base?: Model, options: Options = {}): Options => {
+  if (base?.revision === undefined) {
+    return options;
+  }
+  const headers = { Accept: `${JSON_PATCH_MIMETYPE}, application/json`, [REVISION_HEADER]: String(base.revision) };
+  return { ...options, headers };
+};
+
+// Reads the model of a response, which is either the full model or a JSON Patch against the base model
+export const readModel = async (response: Response, base?: Model): Promise<Model> => {
+  const body = await response.json();
+  const isPatch = (response.headers.get('Content-Type') || '').startsWith(JSON_PATCH_MIMETYPE);
+  const model: Model = isPatch && base ? applyPatch(base, body) : body;
+  const revision = response.headers.get(REVISION_HEADER);
+  return revision === null ? model : { ...model, revision: Number(revision) };
+};
+
+const addLayer = async (modelId: string, layerTypeId: string, base?: Model) => {
   const data = {
     layerId: layerTypeId,
   };
-  const response = await api.post('models/' + modelId + '/layers', { json: data });
+  const response = await api.post('models/' + modelId + '/layers', changeOptions(base, { json: data }));
 
-  const model = await response.json();
+  const model = await readModel(response, base);
   return model;
 };
 
-const deleteLayer = async (modelId: string, layerId: number): Promise<Model> => {
-  const response = await api.delete('models/' + modelId + '/layers/' + layerId);
-  const model = await response.json();
+const deleteLayer = async (modelId: string, layerId: number, base?: Model): Promise<Model> => {
+  const response = await api.delete('models/' + modelId + '/layers/' + layerId, changeOptions(base));
+  const model = await readModel(response, base);
   return model;
 };
 
-const updateModelLayerParameterData = async (modelId: string, action: UpdateModelLayerParameterData) => {
+const updateModelLayerParameterData = async (modelId: string, action: UpdateModelLayerParameterData, base?: Model) => {
   const data = {
     newValue: action.newValue,
   };
 
-  const response = await api.put(`models/${modelId}/layers/${action.modelLayerId}/data/${action.parameterName}`, {
-    json: data,
-  });
+  const response = await api.put(
+    `models/${modelId}/layers/${action.modelLayerId}/data/${action.parameterName}`,
+    changeOptions(base, { json: data })
+  );
 
-  const model = await response.json();
+  const model = await readModel(response, base);
 
   return model;
 };
 
-const updateModelActivatorOrder = async (modelId: string, action: UpdateModelActivatorOrder) => {
+const updateModelActivatorOrder = async (modelId: string, action: UpdateModelActivatorOrder, base?: Model) => {
   const data = {
     newIndex: action.newIndex,
   };
 
-  const response = await api.put('models/' + modelId + '/activators/' + action.activatorId + '/order', { json: data });
-  const model = await response.json();
+  const response = await api.put(
+    'models/' + modelId + '/activators/' + action.activatorId + '/order',
+    changeOptions(base, { json: data })
+  );
+  const model = await readModel(response, base);
 
   return model;
 };
 
-const addModelActivator = async (modelId: string, action: AddModelActivator) => {
+const addModelActivator = async (modelId: string, action: AddModelActivator, base?: Model) => {
   const data = {
     activatorId: action.activatorId,
   };
 
-  const response = await api.post('models/' + modelId + '/activators', {
-    json: data,
-  });
+  const response = await api.post('models/' + modelId + '/activators', changeOptions(base, { json: data }));
 
-  const model = await response.json();
+  const model = await readModel(response, base);
 
   return model;
 };
 
-const deleteModelActivator = async (modelId: string, action: DeleteModelActivator) => {
-  const response = await api.delete('models/' + modelId + '/activators/' + action.modelActivatorId);
+const deleteModelActivator = async (modelId: string, action: DeleteModelActivator, base?: Model) => {
+  const response = await api.delete(
+    'models/' + modelId + '/activators/' + action.modelActivatorId,
+    changeOptions(base)
+  );
 
-  const model = await response.json();
+  const model = await readModel(response, base);
 
   return model;
 };
@@ -98,55 +139,66 @@ const deleteModelActivator = async (modelId: string, action: DeleteModelActivato
 //   return model;
 // };
 
-const updateModelActivatorParameterData = async (modelId: string, action: UpdateModelActivatorParameterData) => {
+const updateModelActivatorParameterData = async (
+  modelId: string,
+  action: UpdateModelActivatorParameterData,
+  base?: Model
+) => {
   const data = {
     newValue: action.newValue,
   };
 
   const response = await api.put(
     'models/' + modelId + '/activators/' + action.modelActivatorId + '/data/' + action.parameterName,
-    {
-      json: data,
-    }
+    changeOptions(base, { json: data })
   );
 
-  const model = await response.json();
+  const model = await readModel(response, base);
 
   return model;
 };
 
-const updateModelName = async (modelId: string, action: UpdateModelName) => {
+const updateModelName = async (modelId: string, action: UpdateModelName, base?: Model) => {
   const data = {
     name: action.newName,
   };
 
-  const response = await api.put(`models/${modelId}/name`, { json: data });
-  const model = await response.json();
+  const response = await api.put(`models/${modelId}/name`, changeOptions(base, { json: data }));
+  const model = await readModel(response, base);
 
   return model;
 };
 
-export const dispatchModelApi = async (modelId: string, action: Actions) => {
+// The base model is the model the backend returned last, the changed model is returned as a patch against it
+export const dispatchModelApi = async (modelId: string, action: Actions, base?: Model) => {
   switch (action.type) {
     case 'ADD_LAYER':
-      return await addLayer(modelId, action.layerTypeId);
+      return await addLayer(modelId, action.layerTypeId, base);
     case 'DELETE_LAYER':
-      return await actions.deleteLayer(modelId, action.modelLayerId);
+      return await actions.deleteLayer(modelId, action.modelLayerId, base);
     case 'UPDATE_MODEL_NAME':
-      return await actions.updateModelName(modelId, action);
+      return await actions.updateModelName(modelId, action, base);
     case 'UPDATE_MODEL_LAYER_PARAMETER_DATA':
-      return await actions.updateModelLayerParameterData(modelId, action);
+      return await actions.updateModelLayerParameterData(modelId, action, base);
     case 'UPDATE_MODEL_ACTIVATOR_ORDER':
-      return await actions.updateModelActivatorOrder(modelId, action);
+      return await actions.updateModelActivatorOrder(modelId, action, base);
     case 'ADD_MODEL_ACTIVATOR':
-      return await actions.addModelActivator(modelId, action);
+      return await actions.addModelActivator(modelId, action, base);
     case 'DELETE_MODEL_ACTIVATOR':
-      return await actions.deleteModelActivator(modelId, action);
+      return await actions.deleteModelActivator(modelId, action, base);
     case 'UPDATE_MODEL_ACTIVATOR_PARAMETER_DATA':
-      return await actions.updateModelActivatorParameterData(modelId, action);
+      return await actions.updateModelActivatorParameterData(modelId, action, base);
   }
 };
 
+// Applies several actions in one request and one transaction
+export const dispatchModelApiBatch = async (modelId: string, batch: Actions[], base?: Model): Promise<Model> => {
+  const response = await api.post(`models/${modelId}/batch`, changeOptions(base, { json: { actions: batch } }));
+  const model = await readModel(response, base);
+
+  return model;
+};
+
 type AddLayer = {
   type: 'ADD_LAYER';
   layerTypeId: string;
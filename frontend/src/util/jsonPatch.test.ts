@@ -0,0 +1,26 @@
+import { applyPatch } from './jsonPatch';
+
+describe('applyPatch', () => {
+  it('adds, replaces and removes values of objects and lists', () => {
+    const document = { name: 'a', layers: [{ id: 1 }, { id: 2 }, { id: 3 }], data: { 'a/b': 1, c: 2 } };
+
+    const patched = applyPatch(document, [
+      { op: 'replace', path: '/name', value: 'b' },
+      { op: 'replace', path: '/layers/0/id', value: 4 },
+      { op: 'remove', path: '/layers/2' },
+      { op: 'add', path: '/layers/2', value: { id: 5 } },
+      { op: 'remove', path: '/data/a~1b' },
+      { op: 'add', path: '/data/d', value: 3 },
+    ]);
+
+    expect(patched).toStrictEqual({ name: 'b', layers: [{ id: 4 }, { id: 2 }, { id: 5 }], data: { c: 2, d: 3 } });
+  });
+
+  it('leaves the original document unchanged', () => {
+    const document = { layers: [{ id: 1 }] };
+
+    applyPatch(document, [{ op: 'remove', path: '/layers/0' }]);
+
+    expect(document).toStrictEqual({ layers: [{ id: 1 }] });
+  });
+});
@@ -0,0 +1,41 @@
+export type PatchOperation = {
+  op: 'add' | 'remove' | 'replace';
+  path: string;
+  value?: any;
+};
+
+const parsePointer = (path: string) =>
+  path
+    .split('/')
+    .slice(1)
+    .map((token) => token.replace(/~1/g, '/').replace(/~0/g, '~'));
+
+// Applies a JSON Patch (RFC 6902) to a copy of a document, supports the operations the backend creates
+export const applyPatch = <T>(document: T, patch: PatchOperation[]): T => {
+  let result = JSON.parse(JSON.stringify(document));
+  for (const operation of patch) {
+    const tokens = parsePointer(operation.path);
+    const key = tokens.pop();
+    if (key === undefined) {
+      result = operation.value;
+      continue;
+    }
+
+    const parent = tokens.reduce((node, token) => node[token], result);
+    if (Array.isArray(parent)) {
+      const index = key === '-' ? parent.length : Number(key);
+      if (operation.op === 'add') {
+        parent.splice(index, 0, operation.value);
+      } else if (operation.op === 'remove') {
+        parent.splice(index, 1);
+      } else {
+        parent[index] = operation.value;
+      }
+    } else if (operation.op === 'remove') {
+      delete parent[key];
+    } else {
+      parent[key] = operation.value;
+    }
+  }
+  return result;
+};
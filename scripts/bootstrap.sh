@@ -13,6 +13,8 @@ fi
 if ! [ -d "./$VENV" ]; then
   python3 -m venv ./$VENV
   ./$VENV/bin/pip install -r requirements.txt
+  # torch is only needed to build the catalog of layer types with "flask catalog build"
+  ./$VENV/bin/pip install -r requirements-catalog.txt
   echo "Virtuelles Environment '$VENV' wurde erstellt"
   echo "Aktiviere mit:"
   echo "  source ./$VENV/bin/activate"